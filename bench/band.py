@@ -0,0 +1,74 @@
+# ./bench/band.py
+"""分带渲染基准测试
+
+比较不同条带高度(Display(band_height=N))下局部刷新的吞吐量和渲染内存:
+    python3 -m bench.band                        # 全部场景, 条带高度 0(不切分),8,16,32,64
+    python3 -m bench.band scroll -b 0,16 -f 40   # 指定场景, 条带高度和帧数
+    python3 -m bench.band -w 100                 # 100个widget的放大场景
+
+每个条带单独渲染并刷新, 条带越矮渲染内存越小, 但刷新窗口越多, 每个窗口都有固定开销.
+结果中 kpx/s 为每秒刷新的千像素数(吞吐量), arena 为渲染临时位图的字节数(峰值渲染内存).
+"""
+import sys
+
+import host
+host.install()
+
+import time
+
+from displayio.output.null import NullOutput
+from bench.scenes import SCENES
+
+DEFAULT_BANDS = (0, 8, 16, 32, 64)
+
+
+def run_band(name, widgets, band_height, frames):
+    """运行一个场景, 返回除首帧外的统计"""
+    output = NullOutput(240, 240)
+    scene = SCENES[name](widgets=widgets, output=output, partly_refresh=True, band_height=band_height)
+    loop = scene.display.loop
+    loop.update_layout()
+    loop.update_display() # 首帧全屏绘制不计入
+    output.reset_stats()
+    elapsed = 0
+    for frame in range(1, frames + 1):
+        scene.step(frame)
+        start = time.ticks_us()
+        loop.update_layout()
+        loop.update_display()
+        elapsed += time.ticks_diff(time.ticks_us(), start)
+    return {'us': elapsed // frames, 'windows': output.refresh_count / frames,
+            'pixels': output.pixels_flushed // frames,
+            'kpx_s': output.pixels_flushed * 1000 // elapsed if elapsed else 0,
+            'arena': len(loop.dirty_bitmap.arena)}
+
+
+def main(argv):
+    names, bands, widgets, frames = [], DEFAULT_BANDS, 0, 20
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg in ('-b', '--bands'):
+            bands = tuple(int(b) for b in args.pop(0).split(','))
+        elif arg in ('-w', '--widgets'):
+            widgets = int(args.pop(0))
+        elif arg in ('-f', '--frames'):
+            frames = int(args.pop(0))
+        elif arg in SCENES:
+            names.append(arg)
+        else:
+            print(__doc__)
+            return 1
+    print('%-12s %6s %8s %8s %8s %8s %8s' % ('scene', 'band', 'us', 'windows', 'pixels', 'kpx/s', 'arena'))
+    for name in names or list(SCENES):
+        for band_height in bands:
+            r = run_band(name, widgets, band_height, frames)
+            print('%-12s %6s %8d %8.1f %8d %8d %8d' % (
+                '%s[%s]' % (name, widgets or 'ex'), band_height or '-', r['us'], r['windows'],
+                r['pixels'], r['kpx_s'], r['arena']))
+    print('(band - = 不切分; us/windows/pixels 为帧平均)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+# ./bench/dirty.py
+"""脏区域系统基准测试
+
+对同一组脏矩形, 比较各脏区域系统合并的耗时, 输出的矩形数, 刷新字节数,
+以及按 SweepRegionSystem 的代价模型(每个矩形 WINDOW_COST + 每像素 PIXEL_COST)估算的刷新代价:
+    python3 -m bench.dirty
+    python3 -m bench.dirty -r 50      # 每个负载重复50次取平均
+"""
+import sys
+
+import host
+host.install()
+
+import time
+import random
+
+from displayio.core.dirty import DirtySystem, MergeRegionSystem, BoundBoxSystem, SweepRegionSystem, GridSystem
+
+SYSTEMS = [MergeRegionSystem, BoundBoxSystem, SweepRegionSystem, GridSystem]
+
+
+def _label_grid(n, cell=24, w=20, h=16):
+    """一格一个label, 同时改变"""
+    cols = 240 // cell
+    return [((i % cols) * cell + 2, (i // cols) * cell + 4, w, h) for i in range(n)]
+
+def _scattered(n, size=16, seed=1):
+    """随机分布的小区域"""
+    rnd = random.Random(seed)
+    return [(rnd.randrange(0, 240 - size), rnd.randrange(0, 240 - size), size, size) for _ in range(n)]
+
+def _big_and_small():
+    """一个大的动画区域加上几个小的状态图标"""
+    return [(20, 60, 200, 120)] + [(i * 24, 0, 16, 16) for i in range(10)]
+
+def _text_line():
+    """逐字输入,相邻区域重叠"""
+    return [(i * 12, 100, 16, 16) for i in range(18)]
+
+def _corners():
+    """对角的两个小区域, 包围盒很浪费"""
+    return [(0, 0, 16, 16), (224, 224, 16, 16)]
+
+def _overlap_cross():
+    """十字交叉的两条, 并集很浪费, 适合切分"""
+    return [(0, 110, 240, 20), (110, 0, 20, 240)]
+
+WORKLOADS = [
+    ('label_grid_10', lambda: _label_grid(10)),
+    ('label_grid_100', lambda: _label_grid(100)),
+    ('scattered_20', lambda: _scattered(20)),
+    ('scattered_100', lambda: _scattered(100)),
+    ('big_and_small', _big_and_small),
+    ('text_line', _text_line),
+    ('corners', _corners),
+    ('cross', _overlap_cross),
+]
+
+
+def _new_system(cls):
+    """创建一个独立的默认实例, 不影响全局注册表"""
+    saved = DirtySystem._instances.pop('default', None)
+    try:
+        system = cls()
+        system.set_screen(240, 240)
+        return system
+    finally:
+        if saved is not None:
+            DirtySystem._instances['default'] = saved
+        else:
+            DirtySystem._instances.pop('default', None)
+
+
+def run_workload(cls, rects, repeat):
+    system = _new_system(cls)
+    start = time.ticks_us()
+    for _ in range(repeat):
+        system.clear()
+        for rect in rects:
+            system.add(*rect)
+        area = system.area
+    elapsed = time.ticks_diff(time.ticks_us(), start) // repeat
+    pixels = 0
+    for x0, y0, x1, y1 in area:
+        pixels += (x1 - x0 + 1) * (y1 - y0 + 1)
+    cost = len(area) * SweepRegionSystem.WINDOW_COST + pixels * SweepRegionSystem.PIXEL_COST
+    return {'us': elapsed, 'rects': len(area), 'bytes': pixels * 2, 'cost': cost}
+
+
+def main(argv):
+    repeat = 20
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg in ('-r', '--repeat'):
+            repeat = int(args.pop(0))
+        else:
+            print(__doc__)
+            return 1
+    print('%-16s %-18s %8s %6s %8s %8s' % ('workload', 'system', 'us', 'rects', 'bytes', 'cost'))
+    for name, make in WORKLOADS:
+        rects = make()
+        for cls in SYSTEMS:
+            r = run_workload(cls, rects, repeat)
+            print('%-16s %-18s %8d %6d %8d %8d' % (name, cls.__name__, r['us'], r['rects'], r['bytes'], r['cost']))
+    print('(cost = rects*%d + bytes, 越小越好)' % SweepRegionSystem.WINDOW_COST)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,73 @@
+# ./bench/overdraw.py
+"""过度绘制/遮挡剔除基准测试
+
+比较开启和关闭遮挡剔除(loop.render_plan.cull)时的过度绘制倍数和渲染耗时:
+    python3 -m bench.overdraw                   # 全部场景, 示例规模 + 100 widgets
+    python3 -m bench.overdraw flex -w 0,1000    # 指定场景和规模
+
+overdraw = 渲染时实际绘制的像素数 / 脏区域像素数, 1.0 表示每个像素只画一次.
+culled 为每帧被不透明widget完全遮住而跳过的绘制操作数.
+"""
+import sys
+import hashlib
+
+import host
+host.install()
+
+from displayio.output.null import RecordingOutput
+from bench.scenes import SCENES
+
+DEFAULT_WIDGETS = (0, 100)
+
+
+def run_overdraw(name, widgets, frames, cull):
+    """运行一个场景, 返回除首帧外的统计和最后一帧屏幕内容的摘要"""
+    output = RecordingOutput(240, 240)
+    scene = SCENES[name](widgets=widgets, output=output, partly_refresh=True, profile=frames)
+    loop = scene.display.loop
+    loop.render_plan.cull = cull
+    profiler = loop.profiler
+    loop.update_layout()
+    loop.update_display() # 首帧全屏绘制不计入
+    profiler.reset()
+    for frame in range(1, frames + 1):
+        scene.step(frame)
+        loop.update_layout()
+        loop.update_display()
+    count = profiler.count or 1
+    pixels = sum(profiler.values(profiler.PIXELS))
+    return {'overdraw': sum(profiler.values(profiler.PAINTED)) / pixels if pixels else 0,
+            'culled': sum(profiler.values(profiler.CULLED)) / count,
+            'render': sum(profiler.values(profiler.RENDER)) // count,
+            'frame': hashlib.md5(output.frame).hexdigest()[:8]}
+
+
+def main(argv):
+    names, widgets, frames = [], DEFAULT_WIDGETS, 20
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg in ('-w', '--widgets'):
+            widgets = tuple(int(w) for w in args.pop(0).split(','))
+        elif arg in ('-f', '--frames'):
+            frames = int(args.pop(0))
+        elif arg in SCENES:
+            names.append(arg)
+        else:
+            print(__doc__)
+            return 1
+    print('%-12s %9s %9s %8s %9s %9s %6s' % ('scene', 'overdraw', 'culled', 'render', 'overdraw', 'render', 'same'))
+    print('%-12s %9s %9s %8s %9s %9s' % ('', '(cull)', '(cull)', '(cull)', '(off)', '(off)'))
+    for name in names or list(SCENES):
+        for count in widgets:
+            on = run_overdraw(name, count, frames, True)
+            off = run_overdraw(name, count, frames, False)
+            print('%-12s %9.2f %9.1f %8d %9.2f %9d %6s' % (
+                '%s[%s]' % (name, count or 'ex'), on['overdraw'], on['culled'], on['render'],
+                off['overdraw'], off['render'], on['frame'] == off['frame']))
+    print('(帧平均; render 单位us; same = 两种方式最后一帧的屏幕内容相同)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,96 @@
+# ./bench/pipeline.py
+"""渲染/刷新流水线基准测试
+
+用模拟慢速总线的 NullOutput(bus_hz=...) 比较同步刷新和 Display(pipeline=True) 的双缓冲流水线:
+    python3 -m bench.pipeline                      # 默认场景, 默认总线频率
+    python3 -m bench.pipeline --bus 40000000 -f 40 # 指定模拟的总线频率(bit/s)和帧数
+    python3 -m bench.pipeline flex -w 100 -b 16    # 指定场景, widget数和分带高度
+
+统计的是有刷新的帧中 render+flush 阶段的平均耗时(us), 流水线不影响其他阶段.
+
+流水线只能把渲染藏到传输后面, 所以加速比的上限是 (render+flush) / max(render, flush),
+由同步刷新时分别统计的 render 和 flush 计算, 列在 bound 中. 传输远慢于渲染时(主机上模拟总线的sleep
+每次还有几十us的额外开销)上限接近1, 流水线没有明显收益; 渲染和传输耗时接近时收益最大.
+主机的CPU比MCU快得多, 默认总线频率按比例放大, 使渲染和传输的耗时差距接近设备上的情况.
+"""
+import sys
+
+import host
+host.install()
+
+import time
+
+from displayio.output.null import NullOutput
+from bench.scenes import SCENES
+
+DEFAULT_BUS = 400000000 # 模拟的总线频率
+WINDOW_US = 20          # 每个刷新窗口的固定开销
+DEFAULT_CASES = (('scroll', 0, 8), ('scroll', 0, 16), ('scroll', 0, 32), ('grid', 0, 16), ('flex', 100, 0))
+
+
+def run_pipeline(name, widgets, band_height, frames, bus_hz, pipeline):
+    """运行一个场景, 返回除首帧外每帧 render+flush 的平均耗时和刷新窗口数
+    流水线只影响渲染和刷新阶段, draw/layout 的耗时不计入, 避免掩盖差异
+    """
+    output = NullOutput(240, 240, bus_hz=bus_hz, window_us=WINDOW_US)
+    scene = SCENES[name](widgets=widgets, output=output, partly_refresh=True,
+                         band_height=band_height, pipeline=pipeline, profile=frames)
+    loop = scene.display.loop
+    profiler = loop.profiler
+    loop.update_layout()
+    loop.update_display() # 首帧全屏绘制不计入
+    output.reset_stats()
+    profiler.reset()
+    for frame in range(1, frames + 1):
+        scene.step(frame)
+        loop.update_layout()
+        loop.update_display()
+    loop.stop()
+    render = sum(profiler.values(profiler.RENDER))
+    flush = sum(profiler.values(profiler.FLUSH))
+    elapsed = render + flush
+    count = profiler.count or 1
+    return {'us': elapsed // count, 'render': render // count, 'flush': flush // count,
+            'windows': output.refresh_count / count,
+            'kpx_s': output.pixels_flushed * 1000 // elapsed if elapsed else 0}
+
+
+def main(argv):
+    cases, frames, bus_hz = [], 20, DEFAULT_BUS
+    widgets, band_height = 0, 0
+    names = []
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--bus':
+            bus_hz = int(args.pop(0))
+        elif arg in ('-f', '--frames'):
+            frames = int(args.pop(0))
+        elif arg in ('-w', '--widgets'):
+            widgets = int(args.pop(0))
+        elif arg in ('-b', '--band'):
+            band_height = int(args.pop(0))
+        elif arg in SCENES:
+            names.append(arg)
+        else:
+            print(__doc__)
+            return 1
+    cases = [(name, widgets, band_height) for name in names] or DEFAULT_CASES
+    if hasattr(sys, 'setswitchinterval'):
+        # CPython默认每5ms才切换一次线程, 刷新线程被唤醒后要等主线程让出GIL, 流水线无法重叠
+        sys.setswitchinterval(0.00002)
+    print('bus %d bit/s, window %dus' % (bus_hz, WINDOW_US))
+    print('%-14s %5s %8s %8s %8s %8s %8s %8s' % ('scene', 'band', 'windows', 'sync_us', 'pipe_us', 'speedup', 'bound', 'kpx/s'))
+    for name, count, band in cases:
+        sync = run_pipeline(name, count, band, frames, bus_hz, False)
+        pipe = run_pipeline(name, count, band, frames, bus_hz, True)
+        longest = max(sync['render'], sync['flush'])
+        print('%-14s %5s %8.1f %8d %8d %7.2fx %7.2fx %8d' % (
+            '%s[%s]' % (name, count or 'ex'), band or '-', sync['windows'], sync['us'], pipe['us'],
+            sync['us'] / pipe['us'] if pipe['us'] else 0, sync['us'] / longest if longest else 0, pipe['kpx_s']))
+    print('(帧平均; speedup = 同步刷新耗时 / 流水线耗时; bound = 完全重叠时的加速比上限)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,221 @@
+# ./bench/run.py
+"""displayio 基准测试
+
+在主机(CPython)或 micropython unix port 上运行(项目根目录下):
+    python3 -m bench.run                          # 全部场景, 示例规模 + 10/100/1000 widgets
+    python3 -m bench.run flex scroll -w 0,100     # 指定场景和规模
+    python3 -m bench.run -f 60 --partly           # 60帧, 局部刷新
+    python3 -m bench.run --json out.json          # 保存结果
+    python3 -m bench.run --compare out.json       # 与保存的结果对比
+    python3 -m bench.run --dirty AdaptiveSystem   # 指定全局脏区域系统(displayio.core.dirty中的类名)
+    python3 -m bench.run --full --threshold 50    # 混合刷新, 脏区域达到屏幕50%时才整屏刷新
+
+每帧先执行场景的交互脚本, 再依次执行 update_layout / update_display,
+由 MainLoop 内置的 FrameProfiler 统计 event/layout/draw/render/flush 的耗时(us)和脏区域数,
+另外统计刷新字节数, 帧内内存分配和堆峰值.
+各列是有刷新的帧的平均值; 没有刷新的帧(FrameProfiler丢弃的帧)单独统计帧数(skip)和 event+layout 的平均耗时(skip_us).
+"""
+import sys
+import gc
+
+import host
+host.install()
+
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from displayio.core.profiler import FrameProfiler
+from displayio.output.null import NullOutput
+from bench.scenes import SCENES
+
+PHASES = ('event', 'layout', 'draw', 'render', 'flush', 'frame', 'rects', 'pixels', 'allocs')
+DEFAULT_WIDGETS = (0, 10, 100, 1000)
+
+
+def _mem_begin():
+    if tracemalloc is not None:
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+    gc.collect()
+    gc.disable()
+    return gc.mem_alloc()
+
+def _mem_end(start):
+    """返回 (帧内分配字节数, 堆峰值)"""
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        return peak - start, peak
+    used = gc.mem_alloc()
+    gc.enable()
+    return used - start, used
+
+
+def run_scene(name, widgets, frames, partly_refresh, measure_mem, dirty_system=None, flush_threshold=0):
+    """构建场景并运行frames帧, 返回每帧统计列表
+    各阶段耗时取自 MainLoop 的 FrameProfiler, event 为交互脚本(事件回调)的耗时
+    """
+    output = NullOutput(240, 240)
+    kwargs = {'widgets': widgets, 'output': output, 'profile': 1}
+    if partly_refresh is not None:
+        kwargs['partly_refresh'] = partly_refresh
+    if dirty_system is not None:
+        kwargs['dirty_system'] = dirty_system
+    if flush_threshold:
+        kwargs['flush_threshold'] = flush_threshold
+    scene = SCENES[name](**kwargs)
+    loop = scene.display.loop
+    profiler = loop.profiler
+    records = []
+    # 第0帧为首次全屏绘制
+    for frame in range(frames + 1):
+        output.reset_stats()
+        profiler.reset()
+        if measure_mem:
+            mem_start = _mem_begin()
+        start = time.ticks_us()
+        if frame:
+            scene.step(frame)
+        profiler.lap(FrameProfiler.EVENT, start)
+        loop.update_layout()
+        # 没有刷新的帧会被丢弃, 先记下它的event/layout耗时
+        event, layout = profiler.current[FrameProfiler.EVENT], profiler.current[FrameProfiler.LAYOUT]
+        loop.update_display()
+        if profiler.count:
+            record = {field: profiler.last(i) for i, field in enumerate(FrameProfiler.FIELDS)}
+            record['flushed'] = True
+        else: # 没有需要刷新的区域, 帧被丢弃
+            record = {field: 0 for field in FrameProfiler.FIELDS}
+            record['event'], record['layout'], record['frame'] = event, layout, event + layout
+            record['flushed'] = False
+        record['bytes'] = output.bytes_flushed
+        record['windows'] = output.refresh_count
+        if measure_mem:
+            record['alloc'], record['heap'] = _mem_end(mem_start)
+        records.append(record)
+    return records
+
+
+def _flushed(records):
+    """有刷新的帧: 第一个(首次绘制) 和 之后的帧(没有之后的帧时用第一个代替)"""
+    flushed = [r for r in records if r['flushed']]
+    return flushed[:1], flushed[1:] or flushed[:1]
+
+def summarize(name, widgets, partly_refresh, timing, memory):
+    first, rest = _flushed(timing)
+    skipped = [r['frame'] for r in timing if not r['flushed']]
+    result = {'scene': name, 'widgets': widgets, 'partly_refresh': partly_refresh,
+              'frames': len(rest), 'first_frame_us': first[0]['frame'] if first else 0,
+              'skipped': len(skipped), 'skipped_us_avg': sum(skipped) // len(skipped) if skipped else 0}
+    for key in PHASES:
+        values = [r[key] for r in rest] or [0]
+        result[key + '_avg'] = sum(values) // len(values)
+        result[key + '_max'] = max(values)
+    result['bytes_avg'] = sum(r['bytes'] for r in rest) // len(rest) if rest else 0
+    result['windows_avg'] = sum(r['windows'] for r in rest) / len(rest) if rest else 0
+    if memory:
+        mem_rest = _flushed(memory)[1] or memory
+        result['alloc_avg'] = sum(r['alloc'] for r in mem_rest) // len(mem_rest)
+        result['alloc_max'] = max(r['alloc'] for r in mem_rest)
+        result['heap_peak'] = max(r['heap'] for r in memory)
+    return result
+
+
+def _key(result):
+    return '%s/%d/%s' % (result['scene'], result['widgets'], 'partly' if result['partly_refresh'] else 'full')
+
+def _label(result):
+    return '%s[%s]%s' % (result['scene'], result['widgets'] or 'ex', '*' if result['partly_refresh'] else '')
+
+def print_results(results, baseline=None):
+    """打印结果表, 给出baseline时附加帧耗时和刷新字节数的变化百分比"""
+    print('%-14s %9s %7s %7s %7s %7s %7s %8s %8s %5s %8s %9s %9s %5s %7s' % (
+        'scene', '1st_flush', 'event', 'layout', 'draw', 'render', 'flush', 'frame', 'frm_max',
+        'rects', 'bytes', 'alloc', 'heap', 'skip', 'skip_us'))
+    base = {}
+    if baseline:
+        for r in baseline:
+            base[_key(r)] = r
+    for r in results:
+        print('%-14s %9d %7d %7d %7d %7d %7d %8d %8d %5d %8d %9s %9s %5d %7d' % (
+            _label(r), r['first_frame_us'], r['event_avg'], r['layout_avg'], r['draw_avg'],
+            r['render_avg'], r['flush_avg'], r['frame_avg'], r['frame_max'], r['rects_avg'], r['bytes_avg'],
+            r.get('alloc_avg', '-'), r.get('heap_peak', '-'), r.get('skipped', 0), r.get('skipped_us_avg', 0)))
+        old = base.get(_key(r))
+        if old:
+            print('%-14s %s' % ('', '  '.join('%s %+.1f%%' % (k, _delta(old[k], r[k]))
+                                             for k in ('frame_avg', 'render_avg', 'bytes_avg', 'alloc_avg')
+                                             if k in old and k in r)))
+    print('(us, 有刷新的帧的平均; 1st_flush=第一个有刷新的帧(首次绘制); skip=没有刷新的帧数, skip_us=其event+layout平均耗时;'
+          ' [ex]=示例规模; *=局部刷新)')
+
+def _delta(old, new):
+    return (new - old) * 100 / old if old else 0.0
+
+
+def main(argv):
+    names, widgets, frames = [], DEFAULT_WIDGETS, 20
+    partly_refresh, measure_mem = None, True
+    json_path = compare_path = dirty_system = None
+    flush_threshold = 0
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg in ('-w', '--widgets'):
+            widgets = tuple(int(w) for w in args.pop(0).split(','))
+        elif arg in ('-f', '--frames'):
+            frames = int(args.pop(0))
+        elif arg == '--partly':
+            partly_refresh = True
+        elif arg == '--full':
+            partly_refresh = False
+        elif arg == '--no-mem':
+            measure_mem = False
+        elif arg == '--json':
+            json_path = args.pop(0)
+        elif arg == '--compare':
+            compare_path = args.pop(0)
+        elif arg == '--threshold':
+            flush_threshold = int(args.pop(0))
+        elif arg == '--dirty':
+            dirty_system = args.pop(0)
+        elif arg in SCENES:
+            names.append(arg)
+        else:
+            print(__doc__)
+            return 1
+    import json
+    baseline = None
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = json.load(f)
+
+    results = []
+    for name in names or list(SCENES):
+        for count in widgets:
+            timing = run_scene(name, count, frames, partly_refresh, False, dirty_system, flush_threshold)
+            memory = None
+            if measure_mem:
+                # 内存统计(tracemalloc)会拖慢运行, 单独再跑一遍
+                if tracemalloc is not None:
+                    tracemalloc.start()
+                memory = run_scene(name, count, frames, partly_refresh, True, dirty_system, flush_threshold)
+                if tracemalloc is not None:
+                    tracemalloc.stop()
+            gc.collect()
+            refresh = partly_refresh
+            if refresh is None:
+                refresh = name == 'scroll'
+            results.append(summarize(name, count, refresh, timing, memory))
+    print_results(results, baseline)
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
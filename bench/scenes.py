@@ -0,0 +1,248 @@
+# ./bench/scenes.py
+"""基准测试场景
+按 examples/test_*_box.py 的组件树搭建场景(flex/grid/scroll/free),
+并提供 widgets=N 的放大版本, 每个场景附带一个逐帧执行的交互脚本.
+"""
+from displayio.core.event import Event, EventType
+from displayio.core.style import Style
+from displayio.display import Display
+from displayio.container.flex_box import FlexBox
+from displayio.container.free_box import FreeBox
+from displayio.container.grid_box import GridBox
+from displayio.container.scroll_box import ScrollBox
+from displayio.widget.label import Label
+from displayio.widget.button import Button
+from displayio.output.null import NullOutput
+
+_font = None
+
+def load_font(path=None):
+    """加载字体数据库, 所有场景共用同一个字体"""
+    global _font
+    if _font is None:
+        import btree # type: ignore
+        if path is None:
+            path = __file__.rsplit('/', 2)[0] + '/font_16x16_rle.db'
+            if path == __file__:
+                path = 'font_16x16_rle.db'
+        _font = btree.open(open(path, 'rb'))
+    return _font
+
+def _color(i):
+    """确定性的背景色, 避免随机数影响结果的可重复性"""
+    return (i * 0x9e37 + 0x4a5b) & 0xffff or 0x0841
+
+
+class Scene:
+    """一个可重复运行的场景: 显示器, 输出驱动, 以及每帧执行一次的交互脚本"""
+    __slots__ = ('name', 'widgets', 'display', 'output', 'script')
+
+    def __init__(self, name, widgets, display, output, script):
+        self.name = name
+        self.widgets = widgets
+        self.display = display
+        self.output = output
+        self.script = script
+
+    def step(self, frame):
+        """执行第frame帧的交互"""
+        if self.script is not None:
+            self.script(frame)
+
+
+def _new_display(output, partly_refresh, width=240, height=240, **kwargs):
+    """kwargs 直接传给 Display, 例如 profile"""
+    return Display(width=width, height=height, output=output, fps=30, partly_refresh=partly_refresh, **kwargs)
+
+def _text_script(labels, per_frame):
+    """每帧轮流修改per_frame个label的文字"""
+    count = len(labels)
+    def script(frame):
+        for i in range(per_frame):
+            label = labels[(frame * per_frame + i) % count]
+            label.set_text(str(frame % 10) * 3)
+    return script
+
+def _press_script(button):
+    """奇数帧按下按钮,偶数帧释放"""
+    def script(frame):
+        if frame % 2:
+            button.press(button, None)
+        else:
+            button.release(button, None)
+    return script
+
+def _scroll_script(scroll_box):
+    """持续向下滚动,到底后向上滚动"""
+    state = [EventType.SCROLL_RIGHT]
+    def script(frame):
+        if scroll_box.scroll_offset_y >= scroll_box.scroll_range_y:
+            state[0] = EventType.SCROLL_LEFT
+        elif scroll_box.scroll_offset_y <= 0:
+            state[0] = EventType.SCROLL_RIGHT
+        scroll_box.scroll(scroll_box, Event(state[0], target_widget=scroll_box))
+    return script
+
+def _chain(*scripts):
+    def script(frame):
+        for s in scripts:
+            s(frame)
+    return script
+
+
+def build_flex(widgets=0, partly_refresh=False, output=None, **kwargs):
+    """examples/test_flex_box.py 的场景; widgets>0 时为 N 个 label 组成的行列嵌套flex布局"""
+    font = load_font()
+    output = output or NullOutput(240, 240)
+    display = _new_display(output, partly_refresh, **kwargs)
+    if not widgets:
+        main_box = FlexBox(direction=Style.HORIZONTAL)
+        box1 = FlexBox(direction=Style.VERTICAL, width=200, spacing=10)
+        box2 = FlexBox(direction=Style.HORIZONTAL, spacing=10, reverse=True)
+        display.set_root(main_box)
+        label1 = Label(text="bb", text_color=0x0001, font=font, font_scale=2,
+                       align=Label.ALIGN_CENTER, background=0xcdb0)
+        label2 = Label(text="$red greenalkd#", font=font, align=Label.ALIGN_CENTER)
+        label3 = Label(text="123", font=font, background=0x0099, rel_x=20, rel_y=20)
+        label4 = Label(text="bl", font=font, align=Label.ALIGN_RIGHT, width=40, background=0x0000)
+        button = Button(text='but', font=font, font_scale=1, align=Label.ALIGN_LEFT)
+        main_box.add(label1)
+        main_box.add(box1)
+        box1.add(label2)
+        box1.add(box2)
+        box2.add(button)
+        box2.add(label3)
+        box2.add(label4)
+        script = _chain(_press_script(button), lambda f: f % 4 == 0 and label1.set_text('b' + str(f % 10)))
+        return Scene('flex', 0, display, output, script)
+
+    cols = _isqrt_ceil(widgets)
+    rows = (widgets + cols - 1) // cols
+    main_box = FlexBox(direction=Style.VERTICAL)
+    display.set_root(main_box)
+    labels = []
+    for r in range(rows):
+        row = FlexBox(direction=Style.HORIZONTAL)
+        main_box.add(row)
+        for c in range(min(cols, widgets - r * cols)):
+            label = Label(text=str(len(labels)), font=font, background=_color(len(labels)))
+            labels.append(label)
+            row.add(label)
+    return Scene('flex', widgets, display, output, _text_script(labels, max(1, widgets // 10)))
+
+
+def build_grid(widgets=0, partly_refresh=False, output=None, **kwargs):
+    """examples/test_grid_box.py 的场景; widgets>0 时为 N 个 label 填满的网格"""
+    font = load_font()
+    output = output or NullOutput(240, 240)
+    display = _new_display(output, partly_refresh, **kwargs)
+    if not widgets:
+        main_box = GridBox(4, 4, row_spacing=10, col_spacing=10)
+        sbox = ScrollBox(background=0xffff)
+        main_box.add(sbox, 2, 2, 2, 2)
+        vbox_in_s = FlexBox(direction=Style.VERTICAL, width=110, height=300, spacing=10)
+        sbox.set_root(vbox_in_s)
+        display.set_root(main_box)
+        label1 = Label(text="1", text_color=0x0001, font=font, align=Label.ALIGN_TOP, background=0xcdb0)
+        label2 = Label(text="2", font=font, align=Label.ALIGN_CENTER, rel_x=20, rel_y=10)
+        main_box.add(label1, 0, 0)
+        main_box.add(label2, 0, 1, 2, 2)
+        for w in range(10):
+            vbox_in_s.add(Button(text=str(w) * 5, font=font, height=20, background=_color(w)))
+        script = _chain(_press_script(vbox_in_s.children[0]), _scroll_script(sbox))
+        return Scene('grid', 0, display, output, script)
+
+    cols = _isqrt_ceil(widgets)
+    rows = (widgets + cols - 1) // cols
+    main_box = GridBox(rows, cols)
+    display.set_root(main_box)
+    labels = []
+    for i in range(widgets):
+        label = Label(text=str(i), font=font, background=_color(i))
+        labels.append(label)
+        main_box.add(label, i // cols, i % cols)
+    return Scene('grid', widgets, display, output, _text_script(labels, max(1, widgets // 10)))
+
+
+def build_scroll(widgets=0, partly_refresh=True, output=None, **kwargs):
+    """examples/test_scroll_box.py 的场景; widgets>0 时滚动容器内为 N 个按钮"""
+    font = load_font()
+    output = output or NullOutput(240, 240)
+    display = _new_display(output, partly_refresh, **kwargs)
+    main_box = ScrollBox()
+    display.set_root(main_box)
+    if not widgets:
+        box1 = FlexBox(direction=Style.VERTICAL, width=240, height=400, spacing=10)
+        button1 = Button(text='butttt11', width=120, font=font, align=Label.ALIGN_RIGHT)
+        button2 = Button(text='butttt22', font=font, align=Label.ALIGN_RIGHT)
+        button = Button(abs_x=150, width=100, text='but', font=font, align=Label.ALIGN_LEFT)
+        box1.add(button1, button2, button)
+        main_box.set_root(box1)
+        script = _chain(_press_script(button1), _scroll_script(main_box))
+        return Scene('scroll', 0, display, output, script)
+
+    box1 = FlexBox(direction=Style.VERTICAL, width=240, height=widgets * 20, spacing=4)
+    buttons = [Button(text=str(i), height=16, font=font, background=_color(i)) for i in range(widgets)]
+    box1.add(*buttons)
+    main_box.set_root(box1)
+    return Scene('scroll', widgets, display, output,
+                 _chain(_press_script(buttons[0]), _scroll_script(main_box)))
+
+
+def build_free(widgets=0, partly_refresh=False, output=None, **kwargs):
+    """examples/test_free_box.py 的场景; widgets>0 时为 N 个绝对定位的 label"""
+    font = load_font()
+    output = output or NullOutput(240, 240)
+    display = _new_display(output, partly_refresh, **kwargs)
+    main_box = FreeBox()
+    display.set_root(main_box)
+    if not widgets:
+        box1 = FreeBox(abs_y=100)
+        main_box.add(box1)
+        label1 = Label(text="label1 in", text_color=0x0001, font=font, align=Label.ALIGN_LEFT,
+                       background=0xcdb0, abs_y=200, width=170, height=20)
+        main_box.add(label1)
+        label2 = Label(text="label2", font=font, align=Label.ALIGN_CENTER,
+                       rel_x=50, rel_y=50, width=100, height=20)
+        box1.add(label2)
+        label3 = Label(text="label3", font=font, background=0x0099,
+                       abs_x=120, abs_y=20, width=100, height=20)
+        main_box.add(label3)
+        label4 = Label(text="label4", font=font, align=Label.ALIGN_RIGHT,
+                       abs_x=100, abs_y=100, width=120, height=40, background=0x0000)
+        box1.add(label4)
+
+        def script(frame):
+            # 与示例中的click_callback相同
+            label1.set_text('label1 out' if label1.text == 'label1 in' else 'label1 in')
+            if label3.visibility:
+                label3.hide()
+            else:
+                label3.unhide()
+        return Scene('free', 0, display, output, script)
+
+    cols = _isqrt_ceil(widgets)
+    rows = (widgets + cols - 1) // cols
+    cell_w, cell_h = 240 // cols, 240 // rows
+    labels = []
+    for i in range(widgets):
+        label = Label(text=str(i), font=font, background=_color(i),
+                      abs_x=(i % cols) * cell_w, abs_y=(i // cols) * cell_h,
+                      width=cell_w, height=cell_h)
+        labels.append(label)
+        main_box.add(label)
+    return Scene('free', widgets, display, output, _text_script(labels, max(1, widgets // 10)))
+
+
+def _isqrt_ceil(n):
+    root = int(n ** 0.5)
+    while root * root < n:
+        root += 1
+    return root
+
+SCENES = {
+    'flex': build_flex,
+    'grid': build_grid,
+    'scroll': build_scroll,
+    'free': build_free,
+}
@@ -0,0 +1,86 @@
+# ./bench/workers.py
+"""多线程渲染基准测试
+
+比较不同渲染线程数(Display(render_workers=N))下每帧 render+flush 的耗时:
+    python3 -m bench.workers                        # 默认场景, 线程数 0(单线程),1,2,4
+    python3 -m bench.workers scroll -n 0,2 -b 16    # 指定场景, 线程数和分带高度
+    python3 -m bench.workers --bus 0                # 不模拟总线传输时间, 只比较渲染
+
+刷新用模拟慢速总线的 NullOutput(bus_hz=...), 渲染线程渲染后面的区域时主线程在刷新前面的区域.
+有GIL的平台上(CPython, 开启GIL的MicroPython)同一时间只有一个线程在执行字节码,
+加速只来自渲染和刷新的重叠, 上限与 bench/pipeline.py 的 bound 相同; 没有GIL的平台上多个渲染线程可以同时渲染.
+render_workers=1 时使用流水线(一个刷新线程), 多个渲染线程时小于 POOL_MIN_PIXELS 的条带在主线程渲染,
+所以示例场景在主机上 w2/w4 与 w0 基本相同, 只有大条带、没有GIL时才能看到多线程的收益.
+"""
+import sys
+
+import host
+host.install()
+
+from displayio.output.null import NullOutput
+from bench.scenes import SCENES
+
+DEFAULT_BUS = 400000000 # 模拟的总线频率
+WINDOW_US = 20          # 每个刷新窗口的固定开销
+DEFAULT_WORKERS = (0, 1, 2, 4)
+DEFAULT_CASES = (('scroll', 0, 16), ('scroll', 100, 16), ('grid', 100, 16), ('flex', 1000, 16))
+
+
+def run_workers(name, widgets, band_height, frames, bus_hz, workers):
+    """运行一个场景, 返回除首帧外每帧 render+flush 的平均耗时"""
+    output = NullOutput(240, 240, bus_hz=bus_hz, window_us=WINDOW_US)
+    scene = SCENES[name](widgets=widgets, output=output, partly_refresh=True,
+                         band_height=band_height, render_workers=workers, profile=frames)
+    loop = scene.display.loop
+    profiler = loop.profiler
+    loop.update_layout()
+    loop.update_display() # 首帧全屏绘制不计入
+    profiler.reset()
+    for frame in range(1, frames + 1):
+        scene.step(frame)
+        loop.update_layout()
+        loop.update_display()
+    loop.stop()
+    elapsed = sum(profiler.values(profiler.RENDER)) + sum(profiler.values(profiler.FLUSH))
+    return elapsed // (profiler.count or 1)
+
+
+def main(argv):
+    frames, bus_hz, workers = 20, DEFAULT_BUS, DEFAULT_WORKERS
+    widgets, band_height = 0, 16
+    names = []
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--bus':
+            bus_hz = int(args.pop(0))
+        elif arg in ('-n', '--workers'):
+            workers = tuple(int(n) for n in args.pop(0).split(','))
+        elif arg in ('-f', '--frames'):
+            frames = int(args.pop(0))
+        elif arg in ('-w', '--widgets'):
+            widgets = int(args.pop(0))
+        elif arg in ('-b', '--band'):
+            band_height = int(args.pop(0))
+        elif arg in SCENES:
+            names.append(arg)
+        else:
+            print(__doc__)
+            return 1
+    cases = [(name, widgets, band_height) for name in names] or DEFAULT_CASES
+    if hasattr(sys, 'setswitchinterval'):
+        # CPython默认每5ms才切换一次线程, 线程之间无法及时交接
+        sys.setswitchinterval(0.00002)
+    print('bus %d bit/s, window %dus' % (bus_hz, WINDOW_US))
+    print('%-14s %5s' % ('scene', 'band') + ''.join('%10s' % ('w%d_us' % n) for n in workers) + '   speedup')
+    for name, count, band in cases:
+        results = [run_workers(name, count, band, frames, bus_hz, n) for n in workers]
+        best = min(results[1:]) if len(results) > 1 else results[0]
+        print('%-14s %5s' % ('%s[%s]' % (name, count or 'ex'), band or '-') +
+              ''.join('%10d' % us for us in results) + '%9.2fx' % (results[0] / best if best else 0))
+    print('(帧平均; w0 = 单线程渲染, speedup = w0 / 最快的多线程结果)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
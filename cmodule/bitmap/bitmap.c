@@ -30,7 +30,17 @@
 #include "py/runtime.h"
 #include "py/binary.h"
 
-
+// displayio的原生位图模块 _bitmap
+// 由MicroPython的modframebuf.c修改而来, FrameBuffer与framebuf兼容, 另外增加了:
+//   RGB565_BE    屏幕字节序(大端)的RGB565格式, 缓冲区可以直接发送给st7789等驱动
+//   blit_rect    带源子矩形的blit, key为-1时同格式的行直接memcpy
+//   glyph        把1位点阵字模(可RLE压缩)按倍数放大后绘制
+//   blend        RGB565的alpha混合
+//   fill_rects   一次填充多个矩形
+// displayio/core/bitmap.py 优先导入此模块, 没有时退回标准的framebuf和纯Python实现.
+//
+// RGB565_BE的像素值就是缓冲区中保存的16位字(已经交换过字节序), pixel/fill/fill_rect/glyph
+// 都不做转换; 只有需要颜色分量的blend, 以及和RGB565之间的blit才会交换字节序.
 
 typedef struct _mp_obj_framebuf_t {
     mp_obj_base_t base;
@@ -62,6 +72,13 @@ typedef struct _mp_framebuf_p_t {
 #define FRAMEBUF_GS8      (6)
 #define FRAMEBUF_MHLSB    (3)
 #define FRAMEBUF_MHMSB    (4)
+#define FRAMEBUF_RGB565_BE (7)
+
+#define SWAP16(c) ((uint16_t)(((c) >> 8) | ((c) << 8)))
+
+static inline bool is_rgb565(unsigned int format) {
+    return format == FRAMEBUF_RGB565 || format == FRAMEBUF_RGB565_BE;
+}
 
 // Functions for MHLSB and MHMSB
 
@@ -237,6 +254,7 @@ static mp_framebuf_p_t formats[] = {
     [FRAMEBUF_GS8] = {gs8_setpixel, gs8_getpixel, gs8_fill_rect},
     [FRAMEBUF_MHLSB] = {mono_horiz_setpixel, mono_horiz_getpixel, mono_horiz_fill_rect},
     [FRAMEBUF_MHMSB] = {mono_horiz_setpixel, mono_horiz_getpixel, mono_horiz_fill_rect},
+    [FRAMEBUF_RGB565_BE] = {rgb565_setpixel, rgb565_getpixel, rgb565_fill_rect},
 };
 
 static inline void setpixel(const mp_obj_framebuf_t *fb, unsigned int x, unsigned int y, uint32_t col) {
@@ -309,6 +327,7 @@ static mp_obj_t framebuf_make_new(const mp_obj_type_t *type, size_t n_args, size
             bpp = 8;
             break;
         case FRAMEBUF_RGB565:
+        case FRAMEBUF_RGB565_BE:
             bpp = 16;
             break;
         default:
@@ -378,13 +397,107 @@ static mp_obj_t framebuf_pixel(size_t n_args, const mp_obj_t *args_in) {
 }
 static MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(framebuf_pixel_obj, 3, 4, framebuf_pixel);
 
-static mp_obj_t framebuf_blit(size_t n_args, const mp_obj_t *args_in) {
-    mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(args_in[0]);
-    mp_obj_t source_in = mp_obj_cast_to_native_base(args_in[1], MP_OBJ_FROM_PTR(&mp_type_framebuf));
-    if (source_in == MP_OBJ_NULL) {
+static mp_obj_framebuf_t *get_framebuf(mp_obj_t obj) {
+    mp_obj_t native = mp_obj_cast_to_native_base(obj, MP_OBJ_FROM_PTR(&mp_type_framebuf));
+    if (native == MP_OBJ_NULL) {
         mp_raise_TypeError(NULL);
     }
-    mp_obj_framebuf_t *source = MP_OBJ_TO_PTR(source_in);
+    return MP_OBJ_TO_PTR(native);
+}
+
+// 把源的子矩形(sx, sy, w, h)裁剪到源和目标的范围内, 返回false表示没有重叠
+static bool clip_rect(const mp_obj_framebuf_t *self, const mp_obj_framebuf_t *source,
+    mp_int_t *x, mp_int_t *y, mp_int_t *sx, mp_int_t *sy, mp_int_t *w, mp_int_t *h) {
+    if (*sx < 0) {
+        *w += *sx;
+        *x -= *sx;
+        *sx = 0;
+    }
+    if (*sy < 0) {
+        *h += *sy;
+        *y -= *sy;
+        *sy = 0;
+    }
+    *w = MIN(*w, (mp_int_t)source->width - *sx);
+    *h = MIN(*h, (mp_int_t)source->height - *sy);
+    if (*x < 0) {
+        *w += *x;
+        *sx -= *x;
+        *x = 0;
+    }
+    if (*y < 0) {
+        *h += *y;
+        *sy -= *y;
+        *y = 0;
+    }
+    *w = MIN(*w, (mp_int_t)self->width - *x);
+    *h = MIN(*h, (mp_int_t)self->height - *y);
+    return *w > 0 && *h > 0;
+}
+
+// 把source的子矩形复制到self的(x, y), 和key相同的像素(比较源中保存的值)不复制, key为-1时全部复制
+static void blit_rect(const mp_obj_framebuf_t *self, const mp_obj_framebuf_t *source,
+    mp_int_t x, mp_int_t y, mp_int_t sx, mp_int_t sy, mp_int_t w, mp_int_t h,
+    mp_int_t key, const mp_obj_framebuf_t *palette) {
+    if (!clip_rect(self, source, &x, &y, &sx, &sy, &w, &h)) {
+        return;
+    }
+
+    if (palette == NULL && source->format == self->format) {
+        // 同格式: 按行处理, 没有透明色时直接复制整行
+        if (is_rgb565(self->format)) {
+            const uint16_t *src = &((const uint16_t *)source->buf)[sx + sy * source->stride];
+            uint16_t *dst = &((uint16_t *)self->buf)[x + y * self->stride];
+            if (key < 0 || key > 0xffff) {
+                while (h--) {
+                    memcpy(dst, src, w * 2);
+                    src += source->stride;
+                    dst += self->stride;
+                }
+            } else {
+                uint16_t k = key;
+                while (h--) {
+                    for (mp_int_t i = 0; i < w; ++i) {
+                        if (src[i] != k) {
+                            dst[i] = src[i];
+                        }
+                    }
+                    src += source->stride;
+                    dst += self->stride;
+                }
+            }
+            return;
+        }
+        if (self->format == FRAMEBUF_GS8 && (key < 0 || key > 0xff)) {
+            const uint8_t *src = &((const uint8_t *)source->buf)[sx + sy * source->stride];
+            uint8_t *dst = &((uint8_t *)self->buf)[x + y * self->stride];
+            while (h--) {
+                memcpy(dst, src, w);
+                src += source->stride;
+                dst += self->stride;
+            }
+            return;
+        }
+    }
+
+    // 格式不同或者带调色板, 逐像素复制; RGB565和RGB565_BE之间交换字节序
+    bool swap = palette == NULL && source->format != self->format && is_rgb565(source->format) && is_rgb565(self->format);
+    for (mp_int_t j = 0; j < h; ++j) {
+        for (mp_int_t i = 0; i < w; ++i) {
+            uint32_t col = getpixel(source, sx + i, sy + j);
+            if (palette) {
+                col = getpixel(palette, col, 0);
+            }
+            if (col != (uint32_t)key) {
+                setpixel(self, x + i, y + j, swap ? SWAP16(col) : col);
+            }
+        }
+    }
+}
+
+static mp_obj_t framebuf_blit(size_t n_args, const mp_obj_t *args_in) {
+    mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(args_in[0]);
+    mp_obj_framebuf_t *source = get_framebuf(args_in[1]);
 
     mp_int_t x = mp_obj_get_int(args_in[2]);
     mp_int_t y = mp_obj_get_int(args_in[3]);
@@ -394,44 +507,148 @@ static mp_obj_t framebuf_blit(size_t n_args, const mp_obj_t *args_in) {
     }
     mp_obj_framebuf_t *palette = NULL;
     if (n_args > 5 && args_in[5] != mp_const_none) {
-        palette = MP_OBJ_TO_PTR(mp_obj_cast_to_native_base(args_in[5], MP_OBJ_FROM_PTR(&mp_type_framebuf)));
+        palette = get_framebuf(args_in[5]);
     }
 
-    if (
-        (x >= self->width) ||
-        (y >= self->height) ||
-        (-x >= source->width) ||
-        (-y >= source->height)
-        ) {
-        // Out of bounds, no-op.
-        return mp_const_none;
+    blit_rect(self, source, x, y, 0, 0, source->width, source->height, key, palette);
+    return mp_const_none;
+}
+static MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(framebuf_blit_obj, 4, 6, framebuf_blit);
+
+// blit_rect(source, x, y, sx, sy, w, h[, key])
+// 把source中(sx, sy)开始的 w*h 子矩形复制到(x, y), 只处理重叠的像素
+static mp_obj_t framebuf_blit_rect(size_t n_args, const mp_obj_t *args_in) {
+    mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(args_in[0]);
+    mp_obj_framebuf_t *source = get_framebuf(args_in[1]);
+    mp_int_t args[6]; // x, y, sx, sy, w, h
+    framebuf_args(args_in + 1, args, 6);
+    mp_int_t key = n_args > 8 ? mp_obj_get_int(args_in[8]) : -1;
+    blit_rect(self, source, args[0], args[1], args[2], args[3], args[4], args[5], key, NULL);
+    return mp_const_none;
+}
+static MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(framebuf_blit_rect_obj, 8, 9, framebuf_blit_rect);
+
+// glyph(data, x, y, width, height, col[, scale[, rle]])
+// 绘制1位点阵字模: 每行 width/8 个字节, 高位在左, 置位的像素放大为 scale*scale 的方块,
+// 其余像素不绘制. rle为True时data中的0后面跟一个字节, 表示连续0字节的个数(与font_utils的格式相同)
+static mp_obj_t framebuf_glyph(size_t n_args, const mp_obj_t *args_in) {
+    mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(args_in[0]);
+    mp_buffer_info_t bufinfo;
+    mp_get_buffer_raise(args_in[1], &bufinfo, MP_BUFFER_READ);
+    mp_int_t args[5]; // x, y, width, height, col
+    framebuf_args(args_in + 1, args, 5);
+    mp_int_t x = args[0], y = args[1], width = args[2], height = args[3], col = args[4];
+    mp_int_t scale = n_args > 7 ? mp_obj_get_int(args_in[7]) : 1;
+    bool rle = n_args > 8 && mp_obj_is_true(args_in[8]);
+
+    if (width < 1 || (width & 7) || height < 1 || scale < 1) {
+        mp_raise_ValueError(NULL);
+    }
+    size_t bytes_per_row = width >> 3;
+    size_t total = bytes_per_row * height;
+    if (!rle && bufinfo.len < total) {
+        mp_raise_ValueError(NULL);
+    }
+
+    const uint8_t *data = bufinfo.buf;
+    size_t pos = 0; // 解压后的字节位置
+    for (size_t i = 0; i < bufinfo.len && pos < total; ++i) {
+        uint8_t b = data[i];
+        if (b == 0) {
+            if (rle) {
+                if (++i >= bufinfo.len) {
+                    break;
+                }
+                pos += data[i];
+            } else {
+                ++pos;
+            }
+            continue;
+        }
+        mp_int_t gx = x + (mp_int_t)(pos % bytes_per_row) * 8 * scale;
+        mp_int_t gy = y + (mp_int_t)(pos / bytes_per_row) * scale;
+        // 连续置位的像素合并成一次fill_rect
+        unsigned int bit = 0;
+        while (bit < 8) {
+            if (!(b & (0x80 >> bit))) {
+                ++bit;
+                continue;
+            }
+            unsigned int start = bit;
+            while (bit < 8 && (b & (0x80 >> bit))) {
+                ++bit;
+            }
+            fill_rect(self, gx + start * scale, gy, (bit - start) * scale, scale, col);
+        }
+        ++pos;
     }
+    return mp_const_none;
+}
+static MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(framebuf_glyph_obj, 7, 9, framebuf_glyph);
 
-    // Clip.
-    int x0 = MAX(0, x);
-    int y0 = MAX(0, y);
-    int x1 = MAX(0, -x);
-    int y1 = MAX(0, -y);
-    int x0end = MIN(self->width, x + source->width);
-    int y0end = MIN(self->height, y + source->height);
+// blend(source, x, y, alpha[, key])
+// 把source按 alpha(0~255) 混合到(x, y), 两者都必须是RGB565或RGB565_BE, 和key相同的源像素跳过
+static mp_obj_t framebuf_blend(size_t n_args, const mp_obj_t *args_in) {
+    mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(args_in[0]);
+    mp_obj_framebuf_t *source = get_framebuf(args_in[1]);
+    mp_int_t x = mp_obj_get_int(args_in[2]);
+    mp_int_t y = mp_obj_get_int(args_in[3]);
+    mp_int_t alpha = mp_obj_get_int(args_in[4]);
+    mp_int_t key = n_args > 5 ? mp_obj_get_int(args_in[5]) : -1;
 
-    for (; y0 < y0end; ++y0) {
-        int cx1 = x1;
-        for (int cx0 = x0; cx0 < x0end; ++cx0) {
-            uint32_t col = getpixel(source, cx1, y1);
-            if (palette) {
-                col = getpixel(palette, col, 0);
+    if (!is_rgb565(self->format) || !is_rgb565(source->format)) {
+        mp_raise_ValueError(MP_ERROR_TEXT("invalid format"));
+    }
+    mp_int_t sx = 0, sy = 0, w = source->width, h = source->height;
+    if (!clip_rect(self, source, &x, &y, &sx, &sy, &w, &h)) {
+        return mp_const_none;
+    }
+    alpha = MAX(0, MIN(255, alpha));
+    uint32_t a = alpha + (alpha >> 7); // 0~256
+    uint32_t na = 256 - a;
+    bool src_be = source->format == FRAMEBUF_RGB565_BE;
+    bool dst_be = self->format == FRAMEBUF_RGB565_BE;
+
+    for (mp_int_t j = 0; j < h; ++j) {
+        const uint16_t *src = &((const uint16_t *)source->buf)[sx + (sy + j) * source->stride];
+        uint16_t *dst = &((uint16_t *)self->buf)[x + (y + j) * self->stride];
+        for (mp_int_t i = 0; i < w; ++i) {
+            uint32_t s = src[i];
+            if (s == (uint32_t)key) {
+                continue;
             }
-            if (col != (uint32_t)key) {
-                setpixel(self, cx0, y0, col);
+            if (src_be) {
+                s = SWAP16(s);
             }
-            ++cx1;
+            uint32_t d = dst_be ? SWAP16(dst[i]) : dst[i];
+            uint32_t r = ((s >> 11) * a + (d >> 11) * na) >> 8;
+            uint32_t g = (((s >> 5) & 0x3f) * a + ((d >> 5) & 0x3f) * na) >> 8;
+            uint32_t b = ((s & 0x1f) * a + (d & 0x1f) * na) >> 8;
+            uint16_t c = (r << 11) | (g << 5) | b;
+            dst[i] = dst_be ? SWAP16(c) : c;
         }
-        ++y1;
     }
     return mp_const_none;
 }
-static MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(framebuf_blit_obj, 4, 6, framebuf_blit);
+static MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(framebuf_blend_obj, 5, 6, framebuf_blend);
+
+// fill_rects(rects, col)
+// 用同一个颜色填充多个矩形, rects中每一项为 (x, y, w, h)
+static mp_obj_t framebuf_fill_rects(mp_obj_t self_in, mp_obj_t rects_in, mp_obj_t col_in) {
+    mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(self_in);
+    mp_int_t col = mp_obj_get_int(col_in);
+    size_t len;
+    mp_obj_t *rects;
+    mp_obj_get_array(rects_in, &len, &rects);
+    for (size_t i = 0; i < len; ++i) {
+        mp_obj_t *rect;
+        mp_obj_get_array_fixed_n(rects[i], 4, &rect);
+        fill_rect(self, mp_obj_get_int(rect[0]), mp_obj_get_int(rect[1]),
+            mp_obj_get_int(rect[2]), mp_obj_get_int(rect[3]), col);
+    }
+    return mp_const_none;
+}
+static MP_DEFINE_CONST_FUN_OBJ_3(framebuf_fill_rects_obj, framebuf_fill_rects);
 
 static mp_obj_t framebuf_scroll(mp_obj_t self_in, mp_obj_t xstep_in, mp_obj_t ystep_in) {
     mp_obj_framebuf_t *self = MP_OBJ_TO_PTR(self_in);
@@ -483,6 +700,10 @@ static const mp_rom_map_elem_t framebuf_locals_dict_table[] = {
     { MP_ROM_QSTR(MP_QSTR_fill_rect), MP_ROM_PTR(&framebuf_fill_rect_obj) },
     { MP_ROM_QSTR(MP_QSTR_pixel), MP_ROM_PTR(&framebuf_pixel_obj) },
     { MP_ROM_QSTR(MP_QSTR_blit), MP_ROM_PTR(&framebuf_blit_obj) },
+    { MP_ROM_QSTR(MP_QSTR_blit_rect), MP_ROM_PTR(&framebuf_blit_rect_obj) },
+    { MP_ROM_QSTR(MP_QSTR_glyph), MP_ROM_PTR(&framebuf_glyph_obj) },
+    { MP_ROM_QSTR(MP_QSTR_blend), MP_ROM_PTR(&framebuf_blend_obj) },
+    { MP_ROM_QSTR(MP_QSTR_fill_rects), MP_ROM_PTR(&framebuf_fill_rects_obj) },
     { MP_ROM_QSTR(MP_QSTR_scroll), MP_ROM_PTR(&framebuf_scroll_obj) },
 };
 static MP_DEFINE_CONST_DICT(framebuf_locals_dict, framebuf_locals_dict_table);
@@ -498,13 +719,13 @@ static MP_DEFINE_CONST_OBJ_TYPE(
 #endif
 
 #if !MICROPY_ENABLE_DYNRUNTIME
-// This factory function is provided for backwards compatibility with the old
-static const mp_rom_map_elem_t framebuf_module_globals_table[] = {
-    { MP_ROM_QSTR(MP_QSTR___name__), MP_ROM_QSTR(MP_QSTR_framebuf) },
+static const mp_rom_map_elem_t bitmap_module_globals_table[] = {
+    { MP_ROM_QSTR(MP_QSTR___name__), MP_ROM_QSTR(MP_QSTR__bitmap) },
     { MP_ROM_QSTR(MP_QSTR_FrameBuffer), MP_ROM_PTR(&mp_type_framebuf) },
     { MP_ROM_QSTR(MP_QSTR_MVLSB), MP_ROM_INT(FRAMEBUF_MVLSB) },
     { MP_ROM_QSTR(MP_QSTR_MONO_VLSB), MP_ROM_INT(FRAMEBUF_MVLSB) },
     { MP_ROM_QSTR(MP_QSTR_RGB565), MP_ROM_INT(FRAMEBUF_RGB565) },
+    { MP_ROM_QSTR(MP_QSTR_RGB565_BE), MP_ROM_INT(FRAMEBUF_RGB565_BE) },
     { MP_ROM_QSTR(MP_QSTR_GS2_HMSB), MP_ROM_INT(FRAMEBUF_GS2_HMSB) },
     { MP_ROM_QSTR(MP_QSTR_GS4_HMSB), MP_ROM_INT(FRAMEBUF_GS4_HMSB) },
     { MP_ROM_QSTR(MP_QSTR_GS8), MP_ROM_INT(FRAMEBUF_GS8) },
@@ -512,12 +733,12 @@ static const mp_rom_map_elem_t framebuf_module_globals_table[] = {
     { MP_ROM_QSTR(MP_QSTR_MONO_HMSB), MP_ROM_INT(FRAMEBUF_MHMSB) },
 };
 
-static MP_DEFINE_CONST_DICT(framebuf_module_globals, framebuf_module_globals_table);
+static MP_DEFINE_CONST_DICT(bitmap_module_globals, bitmap_module_globals_table);
 
-const mp_obj_module_t mp_module_framebuf = {
+const mp_obj_module_t mp_module_bitmap = {
     .base = { &mp_type_module },
-    .globals = (mp_obj_dict_t *)&framebuf_module_globals,
+    .globals = (mp_obj_dict_t *)&bitmap_module_globals,
 };
 
-MP_REGISTER_MODULE(MP_QSTR_framebuf, mp_module_framebuf);
+MP_REGISTER_MODULE(MP_QSTR__bitmap, mp_module_bitmap);
 #endif
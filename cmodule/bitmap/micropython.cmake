@@ -0,0 +1,12 @@
+# _bitmap 模块
+add_library(usermod_bitmap INTERFACE)
+
+target_sources(usermod_bitmap INTERFACE
+    ${CMAKE_CURRENT_LIST_DIR}/bitmap.c
+)
+
+target_include_directories(usermod_bitmap INTERFACE
+    ${CMAKE_CURRENT_LIST_DIR}
+)
+
+target_link_libraries(usermod INTERFACE usermod_bitmap)
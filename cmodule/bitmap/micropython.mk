@@ -0,0 +1,4 @@
+BITMAP_MOD_DIR := $(USERMOD_DIR)
+
+# 添加 _bitmap 模块的源文件
+SRC_USERMOD_C += $(BITMAP_MOD_DIR)/bitmap.c
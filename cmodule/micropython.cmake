@@ -0,0 +1,3 @@
+# 所有C模块的入口, cmake构建的port(esp32等)使用:
+#   make USER_C_MODULES=/path/to/displayio/cmodule/micropython.cmake
+include(${CMAKE_CURRENT_LIST_DIR}/bitmap/micropython.cmake)
@@ -34,7 +34,7 @@ class Container(BaseWidget):
                          background = background,
                          color_format = color_format)
 
-    def add(self, *childs: BaseWidget|'Container') -> None:
+    def add(self, *childs: 'BaseWidget|Container') -> None:
         """向容器中添加元素"""
         for child in childs:
             child.parent=self
@@ -44,7 +44,7 @@ class Container(BaseWidget):
 
         self.dirty_system.layout_dirty = True
 
-    def remove(self, *childs: BaseWidget|'Container') -> None:
+    def remove(self, *childs: 'BaseWidget|Container') -> None:
         """从容器中移除元素"""
         for child in childs:
             if child in self.children:
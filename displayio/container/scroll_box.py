@@ -1,9 +1,9 @@
 # ./container/free_box.py
 from .container import Container
-from ..core.bitmap import Bitmap
+from ..core.bitmap import Bitmap, ArenaBitmap
 from ..core.event import EventType
 from ..core.dirty import DirtySystem, MergeRegionSystem, BoundBoxSystem
-from ..widget.widget import Widget # type hint
+from ..core.display_list import DisplayList
 
 import micropython # type: ignore
 
@@ -12,8 +12,8 @@ class ScrollBox(Container):
     ScrollBox滚动容器类
     继承自Container
     """
-    __slots__ = ('_empty_bitmap', 'dirty_bitmap', '_empty_bitmap',
-                 'scroll_dirty_system', 'child'
+    __slots__ = ('_empty_bitmap', 'dirty_bitmap', 'display_list',
+                 'scroll_dirty_system', 'child',
                  'scroll_offset_x', 'scroll_offset_y',
                  'is_scrollable_x', 'is_scrollable_y',
                  'scroll_range_x', 'scroll_range_y',
@@ -28,19 +28,20 @@ class ScrollBox(Container):
                  visibility=True, state=Container.STATE_DEFAULT,
                  transparent_color=Container.PINK,
                  background=Container.DARK,
-                 color_format=Container.RGB565):
+                 color_format=Container.RGB565,
+                 dirty_system=BoundBoxSystem):
         """
         初始化ScrollBox容器, 此容器的children唯一, 且是一个其他类型的容器.
             self.child.children 中的元素只能是具有get_bitmap() 方法的 widget实例
         child的布局采用虚拟位置, 默认dx=0-scroll_offset_x; dy=0-scroll_offset_y
-        滚动操作相当于self._bitmap.blit(self.child._bitmap, dx=0-scroll_offset_x, dy=0-scroll_offset_y),
+        滚动操作相当于self._bitmap.blit(self.child._bitmap, sx=scroll_offset_x, sy=scroll_offset_y, w=width, h=height),
             即, 在child._bitmap 截取当前width * height 的框。
 
         警告: 此容器接受的事件 必须包含data={'rx':None, 'ry':None, 'dx':None, 'dy':None}, 
             分别表示相对滚动距离和绝对滚动距离
 
         继承Container的所有参数,额外添加:
-            pass
+            dirty_system (type, optional): 独立脏区域系统的类, 例如AdaptiveSystem在运行时选择合并策略. Defaults to BoundBoxSystem.
         """
         super().__init__(abs_x = abs_x, abs_y = abs_y,
                          rel_x = rel_x, rel_y = rel_y, dz = dz,
@@ -52,11 +53,12 @@ class ScrollBox(Container):
         # 预创建bitmap对象
         self._bitmap = Bitmap(self, transparent_color=transparent_color)
         self._empty_bitmap = Bitmap(self, transparent_color=transparent_color)
-        self.dirty_bitmap = Bitmap()
+        self.dirty_bitmap = ArenaBitmap() # 按需扩大,之后渲染不再分配内存
+        self.display_list = DisplayList() # child子树的显示列表
         # 使用实例ID作为唯一标识
         self.child = None
         # 创建独立的脏区域管理器
-        self.scroll_dirty_system = BoundBoxSystem(name=f'ScrollBox_{id(self)}',widget=self)
+        self.scroll_dirty_system = dirty_system(name=f'ScrollBox_{id(self)}',widget=self)
         # 滚动相关的属性
         # 每次滚动的像素个数
         self.scroll_step_x = scroll_step_x
@@ -128,6 +130,7 @@ class ScrollBox(Container):
         actual_height = self.height if self.child.height_resizable else self.child.height
         # 根据滚动偏移量调整布局
         self.child.layout(dx=0, dy=0, width=actual_width, height=actual_height)
+        self.scroll_dirty_system.display_list_dirty = True
 
     def scroll(self, widget, event) -> None:
         """滚动方法, x和y为滚动的增量"""
@@ -161,8 +164,9 @@ class ScrollBox(Container):
         # 更新child的bitmap
         if self.scroll_dirty_system.dirty:
             self._update_child_bitmap()
-        # 裁剪bitmap
-        self._bitmap.blit(self.child._bitmap, dx=(-1)*self.scroll_offset_x, dy=(-1)*self.scroll_offset_y)
+        # 只复制child._bitmap中可见的 width * height 窗口
+        self._bitmap.blit(self.child._bitmap, sx=self.scroll_offset_x, sy=self.scroll_offset_y,
+                          w=self.width, h=self.height)
 
     def _update_child_bitmap(self) -> None:
         """更新child的bitmap"""
@@ -171,38 +175,28 @@ class ScrollBox(Container):
                 dirty_widget.draw()
         self.scroll_dirty_system.clear_widget()
 
+        if self.scroll_dirty_system.display_list_dirty or self.display_list.root is not self.child:
+            self.display_list.build(self.child)
+            self.scroll_dirty_system.display_list_dirty = False
         for dirty_area in self.scroll_dirty_system.area:
             dx, dy = dirty_area[0], dirty_area[1]
             width, height = dirty_area[2]-dx+1, dirty_area[3]-dy+1
             self.dirty_bitmap.init(dx=dx, dy=dy, width=width, height=height)
-            self._render_child_tree(self.child, dirty_area) # 获取到完整的child._bitmap
+            self.display_list.render(self.dirty_bitmap, dirty_area) # 获取到完整的child._bitmap
             self.child._bitmap.blit(self.dirty_bitmap, dx=self.dirty_bitmap.dx, dy=self.dirty_bitmap.dy)
 
         self.scroll_dirty_system.clear()
 
-    def _render_child_tree(self, widget:Widget, area):
-        """绘制self.child的buffer"""
-        if widget.widget_in_dirty_area(area):
-            if hasattr(widget, 'get_bitmap'):
-                bitmap = widget.get_bitmap()
-                self.dirty_bitmap.blit(bitmap, dx=bitmap.dx-area[0], dy=bitmap.dy-area[1])
-            else:
-                if widget.background.color is not None:
-                    self.dirty_bitmap.fill(widget.background.color)
-                else:
-                    self.dirty_bitmap.blit(bitmap, dx=bitmap.dx, dy=bitmap.dy)
-                    raise ValueError
-                for child in widget.children:
-                    self._render_child_tree(child, area)
-
     def hide(self):
         """重写 隐藏部件方法"""
         self.visibility = False
+        self.dirty_system.display_list_dirty = True
         self.dirty_system.add(self.dx,self.dy,self.width,self.height)
 
     def unhide(self):
         """重写 取消隐藏部件"""
         self.visibility = True
+        self.dirty_system.display_list_dirty = True
         self.dirty_system.add(self.dx,self.dy,self.width,self.height)
 
     def set_dirty_system(self, dirty_system:MergeRegionSystem):
@@ -128,6 +128,7 @@ class BaseWidget(Color, Style):
     def hide(self) -> None:
         """隐藏部件"""
         self.visibility = False
+        self.dirty_system.display_list_dirty = True
         self.dirty_system.add(self.dx,self.dy,self.width,self.height)
         for child in self.children:
             if child.visibility:
@@ -136,6 +137,7 @@ class BaseWidget(Color, Style):
     def unhide(self) -> None:
         """取消隐藏部件"""
         self.visibility = True
+        self.dirty_system.display_list_dirty = True
         self.dirty_system.add(self.dx,self.dy,self.width,self.height)
         for child in self.children:
             if not child.visibility:
@@ -168,6 +170,7 @@ class BaseWidget(Color, Style):
     def set_background(self, color=None, pic=None) -> None:
         """设置背景"""
         self.background=Background(color=color, pic=pic)
+        self.dirty_system.display_list_dirty = True
         self.dirty_system.add(self.dx,self.dy,self.width,self.height)
 
     def bubble(self, event) -> None:
@@ -1,41 +1,67 @@
 # ./core/bitmap.py
-import framebuf # type: ignore
 import micropython # type: ignore
+try:
+    # 原生位图模块(cmodule/bitmap), 兼容framebuf, 另外提供blit_rect/glyph/blend/fill_rects
+    import _bitmap as framebuf # type: ignore
+    NATIVE = True
+except ImportError:
+    import framebuf # type: ignore
+    NATIVE = False
 
 @micropython.viper
 def _swap_rgb565(color: int) -> int:
-    """交换颜色值的高低字节
-        因为framebuf.FrameBuffer的序列为小端序,
-        而驱动一般采用大端序
-        所以在这里先做个交换第一第二字节的处理，
-        可使驱动直接将整个buffer一次性写入屏幕,而不需要使用迭代循环"""
+    """交换颜色值的高低字节"""
     return ((color >> 8) | (color << 8)) & 0xFFFF
 
+def native_color(color:int|None) -> int|None:
+    """把RGB565颜色(0xRRRRRGGGGGGBBBBB)转换成RGB565位图中保存的屏幕字节序(大端), None原样返回
+        framebuf.FrameBuffer的序列为小端序, 而驱动一般采用大端序,
+        位图直接按屏幕字节序保存, 可使驱动直接将整个buffer一次性写入屏幕,而不需要使用迭代循环.
+        颜色在赋值给样式(Background, Label的文字颜色)和创建位图(透明色)时转换一次, 绘制时不再逐次转换"""
+    return color if color is None else _swap_rgb565(color)
+
+def _fb_format(color_format:int) -> int:
+    """FrameBuffer使用的格式
+        RGB565位图的缓冲区保存的是交换过字节序的颜色(屏幕字节序),
+        原生模块中用RGB565_BE格式, blend等需要颜色分量的操作才能得到正确的结果"""
+    if NATIVE and color_format == framebuf.RGB565:
+        return framebuf.RGB565_BE
+    return color_format
+
 class Bitmap:
     __slots__ = ('widget', 'dx', 'dy', 'width', 'height', 'transparent_color', 'color_format',
-                 'size_changed', 'buffer', 'fb')
+                 'size_changed', 'buffer', 'fb', 'opaque', 'view')
 
     # 支持的颜色格式
     MONO_VLSB = framebuf.MONO_VLSB
     MONO_HLSB = framebuf.MONO_HLSB
     MONO_HMSB = framebuf.MONO_HMSB
+    # 屏幕字节序的RGB565, pixel/fill/fill_rect/fill_rects/glyph/init的颜色参数都是缓冲区中保存的值
+    # (native_color转换后的颜色), 不再逐次交换字节序. 透明色参数是逻辑颜色, 保存时转换, self.transparent_color是转换后的值
     RGB565 = framebuf.RGB565
     GS2_HMSB = framebuf.GS2_HMSB
     GS4_HMSB = framebuf.GS4_HMSB
     GS8 = framebuf.GS8
 
+    view_allocs = 0 # 没有原生模块时, blit在源缓冲区上创建的临时视图(memoryview/FrameBuffer)的累计数量
+
     def __init__(self, widget=None, transparent_color=0xf81f):
         self.widget = widget
         self.dx = 0
         self.dy = 0
         self.width = 0
         self.height = 0
-        self.transparent_color = transparent_color
+        self.transparent_color = native_color(transparent_color) # 和缓冲区中保存的值比较
         self.color_format = widget.color_format if widget else self.RGB565
 
         self.size_changed = False
         self.buffer = None
         self.fb = None
+        # 位图中没有透明色像素时为True. fill/fill_rect/pixel/blit时自动维护(保守估计, 只会误判为False),
+        # 绘制它的widget也可以根据自己的内容直接设置. 不透明的位图blit时不比较透明色, 渲染时可以剔除被它完全遮住的下层
+        self.opaque = False
+        # 作为blit源时子矩形的视图缓存 [buffer, sx, sy, w, h, FrameBuffer, 最后一行的FrameBuffer, 行数]
+        self.view = None
 
     def init(self, dx=0, dy=0, width=0, height=0, color=None, transparent_color=None):
         """bitmap初始化
@@ -44,8 +70,8 @@ class Bitmap:
             dy: bitmap的目标位置
             width: 宽度
             height: 高度
-            color: 需要填充的颜色
-            transparent_color: 透明色
+            color: 需要填充的颜色, RGB565位图中为屏幕字节序的值(见native_color)
+            transparent_color: 透明色(逻辑颜色), 保存为native_color转换后的值
         """
         self.dx = dx
         self.dy = dy
@@ -60,17 +86,21 @@ class Bitmap:
             self.height = new_height
             self.size_changed = True
 
-        if transparent_color is not None: # 设置透明色
+        if transparent_color is not None:
+            transparent_color = native_color(transparent_color)
+        if transparent_color is not None and transparent_color != self.transparent_color: # 设置透明色
             self.transparent_color = transparent_color
+            self.opaque = False # 原有内容中可能有新透明色的像素
 
         if self.size_changed: # 尺寸变化
             buffer_size = self.width * self.height
             if self.color_format == self.RGB565:
                 buffer_size *= 2
             self.buffer = bytearray(buffer_size)
-            self.fb = framebuf.FrameBuffer(self.buffer, self.width, self.height, self.color_format)
+            self.fb = framebuf.FrameBuffer(self.buffer, self.width, self.height, _fb_format(self.color_format))
             # self.fb = FrameBuffer(self.buffer, self.width, self.height, self.color_format)
             self.size_changed = False
+            self.opaque = self.transparent_color != 0 # 新缓冲区全部为0
             # 初始化颜色填充，跳过纯黑色填充
             if color is not None and color != 0x0000:
                 self.fill(color)
@@ -80,47 +110,275 @@ class Bitmap:
 
     @micropython.native
     def pixel(self, x:int, y:int, color:int|None=None):
-        """获取或设置像素点"""
+        """获取或设置像素点
+        RGB565位图中读写的都是缓冲区中保存的值(屏幕字节序), 逻辑颜色(0xRRRRRGGGGGGBBBBB)先用native_color转换,
+        读出的值再调用一次native_color就得到逻辑颜色
+        """
         # 若超出位图范围，直接返回
         if not (0 <= x < self.width and 0 <= y < self.height):
             return
 
         if color is None:
-            value = self.fb.pixel(x, y)
-            return _swap_rgb565(value) if self.color_format == self.RGB565 else value
+            return self.fb.pixel(x, y)
 
-        # 设置像素时转换颜色 
-        if self.color_format == self.RGB565:
-            color = _swap_rgb565(color)    
+        if color == self.transparent_color:
+            self.opaque = False
         self.fb.pixel(x, y, color)
 
     @micropython.native
     def fill_rect(self, x:int, y:int, width:int, height:int, color:int):
-        """填充矩形区域"""
+        """填充矩形区域, color为缓冲区中保存的值(RGB565位图先用native_color转换)"""
         # 使用FrameBuffer的原生fill_rect进行填充
-        if self.color_format == self.RGB565:  
-            color = _swap_rgb565(color)
+        if color == self.transparent_color:
+            self.opaque = False
+        elif x <= 0 and y <= 0 and x + width >= self.width and y + height >= self.height: # 覆盖整个位图
+            self.opaque = True
         self.fb.fill_rect(x, y, width, height, color)
 
     @micropython.native
     def fill(self, color:int):
-        """填充整个区域"""
-        if self.color_format == self.RGB565:  
-            color = _swap_rgb565(color)
+        """填充整个区域, color为缓冲区中保存的值(RGB565位图先用native_color转换)"""
+        self.opaque = color != self.transparent_color
         self.fb.fill(color)
 
     @micropython.native
-    def blit(self, source:'Bitmap', dx:int=0, dy:int=0):
-        """将源bitmap复制到当前bitmap,使用framebuf的透明色机制"""
-        # 如果源和目标的颜色格式不同，转换颜色
-        key = source.transparent_color
-        if self.color_format == self.RGB565 and source.color_format != self.RGB565:
-            key = _swap_rgb565(key) if source.transparent_color != -1 else -1
-        elif self.color_format != self.RGB565 and source.color_format == self.RGB565:
-            key = _swap_rgb565(key) if source.transparent_color != -1 else -1
-
-        # 使用framebuf的blit方法，传入透明色键值
-        self.fb.blit(source.fb, dx, dy, key)
+    def blit(self, source:'Bitmap', dx:int=0, dy:int=0, sx:int=0, sy:int=0, w:int=-1, h:int=-1):
+        """将源bitmap中(sx, sy)开始的 w*h 子矩形复制到当前bitmap的(dx, dy),使用framebuf的透明色机制
+        w, h 为-1时一直到源位图的边界, 默认复制整个源位图.
+        子矩形先裁剪到源和目标的范围内, 只复制重叠的像素: 有原生模块时由blit_rect完成, 不分配内存.
+        否则和目标边界重合的边交给FrameBuffer按目标裁剪(分带渲染切出的边都是这种), 扩展到源位图的边界;
+        扩展后仍小于源位图时(祖先裁剪, ScrollBox的滚动偏移)在源缓冲区上建立带stride的视图并缓存在源位图上,
+        同一个子矩形重复blit时不再分配, 新建视图的次数记录在 Bitmap.view_allocs.
+        只支持RGB565, 其他格式的像素不按字节对齐, 仍然复制整个源位图(只按目标裁剪).
+        不透明的源位图没有透明色像素, 走快速路径: 不比较透明色, 整块连续时直接复制内存
+        """
+        # 带透明色的blit不会写入源的透明色, 两者透明色相同时目标仍然不透明, 否则保守地认为不再不透明
+        if source.transparent_color != self.transparent_color:
+            self.opaque = False
+        width, height = source.width, source.height
+        if w < 0:
+            w = width - sx
+        if h < 0:
+            h = height - sy
+        # 裁剪到源位图
+        if sx < 0:
+            w, dx, sx = w + sx, dx - sx, 0
+        if sy < 0:
+            h, dy, sy = h + sy, dy - sy, 0
+        w, h = min(w, width - sx), min(h, height - sy)
+        # 裁剪到目标位图
+        if dx < 0:
+            w, sx, dx = w + dx, sx - dx, 0
+        if dy < 0:
+            h, sy, dy = h + dy, sy - dy, 0
+        w, h = min(w, self.width - dx), min(h, self.height - dy)
+        if w <= 0 or h <= 0:
+            return
+
+        # 透明色和源缓冲区中保存的值比较, 格式不同时也不需要转换
+        key = -1 if source.opaque and source.color_format == self.color_format else source.transparent_color
+
+        if NATIVE:
+            self.fb.blit_rect(source.fb, dx, dy, sx, sy, w, h, key)
+            return
+        if source.color_format != self.RGB565:
+            self.fb.blit(source.fb, dx - sx, dy - sy, key)
+            return
+        if key == -1 and self.color_format == self.RGB565 and dx == 0 and sx == 0 and w == width == self.width:
+            # 整行对齐, 源的这些行在目标中是连续的一块, 一次复制(切片会创建memoryview, 计入view_allocs)
+            start, size = sy * width * 2, w * h * 2
+            memoryview(self.buffer)[dy * w * 2:dy * w * 2 + size] = memoryview(source.buffer)[start:start + size]
+            Bitmap.view_allocs += 1
+            return
+        # 源位图左上角在目标中的位置, 和目标边界重合的边扩展到源的边界, 超出目标的部分由FrameBuffer裁掉
+        ox, oy = dx - sx, dy - sy
+        x0, y0, x1, y1 = sx, sy, sx + w, sy + h
+        if dx == 0:
+            x0 = 0
+        if dy == 0:
+            y0 = 0
+        if dx + w == self.width:
+            x1 = width
+        if dy + h == self.height:
+            y1 = height
+        if x0 == 0 and y0 == 0 and x1 == width and y1 == height:
+            self.fb.blit(source.fb, ox, oy, key)
+            return
+        view = source._sub_view(x0, y0, x1 - x0, y1 - y0)
+        if view[5] is not None:
+            self.fb.blit(view[5], ox + x0, oy + y0, key)
+        if view[6] is not None:
+            self.fb.blit(view[6], ox + x0, oy + y0 + view[7], key)
+
+    def _sub_view(self, sx, sy, w, h):
+        """返回缓冲区中(sx, sy)开始 w*h 的RGB565子矩形视图, 和上次相同时直接复用self.view"""
+        view = self.view
+        if (view is not None and view[0] is self.buffer and view[1] == sx and view[2] == sy
+                and view[3] == w and view[4] == h):
+            return view
+        buffer = memoryview(self.buffer)
+        width = self.width
+        offset = (sy * width + sx) * 2
+        rows, last = h, None
+        if offset + width * h * 2 > len(buffer):
+            # FrameBuffer要求缓冲区至少有 stride*height 像素, 视图的最后一行不完整时单独建立一个视图
+            rows -= 1
+            last = framebuf.FrameBuffer(buffer[offset + width * rows * 2:], w, 1, self.RGB565, w)
+        main = framebuf.FrameBuffer(buffer[offset:], w, rows, self.RGB565, width) if rows else None
+        self.view = [self.buffer, sx, sy, w, h, main, last, rows]
+        Bitmap.view_allocs += 1
+        return self.view
+
+    @micropython.native
+    def fill_rects(self, rects, color:int):
+        """用同一个颜色填充多个矩形, rects中每一项为 (x, y, width, height), color与fill_rect相同"""
+        if color == self.transparent_color:
+            self.opaque = False
+        else:
+            for x, y, width, height in rects:
+                if x <= 0 and y <= 0 and x + width >= self.width and y + height >= self.height: # 覆盖整个位图
+                    self.opaque = True
+                    break
+        if NATIVE:
+            self.fb.fill_rects(rects, color)
+            return
+        fill_rect = self.fb.fill_rect
+        for x, y, width, height in rects:
+            fill_rect(x, y, width, height, color)
+
+    @micropython.native
+    def glyph(self, data, x:int, y:int, width:int, height:int, color:int, scale:int=1, rle:bool=False):
+        """在(x, y)绘制1位点阵字模, 置位的像素放大为 scale*scale 的方块, 其余像素不绘制
+        Args:
+            data: 点阵数据, 每行 width//8 个字节, 高位在左
+            width: 字模宽度, 必须是8的倍数
+            height: 字模高度
+            color: 前景色, 缓冲区中保存的值(RGB565位图先用native_color转换)
+            scale: 缩放倍数
+            rle: data是否为RLE压缩数据, 0后面的字节表示连续0字节的个数
+        """
+        if color == self.transparent_color:
+            self.opaque = False
+        if NATIVE:
+            self.fb.glyph(data, x, y, width, height, color, scale, rle)
+            return
+        fill_rect = self.fb.fill_rect
+        bytes_per_row = width // 8
+        total = bytes_per_row * height
+        size = len(data)
+        i = pos = 0 # pos: 解压后的字节位置
+        while i < size and pos < total:
+            value = data[i]
+            i += 1
+            if value == 0:
+                if rle:
+                    if i >= size:
+                        break
+                    pos += data[i]
+                    i += 1
+                else:
+                    pos += 1
+                continue
+            gx = x + (pos % bytes_per_row) * 8 * scale
+            gy = y + (pos // bytes_per_row) * scale
+            for bit in range(8):
+                if value & (0x80 >> bit):
+                    fill_rect(gx + bit * scale, gy, scale, scale, color)
+            pos += 1
+
+    def blend(self, source:'Bitmap', dx:int=0, dy:int=0, alpha:int=255):
+        """将源bitmap按alpha(0~255)混合到当前bitmap的(dx, dy), 两者都必须是RGB565, 源的透明色像素跳过"""
+        if self.color_format != self.RGB565 or source.color_format != self.RGB565:
+            raise ValueError('blend只支持RGB565')
+        key = -1 if source.opaque else source.transparent_color
+        self.opaque = False # 混合结果可能恰好是透明色
+        if NATIVE:
+            self.fb.blend(source.fb, dx, dy, alpha, key)
+            return
+        alpha = max(0, min(255, alpha))
+        a = alpha + (alpha >> 7) # 0~256
+        na = 256 - a
+        src, dst = source.fb, self.fb
+        for y in range(max(0, -dy), min(source.height, self.height - dy)):
+            for x in range(max(0, -dx), min(source.width, self.width - dx)):
+                s = src.pixel(x, y)
+                if s == key:
+                    continue
+                s, d = _swap_rgb565(s), _swap_rgb565(dst.pixel(x + dx, y + dy))
+                r = ((s >> 11) * a + (d >> 11) * na) >> 8
+                g = (((s >> 5) & 0x3f) * a + ((d >> 5) & 0x3f) * na) >> 8
+                b = ((s & 0x1f) * a + (d & 0x1f) * na) >> 8
+                dst.pixel(x + dx, y + dy, _swap_rgb565((r << 11) | (g << 5) | b))
+
+
+class ArenaBitmap(Bitmap):
+    """
+    渲染用的临时位图, 所有尺寸共用一块预分配的缓冲区(arena)
+    init时不再按尺寸重新分配bytearray, 而是在arena的前 width*height*2 字节上建立FrameBuffer.
+    同一尺寸的FrameBuffer会被缓存复用, 稳定状态下(脏区域尺寸重复出现)每帧没有内存分配.
+    只有arena不够大或者出现新尺寸时才分配, 次数记录在 ArenaBitmap.allocs, 可以用来验证.
+
+    缓存最多保留 MAX_VIEWS 个尺寸, 满了以后只淘汰最久没用过的一个(LRU), 常用尺寸不受影响.
+    反复出现的尺寸不超过 MAX_VIEWS 个时每帧零分配; 超过时每次未命中分配一次,
+    同时记录在 ArenaBitmap.allocs 和 ArenaBitmap.evictions 中, evictions持续增长说明需要调大 MAX_VIEWS.
+    """
+    __slots__ = ('arena', 'views', 'tick')
+
+    allocs = 0      # 所有ArenaBitmap的累计分配次数
+    evictions = 0   # 因缓存已满被淘汰的FrameBuffer数量
+    MAX_VIEWS = 32  # 缓存的FrameBuffer数量上限, 超过后淘汰最久未使用的一个
+
+    def __init__(self, size=0, transparent_color=0xf81f):
+        """
+        Args:
+            size (int, optional): arena的字节数, 应按最大的渲染区域分配(例如整屏 width*height*2),
+                不够时会自动扩大. Defaults to 0.
+        """
+        super().__init__(transparent_color=transparent_color)
+        self.arena = bytearray(size)
+        self.views = {} # (width, height) -> [memoryview, FrameBuffer, 最后使用的tick]
+        self.tick = 0
+
+    def init(self, dx=0, dy=0, width=0, height=0, color=None, transparent_color=None):
+        """在arena上建立 width*height 的位图, 参数与Bitmap.init相同"""
+        self.dx = dx
+        self.dy = dy
+        self.width = width
+        self.height = height
+        if transparent_color is not None: # 设置透明色
+            self.transparent_color = native_color(transparent_color)
+        self.tick += 1
+        view = self.views.get((width, height))
+        if view is None:
+            size = width * height * 2
+            if size > len(self.arena): # arena不够大, 扩大后旧的FrameBuffer全部失效
+                self.arena = bytearray(size)
+                self.views.clear()
+                ArenaBitmap.allocs += 1
+            elif len(self.views) >= self.MAX_VIEWS:
+                self._evict()
+            buffer = memoryview(self.arena)[:size]
+            view = [buffer, framebuf.FrameBuffer(buffer, width, height, _fb_format(self.color_format)), 0]
+            self.views[(width, height)] = view
+            ArenaBitmap.allocs += 1
+        view[2] = self.tick
+        self.buffer = view[0]
+        self.fb = view[1]
+        self.opaque = False # arena中是上次渲染留下的内容
+        if color is not None:
+            self.fill(color)
+
+    def _evict(self):
+        """淘汰最久没有使用的FrameBuffer, 只在缓存已满且未命中时调用"""
+        oldest = None
+        oldest_tick = self.tick
+        for key, view in self.views.items():
+            if view[2] < oldest_tick:
+                oldest = key
+                oldest_tick = view[2]
+        if oldest is not None:
+            del self.views[oldest]
+            ArenaBitmap.evictions += 1
 
 
 class FrameBuffer:
@@ -2,14 +2,21 @@ from .logging import logger
 
 class DirtySystem:
     """
-    脏区域管理基类类,采用单例模式,确保实例唯一
+    脏区域管理基类类,默认实例采用单例模式,确保实例唯一
     只有widget需要额外创建一张屏幕外的bitmap时,才需要创建一个独立的dirty_system
         命名为 {容器类名}_{容器实例id}  ,且需要传入widget参数
+        独立实例由widget持有,不放入注册表,随widget一起释放
+    脏状态向上传递:
+        独立实例add脏区域时,会把widget的区域add到父级脏系统,因此默认实例自身的脏区域就是全局的脏标记;
+        独立实例布局变脏时登记到_layout_queue,主循环只处理队列中的实例.
     """
-    _instances = {}  # 存储所有命名实例
-    __slots__ = ('name', 'dirty_widget', 'widget', '_layout_dirty', 'initialized')
+    _instances = {}  # 存储共享的命名实例(default)
+    _layout_queue = [] # 布局变脏的独立实例
+    __slots__ = ('name', 'dirty_widget', 'widget', '_layout_dirty', 'display_list_dirty', 'initialized')
 
-    def __new__(cls, name='default', *args,**kwargs):
+    def __new__(cls, name='default', widget=None, *args,**kwargs):
+        if widget is not None: # 独立实例
+            return object.__new__(cls)
         # 确保每个名称只创建一个实例
         if name not in cls._instances:
             cls._instances[name] = object.__new__(cls)
@@ -28,6 +35,10 @@ class DirtySystem:
         self.widget=widget if name != 'default' else None
         # 布局系统脏标记，用来触发重新计算布局。布局系统的尺寸位置重分配总是从根节点开始。
         self._layout_dirty = True
+        # 显示列表脏标记, 布局或者子树的可见性/层级/背景改变后需要重新编译显示列表
+        self.display_list_dirty = True
+        if self.widget is not None:
+            DirtySystem._layout_queue.append(self)
         # 需要重新绘制的widget
         self.dirty_widget = set()
         # 标记默认的管理器已初始化,防止重复实例
@@ -36,22 +47,10 @@ class DirtySystem:
     @property
     def dirty(self):
         """绘制系统的脏标记,用来出发遍历组件树刷新
-        脏区域基类的dirty属性:
-        - 默认实例(name='default'): 检查自身和所有其他实例的脏状态
-        - 其他实例: 只检查自己的脏状态
+        独立实例的脏区域在add时已经传递给父级脏系统,
+        所以默认实例只需要检查自己,不需要遍历其他实例,开销与实例数量无关
         """
-        if self.name == 'default':
-            # 默认实例需要检查所有其他实例
-            for dirty_system in self._instances.values():
-                if dirty_system is self:
-                    continue
-                if dirty_system.dirty:  # 这里的递归是安全的,因为其他实例只检查自己
-                    return True
-            # 如果其他实例都不脏,才检查自己
-            return self._check_self_dirty()
-        else:
-            # 非默认实例只检查自己
-            return self._check_self_dirty()
+        return self._check_self_dirty()
 
     def _check_self_dirty(self):
         """检查自身的脏状态"""
@@ -75,13 +74,27 @@ class DirtySystem:
 
     @layout_dirty.setter
     def layout_dirty(self, value):
-        """设置 layout_dirty 属性，并同步到默认实例"""
+        """设置 layout_dirty 属性，独立实例变脏时登记到布局队列"""
+        if value and not self._layout_dirty and self.widget is not None:
+            DirtySystem._layout_queue.append(self)
+        if value: # 重新布局会改变widget的位置, 显示列表需要重新编译
+            self.display_list_dirty = True
         self._layout_dirty = value
 
     def clear(self):
         """重置脏区域"""
         raise NotImplementedError('脏区域基类未实现 clear 方法')
 
+    NEEDS_SCREEN = False # 是否需要先调用set_screen才能记录脏区域
+
+    def set_screen(self, width, height):
+        """设置脏系统覆盖的尺寸,只有按屏幕划分区域的脏系统(GridSystem)需要"""
+        pass
+
+    def profile(self, profiler):
+        """向FrameProfiler写入本帧脏系统相关的统计,在读取area之后,帧提交之前调用"""
+        pass
+
     def __repr__(self):
         return f'{self.__class__.__name__} \n\tname: {self.name}, area: {self.area}\n\tdirty_widget: {self.dirty_widget}'
 
@@ -156,18 +169,20 @@ class BoundBoxSystem(DirtySystem):
     """
     __slots__ = ('min_x', 'min_y', 'max_x', 'max_y', '_area')
 
+    EMPTY = 0x3fffffff # 没有脏区域时min的初始值,保证第一次add后包围盒就是该区域,而不是包含原点
+
     def __init__(self, name='default', widget=None):
         super().__init__(name, widget)
-        self.min_x, self.min_y = 0, 0
-        self.max_x, self.max_y = 0, 0
+        self.min_x, self.min_y = self.EMPTY, self.EMPTY
+        self.max_x, self.max_y = -1, -1
         self._area = [[0,0,0,0]]
 
     def _check_self_dirty(self):
-        return self.max_x - self.min_x > 0 or self.max_y - self.min_y > 0
+        return self.max_x >= self.min_x
 
     @property
     def area(self):
-        if self.max_x-self.min_x > 0 or self.max_y-self.min_y > 0:
+        if self.max_x >= self.min_x:
             self._area[0][0], self._area[0][1], self._area[0][2], self._area[0][3] = self.min_x, self.min_y, self.max_x, self.max_y
         return self._area
 
@@ -192,7 +207,516 @@ class BoundBoxSystem(DirtySystem):
 
     def clear(self):
         """重置边界框"""
-        self.min_x, self.min_y = 0, 0
-        self.max_x, self.max_y = 0, 0
+        self.min_x, self.min_y = self.EMPTY, self.EMPTY
+        self.max_x, self.max_y = -1, -1
         self._area[0][0], self._area[0][1], self._area[0][2], self._area[0][3] = 0,0,0,0
 
+
+class SweepRegionSystem(DirtySystem):
+    """
+    脏区域管理类,采用扫描线合并算法和刷新代价模型
+    add只记录矩形(O(1)),读取area时按y排序后一次扫描完成合并,突发的大量更新不再是O(n^2).
+    每个矩形的刷新代价 = window_cost(设置窗口,片选,一次渲染遍历的固定开销,折算为字节) + 像素数*pixel_cost,
+    合并时按代价决定:
+        合并: 并集的代价不大于两个矩形代价之和(包括相距很近但不重叠的矩形)
+        切分: 重叠但并集代价更高时,把新矩形切掉重叠部分,避免重叠像素刷新两次
+        包围盒: 所有矩形的总代价不低于包围盒代价时,退化为一个包围盒
+    矩形数量超过max_rects时,不断合并代价增量最小的一对.
+    """
+    __slots__ = ('_rects', '_area', '_resolved', 'window_cost', 'pixel_cost', 'max_rects')
+
+    WINDOW_COST = 1024 # 一次窗口刷新的固定开销,约等于ST7789在80MHz SPI下设置窗口的时间内能传输的字节数
+    PIXEL_COST = 2     # RGB565每像素字节数
+    MAX_RECTS = 16     # 每帧最多的刷新矩形数
+
+    def __init__(self, name='default', widget=None,
+                 window_cost=WINDOW_COST, pixel_cost=PIXEL_COST, max_rects=MAX_RECTS):
+        if hasattr(self, 'initialized'): # 单例已初始化,保留当前的脏区域
+            return
+        super().__init__(name, widget)
+        # 本帧add的原始矩形 [x0, y0, x1, y1]
+        self._rects = []
+        # 合并后的矩形,与MergeRegionSystem.area格式相同
+        self._area = []
+        self._resolved = True
+        self.window_cost = window_cost
+        self.pixel_cost = pixel_cost
+        self.max_rects = max_rects
+
+    def _check_self_dirty(self):
+        return len(self._rects) != 0
+
+    def add(self, x2, y2, width2, height2):
+        """添加脏区域,只记录,合并延迟到读取area时"""
+        width2 = width2 or 0
+        height2 = height2 or 0
+        if width2 <= 0 or height2 <= 0:  # 检查无效区域
+            return
+        logger.debug(f'{self.__class__.__name__} add {x2}, {y2}, {width2}, {height2}')
+        self._rects.append([x2, y2, x2 + width2 - 1, y2 + height2 - 1])
+        self._resolved = False
+        # 传递脏状态到父级脏系统
+        if self.widget:
+            parent_system = self.widget.dirty_system
+            parent_system.add(self.widget.dx, self.widget.dy, self.widget.width, self.widget.height)
+
+    @property
+    def area(self):
+        if not self._resolved:
+            self._area = self._resolve(self._rects)
+            self._resolved = True
+        return self._area
+
+    def cost(self, rect) -> int:
+        """刷新一个矩形的代价"""
+        return self.window_cost + (rect[2] - rect[0] + 1) * (rect[3] - rect[1] + 1) * self.pixel_cost
+
+    def total_cost(self, rects) -> int:
+        """刷新一组矩形的代价"""
+        cost = 0
+        for rect in rects:
+            cost += self.cost(rect)
+        return cost
+
+    def _resolve(self, rects):
+        """扫描线合并,返回合并后的矩形列表"""
+        if len(rects) == 1:
+            return [rects[0][:]]
+        window_cost, pixel_cost = self.window_cost, self.pixel_cost
+        # 按上边界排序,从上往下扫描
+        pending = sorted(rects, key=_top, reverse=True)
+        active = [] # 已输出且仍可能与后续矩形合并的矩形
+        result = []
+        while pending:
+            rect = pending.pop()
+            x0, y0, x1, y1 = rect
+            i = len(active) - 1
+            while i >= 0:
+                other = active[i]
+                ox0, oy0, ox1, oy1 = other
+                # 与当前扫描线相距太远的矩形不可能再合并: 间隔g行至少浪费 g*宽度 个像素
+                if (y0 - oy1) * (ox1 - ox0 + 1) * pixel_cost > window_cost:
+                    active.pop(i)
+                    i -= 1
+                    continue
+                ux0 = x0 if x0 < ox0 else ox0
+                uy0 = y0 if y0 < oy0 else oy0
+                ux1 = x1 if x1 > ox1 else ox1
+                uy1 = y1 if y1 > oy1 else oy1
+                union_cost = (ux1 - ux0 + 1) * (uy1 - uy0 + 1) * pixel_cost
+                separate_cost = ((x1 - x0 + 1) * (y1 - y0 + 1) + (ox1 - ox0 + 1) * (oy1 - oy0 + 1)) * pixel_cost + window_cost
+                if union_cost <= separate_cost:
+                    # 合并: 移除other,用并集继续和其他矩形比较
+                    active.pop(i)
+                    result.remove(other)
+                    x0, y0, x1, y1 = ux0, uy0, ux1, uy1
+                    i = len(active) - 1
+                    continue
+                if x0 <= ox1 and ox0 <= x1 and y0 <= oy1 and oy0 <= y1:
+                    # 切分: 重叠但合并更贵,切掉重叠部分, 切出的矩形重新参与扫描
+                    pieces = _subtract(x0, y0, x1, y1, ox0, oy0, ox1, oy1)
+                    overlap = (min(x1, ox1) - max(x0, ox0) + 1) * (min(y1, oy1) - max(y0, oy0) + 1)
+                    if overlap * pixel_cost > (len(pieces) - 1) * window_cost:
+                        for piece in pieces:
+                            _insert_sorted(pending, piece)
+                        rect = None
+                        break
+                i -= 1
+            if rect is not None:
+                merged = [x0, y0, x1, y1]
+                active.append(merged)
+                result.append(merged)
+        return self._limit(result)
+
+    def _limit(self, rects):
+        """包围盒退化和矩形数量上限"""
+        return _limit(rects, self.window_cost, self.pixel_cost, self.max_rects)
+
+    def clear(self):
+        """重置脏区域"""
+        self._rects.clear()
+        self._area = []
+        self._resolved = True
+
+def _limit(rects, window_cost, pixel_cost, max_rects):
+    """包围盒退化和矩形数量上限
+    所有矩形的总代价不低于包围盒代价时退化为一个包围盒,
+    否则矩形数量超过max_rects时,不断合并代价增量最小的一对.
+    """
+    if len(rects) <= 1:
+        return rects
+    x0, y0, x1, y1 = rects[0]
+    pixels = 0
+    for r in rects:
+        x0 = r[0] if r[0] < x0 else x0
+        y0 = r[1] if r[1] < y0 else y0
+        x1 = r[2] if r[2] > x1 else x1
+        y1 = r[3] if r[3] > y1 else y1
+        pixels += (r[2] - r[0] + 1) * (r[3] - r[1] + 1)
+    if window_cost + (x1 - x0 + 1) * (y1 - y0 + 1) * pixel_cost <= len(rects) * window_cost + pixels * pixel_cost:
+        return [[x0, y0, x1, y1]]
+    # 每次合并节省的window_cost相同,只需要比较增加的像素数
+    while len(rects) > max_rects:
+        n = len(rects)
+        best, best_i, best_j = -1, 0, 1
+        for i in range(n):
+            ax0, ay0, ax1, ay1 = rects[i]
+            area_a = (ax1 - ax0 + 1) * (ay1 - ay0 + 1)
+            for j in range(i + 1, n):
+                bx0, by0, bx1, by1 = rects[j]
+                delta = (((ax1 if ax1 > bx1 else bx1) - (ax0 if ax0 < bx0 else bx0) + 1)
+                         * ((ay1 if ay1 > by1 else by1) - (ay0 if ay0 < by0 else by0) + 1)
+                         - area_a - (bx1 - bx0 + 1) * (by1 - by0 + 1))
+                if best < 0 or delta < best:
+                    best, best_i, best_j = delta, i, j
+        b = rects.pop(best_j)
+        a = rects[best_i]
+        rects[best_i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+    return rects
+
+def _top(rect):
+    return rect[1]
+
+def _insert_sorted(pending, rect):
+    """按上边界插入逆序排列的待扫描列表,保持pop()取出的总是最上面的矩形"""
+    i = len(pending)
+    while i > 0 and pending[i - 1][1] < rect[1]:
+        i -= 1
+    pending.insert(i, rect)
+
+def _subtract(x0, y0, x1, y1, ox0, oy0, ox1, oy1):
+    """矩形(x0,y0,x1,y1)减去与(ox0,oy0,ox1,oy1)重叠的部分,返回最多4个矩形"""
+    pieces = []
+    if y0 < oy0: # 上
+        pieces.append([x0, y0, x1, oy0 - 1])
+        y0 = oy0
+    if y1 > oy1: # 下
+        pieces.append([x0, oy1 + 1, x1, y1])
+        y1 = oy1
+    if x0 < ox0: # 左
+        pieces.append([x0, y0, ox0 - 1, y1])
+    if x1 > ox1: # 右
+        pieces.append([ox1 + 1, y0, x1, y1])
+    return pieces
+
+
+class GridSystem(DirtySystem):
+    """
+    网格型脏区域管理,采用位图(bitset)标记脏网格
+    屏幕按cell_size划分网格,每个网格占1个bit,每行网格占stride个字节.
+    add只做按字节的位或运算,与脏区域数量无关,适合大量分散的小区域更新(例如很多label同时改变).
+    读取area时逐行提取连续的脏网格(水平游程),上下相邻且左右边界相同的游程合并为一个矩形,
+    得到的矩形都是整行连续的像素,适合SPI按窗口刷新.
+    网格尺寸需要屏幕(或独立bitmap)的尺寸,由set_screen设置,Display(dirty_system=GridSystem)会自动设置.
+    """
+    __slots__ = ('width', 'height', 'cell_size', 'shift', 'cols', 'rows', 'stride', 'bits',
+                 '_min_row', '_max_row', '_area', '_resolved')
+
+    CELL_SIZE = 8 # 网格边长,必须是2的幂
+    NEEDS_SCREEN = True
+
+    def __init__(self, name='default', widget=None, width=0, height=0, cell_size=CELL_SIZE):
+        if hasattr(self, 'initialized'): # 单例已初始化,保留当前的脏区域
+            return
+        if cell_size & (cell_size - 1):
+            raise ValueError('GridSystem cell_size must be a power of 2')
+        super().__init__(name, widget)
+        self.cell_size = cell_size
+        self.shift = 0 # log2(cell_size),用移位代替除法
+        while (1 << self.shift) < cell_size:
+            self.shift += 1
+        # 合并后的矩形,与MergeRegionSystem.area格式相同
+        self._area = []
+        self._resolved = True
+        self.set_screen(width, height)
+
+    def set_screen(self, width, height):
+        """设置网格覆盖的尺寸,重新分配位图并清空脏区域"""
+        self.width, self.height = width, height
+        self.cols = (width + self.cell_size - 1) >> self.shift
+        self.rows = (height + self.cell_size - 1) >> self.shift
+        self.stride = (self.cols + 7) >> 3
+        self.bits = bytearray(self.stride * self.rows)
+        # 有脏网格的行范围,clear和area只处理这些行, _max_row < _min_row 表示没有脏区域
+        self._min_row = self.rows
+        self._max_row = -1
+        self._area = []
+        self._resolved = True
+
+    def _check_self_dirty(self):
+        return self._max_row >= 0
+
+    def add(self, x2, y2, width2, height2):
+        """添加脏区域,标记所有与之相交的网格"""
+        width2 = width2 or 0
+        height2 = height2 or 0
+        if width2 <= 0 or height2 <= 0:  # 检查无效区域
+            return
+        logger.debug(f'{self.__class__.__name__} add {x2}, {y2}, {width2}, {height2}')
+        # 裁剪到网格范围内
+        x0 = x2 if x2 > 0 else 0
+        y0 = y2 if y2 > 0 else 0
+        x1 = x2 + width2 - 1
+        y1 = y2 + height2 - 1
+        if x1 >= self.width:
+            x1 = self.width - 1
+        if y1 >= self.height:
+            y1 = self.height - 1
+        if x0 <= x1 and y0 <= y1:
+            shift = self.shift
+            c0, c1 = x0 >> shift, x1 >> shift
+            r0, r1 = y0 >> shift, y1 >> shift
+            b0, b1 = c0 >> 3, c1 >> 3
+            # 首尾字节的掩码,中间字节全部置1
+            first = (0xff << (c0 & 7)) & 0xff
+            last = 0xff >> (7 - (c1 & 7))
+            if b0 == b1:
+                first &= last
+            bits, stride = self.bits, self.stride
+            for row in range(r0, r1 + 1):
+                base = row * stride
+                bits[base + b0] |= first
+                if b1 != b0:
+                    for b in range(base + b0 + 1, base + b1):
+                        bits[b] = 0xff
+                    bits[base + b1] |= last
+            if r0 < self._min_row:
+                self._min_row = r0
+            if r1 > self._max_row:
+                self._max_row = r1
+            self._resolved = False
+        # 传递脏状态到父级脏系统
+        if self.widget:
+            parent_system = self.widget.dirty_system
+            parent_system.add(self.widget.dx, self.widget.dy, self.widget.width, self.widget.height)
+
+    @property
+    def area(self):
+        if not self._resolved:
+            self._area = self._resolve()
+            self._resolved = True
+        return self._area
+
+    def _runs(self, row):
+        """返回一行中所有连续脏网格的 [起始列, 结束列]"""
+        runs = []
+        bits, base = self.bits, row * self.stride
+        start = -1
+        for b in range(self.stride):
+            byte = bits[base + b]
+            if byte == 0xff and start >= 0: # 整个字节都在当前游程中
+                continue
+            if byte == 0 and start < 0: # 整个字节都不脏
+                continue
+            col = b << 3
+            for i in range(8):
+                if byte & (1 << i):
+                    if start < 0:
+                        start = col + i
+                elif start >= 0:
+                    runs.append([start, col + i - 1])
+                    start = -1
+        if start >= 0:
+            runs.append([start, self.cols - 1])
+        return runs
+
+    def _resolve(self):
+        """逐行提取水平游程,与上一行左右边界相同的游程向下延伸"""
+        shift = self.shift
+        result = []
+        opened = {} # (起始列, 结束列) -> 上一行仍在延伸的矩形
+        for row in range(self._min_row, self._max_row + 1):
+            extended = {}
+            for c0, c1 in self._runs(row):
+                rect = opened.get((c0, c1))
+                if rect is None:
+                    rect = [c0 << shift, row << shift, ((c1 + 1) << shift) - 1, 0]
+                    result.append(rect)
+                rect[3] = ((row + 1) << shift) - 1
+                extended[(c0, c1)] = rect
+            opened = extended
+        # 最后一列/行的网格可能超出屏幕
+        for rect in result:
+            if rect[2] >= self.width:
+                rect[2] = self.width - 1
+            if rect[3] >= self.height:
+                rect[3] = self.height - 1
+        # 分散的小区域会得到很多矩形, 按与SweepRegionSystem相同的代价模型退化为包围盒或限制数量
+        return _limit(result, SweepRegionSystem.WINDOW_COST, SweepRegionSystem.PIXEL_COST, SweepRegionSystem.MAX_RECTS)
+
+    def intersects(self, x, y, width, height) -> bool:
+        """判断区域是否与脏网格重叠"""
+        width = width or 0
+        height = height or 0
+        if width <= 0 or height <= 0:
+            return False
+        shift = self.shift
+        c0, c1 = max(x, 0) >> shift, min(x + width - 1, self.width - 1) >> shift
+        r0, r1 = max(y, self._min_row << shift) >> shift, min(y + height - 1, self.height - 1) >> shift
+        if r1 > self._max_row:
+            r1 = self._max_row
+        bits, stride = self.bits, self.stride
+        for row in range(r0, r1 + 1):
+            base = row * stride
+            for col in range(c0, c1 + 1):
+                if bits[base + (col >> 3)] & (1 << (col & 7)):
+                    return True
+        return False
+
+    def clear(self):
+        """重置脏区域,只清空有脏网格的行"""
+        if self._max_row >= 0:
+            bits = self.bits
+            for i in range(self._min_row * self.stride, (self._max_row + 1) * self.stride):
+                bits[i] = 0
+        self._min_row = self.rows
+        self._max_row = -1
+        self._area = []
+        self._resolved = True
+
+
+def _detached(cls):
+    """创建一个不注册,也不向上传递脏状态的脏系统, 只用来计算area"""
+    system = object.__new__(cls)
+    system.__init__()
+    return system
+
+class AdaptiveSystem(DirtySystem):
+    """
+    自适应脏区域管理,运行时在多种脏区域系统之间切换
+    add的矩形交给当前使用的系统(active)合并,同时记录原始矩形.
+    每帧clear时统计: 原始矩形数, 原始矩形像素数之和(damage), 刷新的像素数和窗口数, 过量刷新比例.
+    每sample帧把原始矩形重放给其他候选系统,按刷新代价(窗口数*WINDOW_COST + 刷新字节数)累计,
+    每累计window次采样比较一次, 其他系统的代价比当前系统低1/8以上时切换.
+    切换只发生在clear中, 即一帧刷新完成之后, 新系统从空的脏区域开始, 不会出现半帧使用不同系统的情况.
+    """
+    __slots__ = ('systems', 'active', '_rects', 'scores', 'sample', 'window', 'frames', 'samples',
+                 'width', 'height', 'switches', 'last_rects', 'last_damage', 'last_pixels', 'last_windows',
+                 '_damage')
+
+    CANDIDATES = (MergeRegionSystem, BoundBoxSystem, SweepRegionSystem, GridSystem)
+    SAMPLE = 4 # 每几帧采样一次
+    WINDOW = 8 # 每几次采样比较一次
+
+    def __init__(self, name='default', widget=None, candidates=CANDIDATES, sample=SAMPLE, window=WINDOW):
+        """
+        Args:
+            candidates (tuple, optional): 候选的脏区域系统类, 第一个为初始使用的系统. Defaults to CANDIDATES.
+            sample (int, optional): 每几帧重放一次原始矩形给候选系统. Defaults to SAMPLE.
+            window (int, optional): 每几次采样比较一次累计代价. Defaults to WINDOW.
+        """
+        if hasattr(self, 'initialized'): # 单例已初始化,保留当前的脏区域
+            return
+        super().__init__(name, widget)
+        self.systems = [_detached(cls) for cls in candidates]
+        self.active = self.systems[0]
+        self._rects = [] # 本帧的原始矩形 (x, y, width, height)
+        self.scores = [0] * len(self.systems) # 本轮各系统累计的刷新代价
+        self.sample = sample
+        self.window = window
+        self.frames = 0  # 距上次采样的帧数
+        self.samples = 0 # 本轮已采样次数
+        self.width, self.height = 0, 0
+        self.switches = 0 # 切换次数
+        # 最近一帧的统计
+        self.last_rects = 0   # 原始矩形数
+        self.last_damage = 0  # 原始矩形像素数之和
+        self.last_pixels = 0  # 刷新的像素数
+        self.last_windows = 0 # 刷新的窗口数
+        self._damage = 0
+
+    def set_screen(self, width, height):
+        """设置尺寸,需要尺寸的候选系统(GridSystem)只有设置后才参与比较"""
+        self.width, self.height = width, height
+        for system in self.systems:
+            system.set_screen(width, height)
+
+    def _check_self_dirty(self):
+        return len(self._rects) != 0
+
+    def add(self, x2, y2, width2, height2):
+        """添加脏区域,交给当前系统合并并记录原始矩形"""
+        width2 = width2 or 0
+        height2 = height2 or 0
+        if width2 <= 0 or height2 <= 0:  # 检查无效区域
+            return
+        self._rects.append((x2, y2, width2, height2))
+        self._damage += width2 * height2
+        self.active.add(x2, y2, width2, height2)
+        # 传递脏状态到父级脏系统
+        if self.widget:
+            parent_system = self.widget.dirty_system
+            parent_system.add(self.widget.dx, self.widget.dy, self.widget.width, self.widget.height)
+
+    @property
+    def area(self):
+        return self.active.area
+
+    @property
+    def overdraw(self) -> int:
+        """最近一帧刷新的像素数相对原始矩形像素数的百分比, 小于100表示原始矩形之间有重叠"""
+        return self.last_pixels * 100 // self.last_damage if self.last_damage else 0
+
+    def _cost(self, area):
+        """刷新area的代价, 与SweepRegionSystem的代价模型相同"""
+        pixels = 0
+        for x0, y0, x1, y1 in area:
+            pixels += (x1 - x0 + 1) * (y1 - y0 + 1)
+        return len(area) * SweepRegionSystem.WINDOW_COST + pixels * SweepRegionSystem.PIXEL_COST, pixels
+
+    def _evaluate(self):
+        """把本帧的原始矩形重放给其他候选系统, 累计各系统的刷新代价"""
+        rects = self._rects
+        for i, system in enumerate(self.systems):
+            if system is self.active:
+                self.scores[i] += self._cost(system.area)[0]
+            elif system.NEEDS_SCREEN and not self.width:
+                self.scores[i] = -1 # 没有尺寸,不参与比较
+            else:
+                for rect in rects:
+                    system.add(*rect)
+                self.scores[i] += self._cost(system.area)[0]
+                system.clear()
+        self.samples += 1
+        if self.samples < self.window:
+            return
+        current = self.scores[self.systems.index(self.active)]
+        best = -1
+        for i, score in enumerate(self.scores):
+            if score >= 0 and (best < 0 or score < self.scores[best]):
+                best = i
+        if self.systems[best] is not self.active and self.scores[best] * 8 < current * 7:
+            logger.debug(f'{self.__class__.__name__} switch {self.active.__class__.__name__} '
+                         f'-> {self.systems[best].__class__.__name__}')
+            self.active = self.systems[best]
+            self.switches += 1
+        for i in range(len(self.scores)):
+            self.scores[i] = 0
+        self.samples = 0
+
+    def profile(self, profiler):
+        """写入原始矩形像素数和当前系统的序号"""
+        profiler.add(profiler.DAMAGE, self._damage)
+        profiler.add(profiler.SYSTEM, self.systems.index(self.active))
+
+    def clear(self):
+        """统计本帧, 必要时切换系统, 然后重置脏区域"""
+        active = self.active
+        if self._rects:
+            self.last_rects = len(self._rects)
+            self.last_damage = self._damage
+            self.last_windows = len(self.active.area)
+            self.last_pixels = self._cost(self.active.area)[1]
+            self.frames += 1
+            if self.frames >= self.sample:
+                self.frames = 0
+                self._evaluate()
+        active.clear() # 切换前使用的系统也要清空, 新系统在采样时已经清空
+        self._rects.clear()
+        self._damage = 0
+
+    def stats(self) -> dict:
+        """最近一帧的统计和当前使用的系统"""
+        return {'system': self.active.__class__.__name__, 'switches': self.switches,
+                'rects': self.last_rects, 'damage': self.last_damage,
+                'pixels': self.last_pixels, 'windows': self.last_windows, 'overdraw': self.overdraw}
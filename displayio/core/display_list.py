@@ -0,0 +1,99 @@
+# ./core/display_list.py
+from .bitmap import Bitmap
+
+class DisplayList:
+    """
+    从widget树编译出的显示列表, 按绘制顺序保存扁平的绘制操作, 在帧之间保留
+    每个操作占 STRIDE 个元素: x0, y0, x1, y1, 对象, 颜色, 跳转位置, 深度, 是否裁剪
+        x0..y1: 裁剪矩形(含边界), 即widget的屏幕矩形和所有祖先矩形的交集,
+            容器只填充裁剪矩形, 子widget也只绘制在裁剪矩形内; 裁剪矩形为空的子树不编译
+        颜色为None时对象是叶子widget的位图, blit到位图的(dx, dy), 透明色由位图决定;
+        否则对象是容器, 用颜色(已转换为位图中保存的值)填充裁剪矩形.
+        背景为图片的容器也编译成位图操作: 对象是放在容器左上角、与图片共用缓冲区的位图(见_placed),
+        只复制图片和裁剪矩形的交集, 图片覆盖整个裁剪矩形且不透明时才能遮挡下层
+        跳转位置: 容器子树结束后的下一个操作, 容器和区域不相交时直接跳过整个子树
+        深度: 根节点为0, 供RenderPlan一次遍历同时筛选多个区域
+        是否裁剪: 叶子位图超出了裁剪矩形, 只复制位图中裁剪矩形内的子矩形
+    编译只在布局或者子树的可见性/层级/背景改变后进行(由脏系统的display_list_dirty标记),
+    渲染时没有递归和hasattr, 只是一个循环.
+    """
+    __slots__ = ('ops', 'root', 'depth')
+
+    STRIDE = 9
+
+    def __init__(self):
+        self.ops = []
+        self.root = None # 编译时的根节点
+        self.depth = 0   # 最大深度
+
+    def build(self, root):
+        """从root开始重新编译显示列表"""
+        self.ops.clear()
+        self.root = root
+        self.depth = 0
+        self._compile(root, 0, root.dx, root.dy, root.dx + root.width - 1, root.dy + root.height - 1)
+
+    def _compile(self, widget, depth, cx0, cy0, cx1, cy1):
+        """编译widget子树, (cx0, cy0)-(cx1, cy1)为父节点的裁剪矩形"""
+        x0, y0 = max(widget.dx, cx0), max(widget.dy, cy0)
+        x1, y1 = min(widget.dx + widget.width - 1, cx1), min(widget.dy + widget.height - 1, cy1)
+        if x0 > x1 or y0 > y1: # 完全在父节点之外, 整个子树不可见
+            return
+        ops = self.ops
+        start = len(ops)
+        if depth > self.depth:
+            self.depth = depth
+        leaf = hasattr(widget, 'get_bitmap')
+        if leaf: # 叶子widget
+            obj, color = widget.get_bitmap(), None
+            clipped = (x0 != obj.dx or y0 != obj.dy or
+                       x1 != obj.dx + obj.width - 1 or y1 != obj.dy + obj.height - 1)
+        elif widget.background.native_color is not None: # 纯色背景的容器
+            obj, color, clipped = widget, widget.background.native_color, False
+        elif widget.background.pic is not None: # 图片背景的容器
+            obj, color, clipped = self._placed(widget.background.pic, widget.dx, widget.dy, x1, y1), None, True
+        else:
+            raise ValueError('无法编译 %s 的背景 %r: 容器背景必须是颜色或图片' % (widget, widget.background))
+        ops.extend((x0, y0, x1, y1, obj, color, 0, depth, clipped))
+        if not leaf:
+            for child in widget.children:
+                self._compile(child, depth + 1, x0, y0, x1, y1)
+        ops[start + 6] = len(ops)
+
+    @staticmethod
+    def _placed(pic, dx, dy, x1, y1):
+        """返回和pic共用缓冲区、左上角在屏幕(dx, dy)的位图, 只在编译时创建
+        图片不透明且覆盖到裁剪矩形的右下角(x1, y1)时, 位图才标记为不透明
+        """
+        bitmap = Bitmap()
+        bitmap.dx, bitmap.dy, bitmap.width, bitmap.height = dx, dy, pic.width, pic.height
+        bitmap.buffer, bitmap.fb, bitmap.color_format = pic.buffer, pic.fb, pic.color_format
+        bitmap.transparent_color = pic.transparent_color # 已经是转换后的值
+        bitmap.opaque = pic.opaque and dx + pic.width > x1 and dy + pic.height > y1
+        return bitmap
+
+    def paint(self, target, i, x, y):
+        """执行第i个元素开始的操作, target的左上角在屏幕(x, y)"""
+        ops = self.ops
+        obj, color = ops[i + 4], ops[i + 5]
+        if color is None:
+            if ops[i + 8]:
+                target.blit(obj, dx=ops[i]-x, dy=ops[i + 1]-y, sx=ops[i]-obj.dx, sy=ops[i + 1]-obj.dy,
+                            w=ops[i + 2]-ops[i]+1, h=ops[i + 3]-ops[i + 1]+1)
+            else:
+                target.blit(obj, dx=obj.dx-x, dy=obj.dy-y)
+        else:
+            target.fill_rect(ops[i]-x, ops[i + 1]-y, ops[i + 2]-ops[i]+1, ops[i + 3]-ops[i + 1]+1, color)
+
+    def render(self, target, area):
+        """把和area相交的操作绘制到target, target对应屏幕上以(area[0], area[1])为左上角的区域"""
+        ops = self.ops
+        ax0, ay0, ax1, ay1 = area[0], area[1], area[2], area[3]
+        end = len(ops)
+        i = 0
+        while i < end:
+            if ops[i] > ax1 or ax0 > ops[i + 2] or ops[i + 1] > ay1 or ay0 > ops[i + 3]:
+                i = ops[i + 6]
+                continue
+            self.paint(target, i, ax0, ay0)
+            i += 9
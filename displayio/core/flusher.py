@@ -0,0 +1,119 @@
+# ./core/flusher.py
+try:
+    import _thread # type: ignore
+except ImportError:
+    _thread = None
+
+class Flusher:
+    """
+    异步刷新线程, 用于渲染和刷新的流水线
+    主线程渲染完一个区域后submit给刷新线程, 立即渲染下一个区域到另一个缓冲区, CPU渲染和SPI传输同时进行.
+    提交的区域放入长度为depth的任务环, 刷新线程按顺序逐个刷新, 任务环不空时不需要等待主线程,
+    submit先把区域放进任务环, 再等待到未完成的区域少于depth个才返回, 所以用depth个缓冲区轮流渲染时,
+    submit返回后下一个缓冲区(depth次之前提交的)一定已经刷新完, 可以改写.
+    两个线程只在任务环满或者空时才互相等待, 不会每个区域都轮流交接一次.
+    没有 _thread 的平台上 available 为 False, 由调用者退回同步刷新.
+    """
+    __slots__ = ('output', 'jobs', 'head', 'count', 'lock', 'pending', 'space', 'worker_waiting',
+                 'main_waiting', 'running', 'error', 'flushes')
+
+    available = _thread is not None
+
+    def __init__(self, output, depth=2):
+        """
+        Args:
+            output: 输出驱动, 在刷新线程中调用它的refresh
+            depth (int, optional): 最多同时未完成的区域数, 等于主线程轮流使用的渲染缓冲区数. Defaults to 2.
+        """
+        self.output = output
+        self.jobs = [[None, 0, 0, 0, 0] for _ in range(depth)] # buffer, dx, dy, width, height, 复用同一组列表
+        self.head = 0  # 最早提交的区域所在的位置
+        self.count = 0 # 已提交还没刷新完的区域数
+        # lock保护head/count和两个等待标志; pending在刷新线程等待新任务时释放, space在主线程等待空位时释放
+        self.lock = _thread.allocate_lock()
+        self.pending = _thread.allocate_lock()
+        self.pending.acquire()
+        self.space = _thread.allocate_lock()
+        self.space.acquire()
+        self.worker_waiting = False
+        self.main_waiting = False
+        self.running = True
+        self.error = None # 刷新线程中的异常, 在主线程的wait/submit中重新抛出
+        self.flushes = 0
+        _thread.start_new_thread(self._worker, ())
+
+    def _worker(self):
+        jobs, lock = self.jobs, self.lock
+        while True:
+            lock.acquire()
+            if not self.count:
+                if not self.running:
+                    lock.release()
+                    return
+                self.worker_waiting = True
+                lock.release()
+                self.pending.acquire()
+                continue
+            job = jobs[self.head]
+            lock.release()
+            try:
+                self.output.refresh(job[0], dx=job[1], dy=job[2], width=job[3], height=job[4])
+                self.flushes += 1
+            except Exception as e:
+                self.error = e
+            job[0] = None
+            lock.acquire()
+            self.head = (self.head + 1) % len(jobs)
+            self.count -= 1
+            if self.main_waiting:
+                self.main_waiting = False
+                self.space.release()
+            lock.release()
+
+    def _wait_below(self, limit):
+        """在lock中调用, 等待到未完成的区域数不超过limit, 返回时仍持有lock"""
+        while self.count > limit:
+            self.main_waiting = True
+            self.lock.release()
+            self.space.acquire()
+            self.lock.acquire()
+
+    def submit(self, buffer, dx, dy, width, height):
+        """提交一个刷新任务, 放入任务环后等待到有空闲的缓冲区再返回, 不等待本次刷新"""
+        lock, jobs = self.lock, self.jobs
+        lock.acquire()
+        self._wait_below(len(jobs) - 1) # 任务环满时(只在depth为1时发生)先等出一个位置
+        job = jobs[(self.head + self.count) % len(jobs)]
+        job[0], job[1], job[2], job[3], job[4] = buffer, dx, dy, width, height
+        self.count += 1
+        if self.worker_waiting:
+            self.worker_waiting = False
+            self.pending.release()
+        # 先交出任务再等待, 刷新线程刷新完上一个区域可以直接开始这一个
+        self._wait_below(len(jobs) - 1)
+        lock.release()
+        self._raise()
+
+    def wait(self):
+        """等待所有已提交的区域刷新完成"""
+        self.lock.acquire()
+        self._wait_below(0)
+        self.lock.release()
+        self._raise()
+
+    def _raise(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def stop(self):
+        """等待已提交的区域刷新完成, 然后结束刷新线程"""
+        if not self.running:
+            return
+        self.lock.acquire()
+        self._wait_below(0)
+        self.running = False
+        if self.worker_waiting:
+            self.worker_waiting = False
+            self.pending.release()
+        self.lock.release()
@@ -0,0 +1,158 @@
+# ./core/profiler.py
+from array import array
+import time
+
+def _stats(values):
+    """返回 (min, avg, p95, max), 会对values原地排序"""
+    if not values:
+        return (0, 0, 0, 0)
+    values.sort()
+    return (values[0], sum(values) // len(values),
+            values[min(len(values) - 1, len(values) * 95 // 100)], values[-1])
+
+class FrameProfiler:
+    """
+    逐帧分阶段性能统计
+    每一帧的各阶段耗时(us)和脏区域信息先累加到current,
+    帧结束时commit()写入预分配的环形缓冲区(没有刷新的帧用discard()丢弃), 运行时不分配内存, 不打印.
+    需要时调用stats()/report()查询最近size帧的 min/avg/p95/max.
+    """
+    # 字段索引
+    EVENT = 0   # process_event 及事件冒泡
+    LAYOUT = 1  # update_layout
+    DRAW = 2    # widget.draw()
+    RENDER = 3  # _render_widget (含dirty_bitmap初始化和全局刷新时的blit)
+    FLUSH = 4   # output.refresh
+    FRAME = 5   # 以上各阶段之和
+    RECTS = 6   # 脏区域数量
+    PIXELS = 7  # 脏区域像素数
+    DAMAGE = 8  # 合并前脏矩形的像素数之和(只有AdaptiveSystem记录)
+    SYSTEM = 9  # AdaptiveSystem当前使用的候选系统序号
+    ALLOCS = 10 # 渲染临时位图(ArenaBitmap)和blit临时视图(Bitmap.view_allocs)的分配次数, 有原生模块时稳定状态下应为0
+    PAINTED = 11 # 渲染时实际绘制的像素数, PAINTED/PIXELS 为过度绘制倍数
+    CULLED = 12  # 被不透明widget完全遮住而跳过的绘制操作数
+    FIELDS = ('event', 'layout', 'draw', 'render', 'flush', 'frame', 'rects', 'pixels', 'damage', 'system', 'allocs',
+              'painted', 'culled')
+
+    __slots__ = ('size', 'samples', 'current', 'index', 'count')
+
+    def __init__(self, size=64):
+        """
+        Args:
+            size (int, optional): 环形缓冲区保存的帧数. Defaults to 64.
+        """
+        n = len(self.FIELDS)
+        self.size = size
+        # 环形缓冲区, 第i帧的字段f位于 samples[i*n+f]
+        self.samples = array('i', bytes(4 * size * n))
+        # 当前帧的累加值
+        self.current = array('i', bytes(4 * n))
+        self.index = 0 # 下一帧写入位置
+        self.count = 0 # 已记录的帧数(最多size)
+
+    def reset(self):
+        """清空所有记录"""
+        for i in range(len(self.current)):
+            self.current[i] = 0
+        self.index = 0
+        self.count = 0
+
+    def add(self, field, value):
+        """给当前帧的字段累加数值"""
+        self.current[field] += value
+
+    def lap(self, field, start):
+        """把从start(ticks_us)到现在的耗时累加到字段, 返回当前ticks_us, 便于连续计时"""
+        now = time.ticks_us()
+        self.current[field] += time.ticks_diff(now, start)
+        return now
+
+    def discard(self):
+        """丢弃当前帧的累加值, 没有刷新的帧调用, 避免它的event/layout耗时计入下一帧"""
+        current = self.current
+        for i in range(len(current)):
+            current[i] = 0
+
+    def commit(self):
+        """结束当前帧, 写入环形缓冲区"""
+        current = self.current
+        current[self.FRAME] = (current[self.EVENT] + current[self.LAYOUT] + current[self.DRAW]
+                               + current[self.RENDER] + current[self.FLUSH])
+        n = len(current)
+        base = self.index * n
+        for i in range(n):
+            self.samples[base + i] = current[i]
+            current[i] = 0
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def last(self, field):
+        """最近一帧某字段的值, 没有记录时返回0"""
+        if not self.count:
+            return 0
+        return self.samples[((self.index - 1) % self.size) * len(self.current) + field]
+
+    def values(self, field):
+        """按时间顺序返回最近count帧某字段的值"""
+        n = len(self.current)
+        start = (self.index - self.count) % self.size
+        return [self.samples[((start + i) % self.size) * n + field] for i in range(self.count)]
+
+    def stats(self, field):
+        """返回某字段的 (min, avg, p95, max), 没有记录时全部为0"""
+        return _stats(self.values(field))
+
+    def report(self):
+        """返回 {字段名: (min, avg, p95, max)}"""
+        return {name: self.stats(i) for i, name in enumerate(self.FIELDS)}
+
+    def __repr__(self):
+        lines = [f'{self.__class__.__name__} frames: {self.count}']
+        for i, name in enumerate(self.FIELDS):
+            lines.append('\t%-7s min %7d avg %7d p95 %7d max %7d' % ((name,) + self.stats(i)))
+        return '\n'.join(lines)
+
+
+class RingStats:
+    """
+    单个数值的环形缓冲区统计, 例如每个输入事件从输入到刷新的延迟
+    与FrameProfiler一样预分配内存, 记录时不分配.
+    """
+    __slots__ = ('size', 'samples', 'index', 'count')
+
+    def __init__(self, size=64):
+        self.size = size
+        self.samples = array('i', bytes(4 * size))
+        self.index = 0
+        self.count = 0
+
+    def reset(self):
+        """清空所有记录"""
+        self.index = 0
+        self.count = 0
+
+    def add(self, value):
+        """记录一个数值"""
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def last(self):
+        """最近一次记录的值, 没有记录时返回0"""
+        if not self.count:
+            return 0
+        return self.samples[(self.index - 1) % self.size]
+
+    def values(self):
+        """按时间顺序返回所有记录"""
+        start = (self.index - self.count) % self.size
+        return [self.samples[(start + i) % self.size] for i in range(self.count)]
+
+    def stats(self):
+        """返回 (min, avg, p95, max), 没有记录时全部为0"""
+        return _stats(self.values())
+
+    def __repr__(self):
+        return '%s count %d min %d avg %d p95 %d max %d' % ((self.__class__.__name__, self.count) + self.stats())
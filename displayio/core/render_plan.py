@@ -0,0 +1,106 @@
+# ./core/render_plan.py
+
+class RenderPlan:
+    """
+    渲染计划, 每帧遍历一次显示列表(DisplayList), 为每个脏区域筛选出一个绘制列表
+    每个操作只和父节点命中的脏区域做相交测试(按深度保存在stack中), 不和任何脏区域相交的容器连同整个子树被跳过,
+    所以代价取决于受影响的widget数, 而不是 脏区域数 x widget数.
+    一个区域切成多个条带(或者分给多个渲染线程)时共用同一个绘制列表.
+    绘制列表保存操作在显示列表中的位置, 按绘制顺序排列, 执行时容器只填充自己的裁剪矩形,
+    超出祖先边界的叶子位图只复制裁剪矩形内的部分.
+    执行计划时只读位图, 可以在渲染线程中执行, 被不透明对象完全遮住的对象不绘制.
+    所有列表在帧之间复用, 稳定状态下不分配内存.
+    """
+    __slots__ = ('display_list', 'lists', 'stack', 'count', 'visited', 'cull', 'painted', 'culled')
+
+    def __init__(self):
+        self.display_list = None # 本帧使用的显示列表
+        self.lists = []  # 每个脏区域一个绘制列表
+        self.stack = []  # 每层一个列表, stack[d]记录深度为d的节点的父节点命中的区域序号
+        self.count = 0   # 本帧的脏区域数
+        self.visited = 0 # 本帧做过相交测试的操作数
+        self.cull = True # 遮挡剔除, 关闭后按顺序绘制所有对象(用于对比)
+        # 过度绘制统计, 每帧build时清零, 多线程渲染时由渲染线程各自累加到counters, 帧结束时用merge汇总
+        self.painted = 0 # 实际绘制的像素数, 与脏区域像素数之比就是过度绘制倍数
+        self.culled = 0  # 被完全遮住而跳过的操作数
+
+    def build(self, display_list, areas):
+        """遍历一次display_list, 为areas中的每个区域生成绘制列表"""
+        count = len(areas)
+        lists, stack = self.lists, self.stack
+        while len(lists) < count:
+            lists.append([])
+        for i in range(count):
+            lists[i].clear()
+        while len(stack) <= display_list.depth + 1:
+            stack.append([])
+        hits = stack[0]
+        hits.clear()
+        for i in range(count):
+            hits.append(i)
+        self.display_list = display_list
+        self.count = count
+        self.painted = 0
+        self.culled = 0
+        visited = 0
+        ops = display_list.ops
+        end = len(ops) if count else 0
+        i = 0
+        while i < end:
+            visited += 1
+            x0, y0, x1, y1 = ops[i], ops[i + 1], ops[i + 2], ops[i + 3]
+            depth = ops[i + 7]
+            hits = stack[depth + 1]
+            hits.clear()
+            for index in stack[depth]:
+                area = areas[index]
+                if not (area[0] > x1 or x0 > area[2] or area[1] > y1 or y0 > area[3]):
+                    hits.append(index)
+            if not hits: # 不相交, 跳过整个子树
+                i = ops[i + 6]
+                continue
+            for index in hits:
+                lists[index].append(i)
+            i += 9 # 子节点(深度为depth+1)只和本节点命中的区域做相交测试
+        self.visited = visited
+
+    def render(self, target, index, x, y, counters=None):
+        """执行第index个区域的绘制列表, target对应屏幕上以(x, y)为左上角的区域(可以是区域中的一个条带)
+        遮挡剔除: 从后往前找最后一个裁剪矩形完全覆盖target的不透明操作(容器填充或opaque位图),
+        它之前的操作都被完全遮住, 直接跳过.
+        counters为 [painted, culled], 在渲染线程中执行时传入线程自己的列表, 为None时直接累加到self上.
+        """
+        items = self.lists[index]
+        display_list = self.display_list
+        ops = display_list.ops
+        x1, y1 = x + target.width - 1, y + target.height - 1
+        first = 0
+        if self.cull:
+            k = len(items) - 1
+            while k >= 0:
+                i = items[k]
+                if ((ops[i + 5] is not None or ops[i + 4].opaque) and ops[i] <= x and ops[i + 1] <= y
+                        and ops[i + 2] >= x1 and ops[i + 3] >= y1):
+                    first = k
+                    break
+                k -= 1
+        painted = 0
+        for k in range(first, len(items)):
+            i = items[k]
+            display_list.paint(target, i, x, y)
+            # 统计实际写入target的像素数(裁剪矩形和target的交集)
+            w = min(ops[i + 2], x1) - max(ops[i], x) + 1
+            h = min(ops[i + 3], y1) - max(ops[i + 1], y) + 1
+            if w > 0 and h > 0:
+                painted += w * h
+        if counters is None:
+            self.painted += painted
+            self.culled += first
+        else:
+            counters[0] += painted
+            counters[1] += first
+
+    def merge(self, counters):
+        """把渲染线程汇总的 [painted, culled] 加到本帧统计上"""
+        self.painted += counters[0]
+        self.culled += counters[1]
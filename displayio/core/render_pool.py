@@ -0,0 +1,113 @@
+# ./core/render_pool.py
+try:
+    import _thread # type: ignore
+except ImportError:
+    _thread = None
+
+from .bitmap import ArenaBitmap
+
+class _Worker:
+    """渲染线程的状态, 每个线程有自己的渲染缓冲区"""
+    __slots__ = ('bitmap', 'area', 'counters', 'pending', 'done')
+
+    def __init__(self, size):
+        self.bitmap = ArenaBitmap(size)
+        self.area = [0, 0, 0, 0, 0] # 要渲染的区域和附带的序号, 复用同一个列表
+        self.counters = [0, 0] # render累加的统计值, 只有本线程写, 主线程在任务全部取回后读取
+        # pending: 有任务时释放, 渲染线程在它上面等待
+        self.pending = _thread.allocate_lock()
+        self.pending.acquire()
+        # done: 渲染完成时释放, 主线程取结果时获取
+        self.done = _thread.allocate_lock()
+        self.done.acquire()
+
+
+class RenderPool:
+    """
+    多线程渲染池, 把互相独立的区域(脏区域或者大区域切出的条带)分给多个渲染线程
+    每个线程用自己的ArenaBitmap执行 render(bitmap, area, counters), 主线程按提交顺序取回结果并刷新.
+    area为 [x0, y0, x1, y1, index], index由调用者定义(例如所属脏区域的序号).
+    counters是每个线程自己的统计列表, 线程之间不共享, 用 gather 在所有任务取回后汇总.
+    任务按顺序轮流分给各个线程, 线程数就是最多同时在渲染的区域数:
+        if pool.full:
+            output(pool.take()) # 先取回最早提交的结果, 它的线程才能接下一个任务
+        pool.submit(x0, y0, x1, y1)
+        ...
+        while pool.busy:
+            output(pool.take())
+    渲染线程只读取widget树, 所以widget的draw()必须在提交任务前由主线程完成.
+    没有 _thread 的平台上 available 为 False, 由调用者退回单线程渲染.
+    """
+    __slots__ = ('render', 'workers', 'head', 'busy', 'running', 'error')
+
+    available = _thread is not None
+
+    def __init__(self, render, count:int, size:int):
+        """
+        Args:
+            render: 渲染函数 render(bitmap, area, counters), 在渲染线程中调用
+            count (int): 渲染线程数
+            size (int): 每个线程渲染缓冲区的字节数
+        """
+        self.render = render
+        self.workers = [_Worker(size) for _ in range(count)]
+        self.head = 0  # 最早提交的任务所在的线程
+        self.busy = 0  # 已提交还没取回的任务数
+        self.running = True
+        self.error = None # 渲染线程中的异常, 在主线程的take中重新抛出
+        for worker in self.workers:
+            _thread.start_new_thread(self._worker, (worker,))
+
+    def _worker(self, worker):
+        while True:
+            worker.pending.acquire()
+            if not self.running:
+                return
+            try:
+                self.render(worker.bitmap, worker.area, worker.counters)
+            except Exception as e:
+                self.error = e
+            worker.done.release()
+
+    @property
+    def full(self) -> bool:
+        """所有线程都有任务, 需要先take才能submit"""
+        return self.busy == len(self.workers)
+
+    def submit(self, x0, y0, x1, y1, index=0):
+        """提交一个区域的渲染任务, 立即返回, index原样传给render(在area[4]中)"""
+        workers = self.workers
+        worker = workers[(self.head + self.busy) % len(workers)]
+        area = worker.area
+        area[0], area[1], area[2], area[3], area[4] = x0, y0, x1, y1, index
+        self.busy += 1
+        worker.pending.release()
+
+    def take(self) -> ArenaBitmap:
+        """等待最早提交的任务完成, 返回渲染好的位图, 位图在下一次submit前有效"""
+        worker = self.workers[self.head]
+        worker.done.acquire()
+        self.head = (self.head + 1) % len(self.workers)
+        self.busy -= 1
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return worker.bitmap
+
+    def gather(self, totals):
+        """把各线程的统计值加到totals上并清零, 必须在任务全部取回(busy为0)后调用"""
+        for worker in self.workers:
+            counters = worker.counters
+            for i in range(len(counters)):
+                totals[i] += counters[i]
+                counters[i] = 0
+
+    def stop(self):
+        """取回未完成的任务并结束渲染线程"""
+        if not self.running:
+            return
+        while self.busy:
+            self.take()
+        self.running = False
+        for worker in self.workers:
+            worker.pending.release()
@@ -0,0 +1,194 @@
+# ./core/scheduler.py
+import time
+
+class Task:
+    """表示一个任务,add_task的返回值,可以调用cancel()取消"""
+    __slots__ = ('generator', 'callback', 'period', 'priority', 'one_shot', 'on_complete', 'args', 'kwargs',
+                 'next_run', 'rounds', 'cancelled', 'wakeup')
+
+    def __init__(self, callback,
+                 period=0, priority=10,
+                 one_shot=False, on_complete=None,
+                 args=(), kwargs={}):
+        """
+        Args:
+            callback (function): 任务回调
+            period (int, optional): 任务调用间隔,单位ms. Defaults to 0.
+            priority (int, optional): 任务优先级. Defaults to 10.
+            one_shot (bool, optional): 标记任务是否为单次任务. Defaults to False.
+            on_complete (_type_, optional): 任务回调执行完毕执行的回调,接受一个任务返回值的参数. Defaults to None.
+            args (tuple, optional): 任务启动时的参数. Defaults to None.
+            kwargs (dict, optional): 任务启动时的关键字参数. Defaults to None.
+        """
+        if callback.__class__.__name__ == 'generator':
+            self.generator = callback(*args,**kwargs)  # 如果是生成器，保存生成器对象
+            self.callback = None
+        else:
+            self.generator = None
+            self.callback = callback   # 普通函数回调
+
+        self.period = period           # 任务的执行间隔（ms）
+        self.priority = priority       # 优先级，数值越小优先级越高
+        self.one_shot = one_shot       # 是否是单次任务
+        self.on_complete = on_complete # 任务完成执行的回调函数
+        self.args = args               # 任务启动时的参数
+        self.kwargs = kwargs           # 任务启动时的关键字参数
+        self.next_run = time.ticks_add(time.ticks_ms(), period)   # 下次运行时间,只用于查看,调度不比较它
+        self.rounds = 0                # 时间轮还需要转过的圈数
+        self.cancelled = False         # 是否已取消
+        self.wakeup = True             # 主循环空闲休眠时,是否需要按时唤醒来执行此任务
+
+    def cancel(self):
+        """取消任务,任务会在调度器下次经过它所在的槽时被移除"""
+        self.cancelled = True
+
+    def execute(self) -> bool:
+        """执行任务,任务是否需要继续执行。True表示继续,False表示结束"""
+        if self.generator:
+            try:
+                next(self.generator)  # 执行生成器的下一步
+                return True  # 生成器未完成，标记任务继续
+            except StopIteration as e:
+                result = e.value # 获取生成器的返回值
+                if self.on_complete: # 任务完成后执行回调
+                    self.on_complete(result)
+                return not self.one_shot  # 对于单次任务，标记结束；多次任务则标记继续
+        else: # 执行普通回调
+            result = self.callback(*self.args,**self.kwargs)
+            if self.on_complete:  # 单次任务完成后执行回调
+                self.on_complete(result)
+            return not self.one_shot  # 对于单次任务；标记结束；多次任务则标记继续
+
+def _priority(task):
+    return task.priority
+
+class TimerWheel:
+    """
+    时间轮调度器(hashed timing wheel),1个槽对应1ms
+    添加任务和取出到期任务都是O(1):
+        延迟为d的任务放入槽 (position+d) % slots, 并记录还需要转过的圈数 (d-1)//slots,
+        指针每前进1ms检查一个槽,圈数为0的任务到期,否则圈数减1.
+    长时间阻塞或lightsleep后一次推进很多毫秒时, 最多只走一圈, 每个槽按被跨过的次数一次性扣减圈数,
+    因此advance的开销不超过O(slots), 与经过的时间无关.
+    时间只通过 ticks_diff 计算经过的毫秒数推进指针,不比较ticks的绝对值,因此ticks回绕不影响调度.
+    """
+    __slots__ = ('slots', 'mask', 'shift', 'wheel', 'position', 'last_ms', 'ready', 'due', 'count')
+
+    def __init__(self, slots=64):
+        """
+        Args:
+            slots (int, optional): 槽的数量,必须是2的幂,大于常用任务周期时每个任务每圈只被检查一次. Defaults to 64.
+        """
+        if slots & (slots - 1):
+            raise ValueError('TimerWheel slots must be a power of 2')
+        self.slots = slots
+        self.mask = slots - 1
+        self.shift = 0 # log2(slots)
+        while (1 << self.shift) < slots:
+            self.shift += 1
+        self.wheel = [[] for _ in range(slots)]
+        self.position = 0 # 当前指针所在槽
+        self.last_ms = time.ticks_ms() # 指针对应的时间
+        self.ready = [] # 延迟为0, 下次run时立即执行的任务
+        self.due = [] # 本次run到期的任务, 复用同一个列表
+        self.count = 0 # 任务数量(含已取消但还没被移除的)
+
+    def add(self, task:Task, delay=None):
+        """添加任务, delay默认为task.period, 单位ms"""
+        if delay is None:
+            delay = task.period
+        # 指针可能落后于当前时间, 换算成相对于指针时间的延迟
+        return self._insert(task, delay + time.ticks_diff(time.ticks_ms(), self.last_ms))
+
+    def _insert(self, task:Task, delay):
+        """按相对于指针时间(last_ms)的延迟放入时间轮"""
+        self.count += 1
+        task.next_run = time.ticks_add(self.last_ms, delay)
+        if delay <= 0:
+            self.ready.append(task)
+            return task
+        task.rounds = (delay - 1) >> self.shift
+        self.wheel[(self.position + delay) & self.mask].append(task)
+        return task
+
+    def advance(self):
+        """把指针推进到当前时间, 把到期的任务按优先级放入self.due, 返回due"""
+        now = time.ticks_ms()
+        elapsed = time.ticks_diff(now, self.last_ms)
+        due = self.due
+        if self.ready:
+            self.count -= len(self.ready)
+            due.extend(self.ready)
+            self.ready.clear()
+        if elapsed > 0:
+            wheel, mask, shift, position = self.wheel, self.mask, self.shift, self.position
+            # 超过一圈时每个槽只检查一次, 第step步的槽在elapsed毫秒内被跨过 passes 次
+            for step in range(1, min(elapsed, self.slots) + 1):
+                slot = wheel[(position + step) & mask]
+                if not slot:
+                    continue
+                passes = ((elapsed - step) >> shift) + 1
+                for i in range(len(slot) - 1, -1, -1):
+                    task = slot[i]
+                    if task.cancelled:
+                        slot.pop(i)
+                        self.count -= 1
+                    elif task.rounds >= passes:
+                        task.rounds -= passes
+                    else:
+                        slot.pop(i)
+                        self.count -= 1
+                        due.append(task)
+            self.position = (position + elapsed) & mask
+            self.last_ms = now
+        if len(due) > 1:
+            due.sort(key=_priority)
+        return due
+
+    def run(self):
+        """执行所有到期任务, 周期任务执行完后重新加入时间轮"""
+        due = self.advance()
+        for task in due:
+            if task.cancelled:
+                continue
+            start = time.ticks_ms()
+            if task.execute(): # 执行任务,任务完成返回False，未完成返回True
+                # 考虑任务执行时间，避免任务堆积
+                execution_time = time.ticks_diff(time.ticks_ms(), start)
+                # 下次运行时间从本次开始执行的时间算起
+                self._insert(task, time.ticks_diff(start, self.last_ms) + max(task.period, execution_time))
+        # 只在任务全部执行后才清空, 避免任务中添加的任务被遗漏
+        due.clear()
+
+    def next_delay(self, wakeup_only=False):
+        """距离下一个任务到期的毫秒数,没有任务时返回-1
+
+        Args:
+            wakeup_only (bool, optional): 只考虑task.wakeup为True的任务. Defaults to False.
+        """
+        for task in self.ready:
+            if not (wakeup_only and not task.wakeup):
+                return 0
+        behind = time.ticks_diff(time.ticks_ms(), self.last_ms)
+        best = -1
+        wheel, mask, slots = self.wheel, self.mask, self.slots
+        for step in range(1, slots + 1):
+            if best != -1 and best <= step:
+                break
+            for task in wheel[(self.position + step) & mask]:
+                if task.cancelled or (wakeup_only and not task.wakeup):
+                    continue
+                delay = step + task.rounds * slots
+                if best == -1 or delay < best:
+                    best = delay
+        if best == -1:
+            return -1
+        return max(0, best - behind)
+
+    def clear(self):
+        """移除所有任务"""
+        for slot in self.wheel:
+            slot.clear()
+        self.ready.clear()
+        self.due.clear()
+        self.count = 0
@@ -1,11 +1,12 @@
 # ./core/style.py
-from .bitmap import Bitmap
+from .bitmap import Bitmap, native_color
 
 class Background:
     def __init__(self, color=None, pic=None):
         if color is None and pic is None:
             raise ValueError('Background 类初始化错误, color 和 pic 参数必须二选一')
         self.color = color
+        self.native_color = native_color(color) # 位图中保存的颜色, 赋值时转换一次
         self.pic = pic
 
 class Color:
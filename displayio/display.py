@@ -1,8 +1,14 @@
 # ./display.py
-from .core.bitmap import Bitmap
+from .core.bitmap import Bitmap, ArenaBitmap, native_color
 from .core.event import Event # type hint
 from .core.logging import logger
+from .core import dirty
 from .core.dirty import DirtySystem
+from .core.profiler import FrameProfiler, RingStats
+from .core.flusher import Flusher
+from .core.render_pool import RenderPool
+from .core.render_plan import RenderPlan
+from .core.display_list import DisplayList
 from .widget.widget import Widget
 from .container.container import Container # type hint
 from .input.base_input import Input # type hint
@@ -11,13 +17,15 @@ import time
 
 class Display:
     __slots__ = ('width', 'height', 'root', 'output', 'inputs',
-                 'soft_timer', 'fps', 'show_fps', 'partly_refresh', 'show_dirty_are',
-                 'loop')
+                 'soft_timer', 'fps', 'show_fps', 'partly_refresh', 'show_dirty_area',
+                 'flush_threshold', 'band_height', 'pipeline', 'render_workers', 'profile', 'idle_sleep', 'fast_input', 'dirty_system', 'loop')
 
     def __init__(self, log_level = logger.INFO, config_file:str=None,
                  width:int=0, height:int=0, root:Container=None, show_dirty_are:bool=False,
                  output=None, inputs=[], fps:int=0, soft_timer:bool=True,
-                 show_fps:bool=False, partly_refresh:bool=False):
+                 show_fps:bool=False, partly_refresh:bool=False, profile:int=0, idle_sleep:bool=False,
+                 fast_input:int=0, dirty_system=None, flush_threshold:int=0, band_height:int=0,
+                 pipeline:bool=False, render_workers:int=0):
         """显示器主程序
 
         Args:
@@ -30,6 +38,25 @@ class Display:
             soft_timer (bool, optional): 是否采用软件计时器调用输入设备检测. Defaults to True.
             show_fps (bool, optional): 是否print FPS 和 IPS(input per second). Defaults to False.
             partly_refresh (bool, optional): 是否开启局部刷新. Defaults to True.
+            flush_threshold (int, optional): 混合刷新, partly_refresh为False时生效. 保留全屏framebuffer,
+                每帧脏区域面积达到屏幕的flush_threshold%时整屏刷新, 否则只把脏区域逐个刷新到屏幕;
+                内存不足以分配framebuffer时退化为局部刷新. 0为关闭(每帧整屏刷新). Defaults to 0.
+            band_height (int, optional): 分带渲染, 大于0时每个脏区域按band_height行切分成条带, 逐条渲染,
+                局部刷新时逐条刷新, 渲染用的临时内存不超过 width*band_height*2 字节. 0为不切分. Defaults to 0.
+            pipeline (bool, optional): 局部刷新时使用双缓冲流水线, 一个缓冲区在刷新线程中传输的同时渲染下一个区域,
+                渲染内存加倍. 每帧最多节省渲染和刷新中较短的那部分时间, 传输远慢于渲染时几乎没有收益(见bench/pipeline.py).
+                需要 _thread, 不支持时退回同步刷新. Defaults to False.
+            render_workers (int, optional): 渲染线程数, 大于1时各个区域(分带渲染时为各个条带)分给多个线程并行渲染,
+                主线程按顺序刷新, 每个线程一个渲染缓冲区, 建议配合band_height使用. 开启后忽略pipeline.
+                小于MainLoop.POOL_MIN_PIXELS的条带仍在主线程渲染; 为1时等同于pipeline.
+                有GIL的平台(CPython, ESP32的MicroPython)上多个线程不能同时渲染, 收益不超过pipeline(见bench/workers.py).
+                widget的draw()仍在主线程中执行. 需要 _thread, 不支持时退回单线程渲染. Defaults to 0.
+            profile (int, optional): 分阶段性能统计保存的帧数,0为关闭,开启后通过display.loop.profiler查询. Defaults to 0.
+            idle_sleep (bool, optional): 没有脏区域和待处理输入时,主循环休眠(lightsleep)到下一个任务,由输入中断提前唤醒. Defaults to False.
+            fast_input (int, optional): 大于0时开启输入快速通道,输入事件立即触发一帧(两帧之间至少间隔fast_input ms),
+                并在display.loop.input_latency中记录每个事件从输入到刷新的延迟(ms). Defaults to 0.
+            dirty_system (type|str, optional): 全局脏区域系统的类或类名,例如GridSystem或'SweepRegionSystem',
+                None时使用widget默认创建的MergeRegionSystem. Defaults to None.
             config_file (str, optional): display实例初始化配置json文件的目录. Defaults to None.
         """
         logger.setLevel(log_level)
@@ -49,6 +76,22 @@ class Display:
         self.show_dirty_area = show_dirty_are
         # 局部刷新
         self.partly_refresh = partly_refresh
+        # 混合刷新的整屏刷新阈值(百分比)
+        self.flush_threshold = flush_threshold
+        # 分带渲染的条带高度
+        self.band_height = band_height
+        # 渲染/刷新流水线
+        self.pipeline = pipeline
+        # 渲染线程数
+        self.render_workers = render_workers
+        # 性能统计
+        self.profile = profile
+        # 空闲休眠
+        self.idle_sleep = idle_sleep
+        # 输入快速通道
+        self.fast_input = fast_input
+        # 全局脏区域系统
+        self.dirty_system = dirty_system
         # 设置文件
         if config_file is not None:
             import json
@@ -57,6 +100,9 @@ class Display:
             for key, value in config.items():
                 setattr(self, key, value)
             f.close()
+        # 在创建widget之前替换全局共享实例,之后创建的widget都会使用它
+        if self.dirty_system is not None:
+            self.dirty_system = self._new_dirty_system(self.dirty_system)
         # 创建事件循环
         self.loop = MainLoop(self)
         logger.debug("Display initialized.")
@@ -66,14 +112,34 @@ class Display:
         widget.resize(width=self.width, height=self.height, force=True)
         widget.width_resizable, widget.height_resizable = False, False
         self.root = widget
+        # 在Display之前创建的widget持有旧的默认实例,统一替换为指定的脏区域系统
+        if self.dirty_system is not None and widget.dirty_system is not self.dirty_system:
+            widget.set_dirty_system(self.dirty_system)
         # 传递root的dirty_system到事件循环
         self.loop.dirty_system=widget.dirty_system
         # 将root的dirty_system设置为全局共享实例
         DirtySystem._instances['default'] = widget.dirty_system
-        # 如果局部刷新,在root 部件创建一个全屏framebuff。
+        # 如果全局刷新,在root 部件创建一个全屏framebuff。
         if not self.partly_refresh:
             widget._bitmap = Bitmap(widget, transparent_color=widget.transparent_color)
-            widget._bitmap.init(dx=0, dy=0)
+            try:
+                widget._bitmap.init(dx=0, dy=0)
+            except MemoryError:
+                if not self.flush_threshold: # 全局刷新必须有framebuffer
+                    raise
+                # 混合刷新在内存不足时退化为局部刷新
+                logger.warning("内存不足以分配全屏framebuffer, 混合刷新退化为局部刷新")
+                widget._bitmap = None
+                self.partly_refresh = True
+
+    def _new_dirty_system(self, cls):
+        """创建指定类型的全局脏区域系统,并注册为默认实例"""
+        if isinstance(cls, str):
+            cls = getattr(dirty, cls)
+        DirtySystem._instances.pop('default', None)
+        system = cls()
+        system.set_screen(self.width, self.height)
+        return system
 
     def add_event(self, event:Event):
         """添加事件到事件循环"""
@@ -94,37 +160,95 @@ class Display:
 
 
 from collections import deque
-from heapq import heappush, heappop  # 用于优先级队列管理任务
+from .core.scheduler import Task, TimerWheel
 from machine import Timer # type: ignore
+try:
+    from machine import lightsleep # type: ignore
+except ImportError:
+    lightsleep = None
 from .utils.decorator import timeit
 import gc
 
 class MainLoop:
-    __slots__ = ('display', 'dirty_system', 'dirty_bitmap', 'running', 'event_queue', 'task_queue',
-                 'frame_interval', 'last_frame_time', 'frame_count', 'last_fps_time'
-                 'input_count', 'last_input_time', 'input_timer')
+    __slots__ = ('display', 'dirty_system', 'dirty_bitmap', 'running', 'event_queue', 'scheduler',
+                 'frame_interval', 'target_interval', 'frame_task', 'frame_overruns', 'frame_skips',
+                 'slow_frames', 'fast_frames', 'last_frame_time', 'frame_count', 'last_fps_time',
+                 'input_count', 'last_input_time', 'input_timer', 'profiler',
+                 'idle_us', 'busy_us', 'idle_sleeps', 'idle_wakeups', 'wake_pending',
+                 'fast_pending', 'input_latency', 'input_marks', 'full_flushes', 'rect_flushes', 'band_area', 'render_counters', 'render_plan', 'display_list',
+                 'flusher', 'back_bitmap', 'render_pool')
+
+    IDLE_MAX_MS = 1000 # 空闲休眠的最长时间
+    IDLE_POLL_MS = 20  # 有不支持中断唤醒的输入设备时,空闲休眠的最长时间(即空闲时的轮询间隔)
+    IDLE_MIN_MS = 3    # 短于此时间不进入lightsleep
+    MIN_FPS = 5        # 自适应帧率的下限
+    EVENT_QUEUE_SIZE = 10 # 事件队列长度, 满时丢弃最早的事件(帧率很低而输入很快时)
+    ADAPT_FRAMES = 5   # 连续超时或连续富余多少帧后调整帧间隔
+    POOL_MIN_PIXELS = 8192 # 多线程渲染时, 小于这个像素数的条带直接在主线程渲染, 交给渲染线程的开销比渲染本身还大
 
     """事件循环类，管理布局、渲染和事件处理"""
     def __init__(self, display:Display):
         self.display = display
         # 脏区域全局共享实例
         self.dirty_system:DirtySystem = None
-        self.dirty_bitmap = Bitmap()
+        # 渲染脏区域用的临时位图, 按整屏(分带渲染时为一个条带)预分配, 渲染时不再分配内存
+        self.dirty_bitmap = ArenaBitmap(display.width * (display.band_height or display.height) * 2)
+        self.band_area = [0, 0, 0, 0, 0] # 当前条带的区域和所属脏区域的序号, 复用同一个列表
+        self.render_counters = [0, 0] # 汇总渲染线程统计值 [painted, culled] 用的列表
+        # 显示列表, 布局或者可见性改变后从widget树重新编译, 在帧之间保留
+        self.display_list = DisplayList()
+        # 渲染计划, 每帧从显示列表为各个脏区域筛选绘制列表
+        self.render_plan = RenderPlan()
+        # 渲染/刷新流水线: 刷新线程和第二个渲染缓冲区, dirty_bitmap刷新时在back_bitmap中渲染下一个区域
+        self.flusher = None
+        self.back_bitmap = None
+        # 多线程渲染池, 由渲染线程渲染, 主线程只负责按顺序刷新
+        # 只有1个渲染线程时主线程取回结果后才能提交下一个区域, 渲染和刷新无法重叠, 改用流水线
+        self.render_pool = None
+        if display.render_workers > 1:
+            if RenderPool.available:
+                self.render_pool = RenderPool(self._render_area, display.render_workers, len(self.dirty_bitmap.arena))
+            else:
+                logger.warning("没有_thread, 多线程渲染退回单线程渲染")
+        if (display.pipeline or display.render_workers == 1) and self.render_pool is None:
+            if Flusher.available:
+                self.flusher = Flusher(display.output, depth=2) # dirty_bitmap和back_bitmap轮流渲染
+                self.back_bitmap = ArenaBitmap(len(self.dirty_bitmap.arena))
+            else:
+                logger.warning("没有_thread, 渲染/刷新流水线退回同步刷新")
         # 标记是否运行
         self.running = False
-        # 事件队列，最多存10个事件
-        self.event_queue = deque([],10,1)
-        # 优先级队列存储任务
-        self.task_queue = []
+        # 事件队列，最多存EVENT_QUEUE_SIZE个事件
+        self.event_queue = deque([],self.EVENT_QUEUE_SIZE,1)
+        # 时间轮调度器存储任务
+        self.scheduler = TimerWheel()
 
         #FPS相关计算移到独立方法
         self._init_fps_settings()
         # 输入检测相关初始化移到独立方法
         self._init_input_settings()
+        # 分阶段性能统计,默认关闭
+        self.profiler = FrameProfiler(self.display.profile) if self.display.profile > 0 else None
+        # 空闲/忙碌时间统计
+        self.reset_idle_stats()
+        self.wake_pending = False # 空闲休眠期间输入中断是否触发过
+        # 输入快速通道
+        self.fast_pending = False # 是否已经安排了快速帧
+        self.input_latency = RingStats() if self.display.fast_input > 0 else None # 输入到刷新的延迟
+        self.input_marks = [] # 本帧处理的输入事件的时间戳
+        # 混合刷新: 整屏刷新和逐个脏区域刷新的帧数
+        self.full_flushes = 0
+        self.rect_flushes = 0
 
     def _init_fps_settings(self):
         """初始化FPS相关设置"""
         self.frame_interval = 1000 // self.display.fps if self.display.fps > 0 else 1
+        self.target_interval = self.frame_interval # 目标帧间隔,frame_interval会因为超时临时变大
+        self.frame_task = None
+        self.frame_overruns = 0 # 超时帧数
+        self.frame_skips = 0 # 因为超时跳过的帧数
+        self.slow_frames = 0 # 连续超时帧数
+        self.fast_frames = 0 # 连续富余帧数
         self.last_frame_time = time.ticks_ms()
         self.frame_count = 0
         self.last_fps_time = time.ticks_ms()
@@ -141,25 +265,61 @@ class MainLoop:
         self.running = False
         if not self.display.soft_timer:
             self.input_timer.deinit()
+        if self.flusher is not None:
+            self.flusher.stop()
+        if self.render_pool is not None:
+            self.render_pool.stop()
+
+    def reset_idle_stats(self):
+        """清空空闲/忙碌时间统计"""
+        self.idle_us = 0     # 休眠的总时间
+        self.busy_us = 0     # 执行任务的总时间
+        self.idle_sleeps = 0 # 进入空闲休眠的次数
+        self.idle_wakeups = 0 # 其中被输入中断提前唤醒的次数, 其余是到时唤醒
+
+    def idle_stats(self) -> dict:
+        """返回空闲/忙碌时间统计,单位ms"""
+        total = self.idle_us + self.busy_us
+        return {'idle_ms': self.idle_us // 1000, 'busy_ms': self.busy_us // 1000,
+                'busy_ratio': self.busy_us / total if total else 0.0, 'idle_sleeps': self.idle_sleeps,
+                'idle_wakeups': self.idle_wakeups}
 
     def _post_event(self, event:Event=None):
         """添加事件到队列"""
         if event is not None:
+            if not event.timestamp:
+                event.timestamp = time.ticks_ms()
+            if len(self.event_queue) >= self.EVENT_QUEUE_SIZE:
+                # 队列满(例如编码器快速旋转)时丢弃最早的事件, 不让输入任务抛出IndexError终止主循环
+                self.event_queue.popleft()
             self.event_queue.append(event)
+            if self.display.fast_input > 0 and not self.fast_pending:
+                self._schedule_fast_frame()
 
         # 新增：输入计数和IPS计算
         if self.display.show_fps:
             self._calculate_ips()
 
     def process_event(self):
-        """处理待处理事件"""
+        """处理待处理事件,在帧任务中直接冒泡,使本帧的布局和绘制能看到事件的结果"""
         while self.event_queue:
             event = self.event_queue.popleft()
             logger.debug(f"Processing event: {event.type}")
+            if self.input_latency is not None:
+                self.input_marks.append(event.timestamp)
             if event.target_widget: # 有目标widget,则在目标widget开始冒泡
-                self.add_task(event.target_widget.bubble,one_shot=True,args=(event,))
+                self._bubble_event(event.target_widget, event)
             else:
-                self.add_task(self.display.root.bubble,one_shot=True,args=(event,))
+                self._bubble_event(self.display.root, event)
+
+    def _bubble_event(self, widget, event:Event):
+        """从widget开始冒泡事件,开启性能统计时计入当前帧的event耗时"""
+        if self.profiler is None:
+            widget.bubble(event)
+        else:
+            start = time.ticks_us()
+            widget.bubble(event)
+            self.profiler.lap(FrameProfiler.EVENT, start)
 
     def _hardware_check_input(self, *args):
         # 如果采用硬件定时器,此函数需要接受一个timer的实例作为参数,如果采用软件定时器,则不需要.
@@ -179,46 +339,161 @@ class MainLoop:
             self.input_count = 0
             self.last_input_time = current_time
 
+    def update_frame(self):
+        """帧任务,在一帧内按顺序执行 事件 → 布局 → 绘制 → 渲染 → 刷新"""
+        start = time.ticks_ms()
+        # 恢复上一帧超时时为跳帧临时加长的周期
+        self.frame_task.period = self.frame_interval
+        self._run_frame(start)
+        if self.display.fps > 0:
+            self._pace_frame(time.ticks_diff(time.ticks_ms(), start))
+
+    def _run_frame(self, start):
+        """事件 → 布局 → 绘制 → 渲染 → 刷新"""
+        self.last_frame_time = start
+        self.process_event()
+        self.update_layout()
+        flushed = self.update_display()
+        if self.input_marks:
+            if flushed: # 只统计引起刷新的输入
+                now = time.ticks_ms()
+                for timestamp in self.input_marks:
+                    self.input_latency.add(time.ticks_diff(now, timestamp))
+            self.input_marks.clear()
+
+    def _schedule_fast_frame(self):
+        """输入快速通道: 不等待帧周期,尽快执行一帧,与上一帧至少间隔fast_input ms"""
+        self.fast_pending = True
+        delay = self.display.fast_input - time.ticks_diff(time.ticks_ms(), self.last_frame_time)
+        self.add_task(self._fast_frame, period=max(0, delay), priority=8, one_shot=True)
+
+    def _fast_frame(self):
+        """快速帧,局部刷新时只渲染输入引起的脏区域"""
+        self.fast_pending = False
+        if self.event_queue:
+            self._run_frame(time.ticks_ms())
+
+    def _pace_frame(self, elapsed):
+        """帧率自适应
+        超时的帧不补帧,直接跳到下一个帧边界; 连续超时时降低帧率, 连续富余时逐步恢复到目标帧率.
+        """
+        interval = self.frame_interval
+        if elapsed > interval:
+            skipped = elapsed // interval
+            self.frame_overruns += 1
+            self.frame_skips += skipped
+            self.fast_frames = 0
+            self.slow_frames += 1
+            if self.slow_frames >= self.ADAPT_FRAMES:
+                self.slow_frames = 0
+                new_interval = min(elapsed + elapsed // 4, 1000 // self.MIN_FPS)
+                if new_interval > interval:
+                    logger.warning(f"帧超时: {elapsed}ms > {interval}ms, 帧率降为 {1000 // new_interval}")
+                    self.frame_interval = interval = new_interval
+            # 下一帧对齐到帧边界,中间被占用的帧直接跳过
+            self.frame_task.period = (skipped + 1) * interval
+        else:
+            self.slow_frames = 0
+            if interval > self.target_interval and elapsed < interval // 2:
+                self.fast_frames += 1
+                if self.fast_frames >= self.ADAPT_FRAMES:
+                    self.fast_frames = 0
+                    self.frame_interval = max(self.target_interval, interval - interval // 4)
+                    self.frame_task.period = self.frame_interval
+                    logger.debug(f"帧率恢复为 {1000 // self.frame_interval}")
+
+    def frame_stats(self) -> dict:
+        """返回帧率自适应的统计"""
+        return {'target_fps': self.display.fps, 'fps': 1000 // self.frame_interval if self.display.fps > 0 else 0,
+                'overruns': self.frame_overruns, 'skipped': self.frame_skips,
+                'full_flushes': self.full_flushes, 'rect_flushes': self.rect_flushes}
+
     def update_layout(self):
         """更新布局.在这一步,Widget会被添加进脏系统的dirty_widget"""
-        for system in self.dirty_system._instances.values():
+        if self.profiler is not None:
+            start = time.ticks_us()
+            self._update_layout()
+            self.profiler.lap(FrameProfiler.LAYOUT, start)
+        else:
+            self._update_layout()
+
+    def _update_layout(self):
+        # 先从根节点布局
+        system = self.dirty_system
+        if system.layout_dirty:
+            logger.debug(f"Updating {system.name} layout...")
+            self.display.root.layout(dx=0, dy=0, width=self.display.width, height=self.display.height)
+            system.layout_dirty = False
+        # 再处理布局变脏的独立脏系统(例如scroll_box),布局过程中新登记的也在本次处理
+        queue = DirtySystem._layout_queue
+        i = 0
+        while i < len(queue):
+            system = queue[i]
+            i += 1
             if system.layout_dirty:
                 logger.debug(f"Updating {system.name} layout...")
-                if system.name == 'default':
-                    self.display.root.layout(dx=0, dy=0, width=self.display.width, height=self.display.height)
-                else:
-                    widget = system.widget
-                    widget.layout(dx=widget.dx, dy=widget.dy, width=widget.width, height=widget.height)
+                widget = system.widget
+                widget.layout(dx=widget.dx, dy=widget.dy, width=widget.width, height=widget.height)
                 system.layout_dirty = False
+        queue.clear()
 
-    def _render_widget(self, widget:Container|Widget, area):
-        """ 递归渲染widget及其子组件,任何具有get_bitmap的组件将被视为组件树的末端"""
-        if widget.widget_in_dirty_area(area):
-            if hasattr(widget, 'get_bitmap'): # 叶子widget
-                bitmap = widget.get_bitmap()
-                self.dirty_bitmap.blit(bitmap, dx=bitmap.dx-area[0], dy=bitmap.dy-area[1])
-            else: # 容器节点
-                if widget.background.color is not None:
-                    self.dirty_bitmap.fill(widget.background.color)
-                else:
-                    self.dirty_bitmap.blit(bitmap, dx=bitmap.dx, dy=bitmap.dy)
-                    raise ValueError
-                for child in widget.children:
-                    self._render_widget(child, area)
-
-    def update_display(self):
-        """更新显示
+    def _render_area(self, target:ArenaBitmap, area, counters=None):
+        """按渲染计划把area区域渲染到target, area[4]为所属脏区域的序号
+        只读取渲染计划, 统计值写入counters(渲染线程自己的列表), 可以在渲染线程中执行
+        """
+        target.init(dx=area[0], dy=area[1], width=area[2]-area[0]+1, height=area[3]-area[1]+1)
+        self.render_plan.render(target, area[4], area[0], area[1], counters)
+
+    def _take_band(self, profiler, start):
+        """取回渲染池中最早提交的区域并输出(局部刷新时刷新到屏幕, 否则写入framebuffer), 返回新的计时起点"""
+        bitmap = self.render_pool.take()
+        if profiler is not None: # 统计的是等待渲染线程的时间
+            start = profiler.lap(FrameProfiler.RENDER, start)
+        if self.display.partly_refresh:
+            self.display.output.refresh(bitmap.buffer, dx=bitmap.dx, dy=bitmap.dy, width=bitmap.width, height=bitmap.height)
+            if profiler is not None:
+                start = profiler.lap(FrameProfiler.FLUSH, start)
+        else:
+            self.display.root._bitmap.blit(bitmap, dx=bitmap.dx, dy=bitmap.dy)
+            if profiler is not None:
+                start = profiler.lap(FrameProfiler.RENDER, start)
+        return start
+
+    def _draw_dirty_widgets(self):
+        """重绘脏widget的bitmap,并清空dirty_widget"""
+        for dirty_widget in self.dirty_system.dirty_widget:
+            if hasattr(dirty_widget, 'draw'):
+                dirty_widget.draw()
+        self.dirty_system.clear_widget()
+
+    def _flush_rect(self, dx, dy, width, height):
+        """把全屏framebuffer中的一个区域刷新到屏幕,区域先裁剪到屏幕范围内"""
+        screen_width, screen_height = self.display.width, self.display.height
+        x0, y0 = max(dx, 0), max(dy, 0)
+        x1, y1 = min(dx + width, screen_width), min(dy + height, screen_height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.display.output.refresh(self.display.root._bitmap.buffer, dx=x0, dy=y0, width=x1-x0, height=y1-y0,
+                                    stride=screen_width, sx=x0, sy=y0)
+
+    def update_display(self) -> bool:
+        """更新显示,有刷新时返回True
         绘制系统解释：
             每个独立绘制系统(update_display类似方法)只绘制自己的脏系统的dirty_widget,
                 需要保留独立绘制系统的(例如scroll_box)需要实现自己的绘制方法(scroll_box.update_child_bitamp).
                 同时,独立的绘制系统也只处理自己独立的脏系统的dirty_widget绘制
         """
+        flushed = False
         if self.dirty_system.dirty: # 如果有脏区域则出发刷新
+            profiler = self.profiler
+            start = 0
+            if profiler is not None:
+                allocs = ArenaBitmap.allocs + Bitmap.view_allocs
+                start = time.ticks_us()
             # 先重绘 脏widget的bitmap
-            for dirty_widget in self.dirty_system.dirty_widget:
-                if hasattr(dirty_widget, 'draw'):
-                    dirty_widget.draw()
-            self.dirty_system.clear_widget()
+            self._draw_dirty_widgets()
+            if profiler is not None:
+                start = profiler.lap(FrameProfiler.DRAW, start)
 
             # 如果显示脏区域
             if self.display.show_dirty_area:
@@ -228,31 +503,110 @@ class MainLoop:
                     if self.display.partly_refresh: # 如果局部刷新
                         self.display.output.fill_rect(dx,dy,width,height,0xf81f)
                     else: # 如果全局刷新
-                        self.display.root._bitmap.fill_rect(dx,dy,width,height,0xf81f)
+                        self.display.root._bitmap.fill_rect(dx,dy,width,height,native_color(0xf81f))
                 if not self.display.partly_refresh: # 全局刷新
                     self.display.output.refresh(self.display.root._bitmap.buffer, dx=0, dy=0, width=self.display.width, height=self.display.height)
                 time.sleep_ms(500)
+                if profiler is not None: # 不统计调试用的等待时间
+                    start = time.ticks_us()
+
+            # 全局刷新时决定本帧是否整屏刷新, 混合刷新只在脏区域面积达到阈值时整屏刷新
+            full_flush = not self.display.partly_refresh
+            if full_flush and self.display.flush_threshold > 0:
+                pixels = 0
+                for dirty_area in self.dirty_system.area:
+                    pixels += (dirty_area[2] - dirty_area[0] + 1) * (dirty_area[3] - dirty_area[1] + 1)
+                full_flush = pixels * 100 >= self.display.flush_threshold * self.display.width * self.display.height
+                if full_flush:
+                    self.full_flushes += 1
+                else:
+                    self.rect_flushes += 1
 
             # 绘制和刷新
+            band_height = self.display.band_height
+            band = self.band_area
+            pool = self.render_pool
+            # 需要时重新编译显示列表, 再为所有脏区域筛选绘制列表
+            if self.dirty_system.display_list_dirty or self.display_list.root is not self.display.root:
+                self.display_list.build(self.display.root)
+                self.dirty_system.display_list_dirty = False
+            self.render_plan.build(self.display_list, self.dirty_system.area)
+            index = -1
             for dirty_area in self.dirty_system.area:
-                # 先初始化dirty_bitmap
+                index += 1
                 dx, dy = dirty_area[0], dirty_area[1]
                 width, height = dirty_area[2]-dx+1, dirty_area[3]-dy+1
-                self.dirty_bitmap.init(dx=dx, dy=dy, width=width, height=height)
-                self._render_widget(self.display.root, dirty_area)
-                if self.display.partly_refresh: # 如果局部刷新
-                    self.display.output.refresh(self.dirty_bitmap.buffer, dx=dx, dy=dy, width=width, height=height)
-                else:
-                    self.display.root._bitmap.blit(self.dirty_bitmap, dx=self.dirty_bitmap.dx, dy=self.dirty_bitmap.dy)
-            if not self.display.partly_refresh: # 如果全局刷新
+                # 分带渲染: 按band_height行切分成条带逐条渲染, 不切分时整个区域就是一个条带
+                top = dy
+                while top <= dirty_area[3]:
+                    rows = height if band_height <= 0 else min(band_height, dirty_area[3] - top + 1)
+                    if pool is not None:
+                        if width * rows >= self.POOL_MIN_PIXELS: # 多线程渲染: 所有线程都忙时先按顺序取回并输出最早的区域
+                            if pool.full:
+                                start = self._take_band(profiler, start)
+                            pool.submit(dx, top, dirty_area[2], top + rows - 1, index)
+                            top += rows
+                            continue
+                        while pool.busy: # 小条带在主线程渲染, 先输出之前提交的区域, 保持刷新顺序
+                            start = self._take_band(profiler, start)
+                    band[0], band[1], band[2], band[3], band[4] = dx, top, dirty_area[2], top + rows - 1, index
+                    self._render_area(self.dirty_bitmap, band)
+                    if self.display.partly_refresh: # 如果局部刷新, 每个条带渲染完立即刷新
+                        if profiler is not None:
+                            start = profiler.lap(FrameProfiler.RENDER, start)
+                        if self.flusher is not None: # 流水线: 交给刷新线程, 换另一个缓冲区渲染下一个区域
+                            self.flusher.submit(self.dirty_bitmap.buffer, dx, top, width, rows)
+                            self.dirty_bitmap, self.back_bitmap = self.back_bitmap, self.dirty_bitmap
+                        else:
+                            self.display.output.refresh(self.dirty_bitmap.buffer, dx=dx, dy=top, width=width, height=rows)
+                        if profiler is not None: # 流水线时统计的是等待上一次刷新完成的时间
+                            start = profiler.lap(FrameProfiler.FLUSH, start)
+                    else:
+                        self.display.root._bitmap.blit(self.dirty_bitmap, dx=self.dirty_bitmap.dx, dy=self.dirty_bitmap.dy)
+                        if profiler is not None:
+                            start = profiler.lap(FrameProfiler.RENDER, start)
+                    top += rows
+                if not self.display.partly_refresh and not full_flush: # 混合刷新, 整个区域渲染完后直接从framebuffer中刷新
+                    while pool is not None and pool.busy:
+                        start = self._take_band(profiler, start)
+                    self._flush_rect(dx, dy, width, height)
+                    if profiler is not None:
+                        start = profiler.lap(FrameProfiler.FLUSH, start)
+                if profiler is not None:
+                    profiler.add(FrameProfiler.RECTS, 1)
+                    profiler.add(FrameProfiler.PIXELS, width * height)
+            if pool is not None:
+                while pool.busy: # 取回并输出剩余的区域
+                    start = self._take_band(profiler, start)
+                counters = self.render_counters
+                pool.gather(counters) # 渲染线程都已空闲, 汇总各线程的统计值
+                self.render_plan.merge(counters)
+                counters[0] = counters[1] = 0
+            if self.flusher is not None: # 等待最后一个区域刷新完成, 帧结束时屏幕内容是完整的
+                self.flusher.wait()
+                if profiler is not None:
+                    start = profiler.lap(FrameProfiler.FLUSH, start)
+            if full_flush: # 如果整屏刷新
                 self.display.output.refresh(self.display.root._bitmap.buffer, dx=0, dy=0, width=self.display.width, height=self.display.height)
+                if profiler is not None:
+                    profiler.lap(FrameProfiler.FLUSH, start)
+            if profiler is not None:
+                self.dirty_system.profile(profiler)
+                profiler.add(FrameProfiler.ALLOCS, ArenaBitmap.allocs + Bitmap.view_allocs - allocs)
+                profiler.add(FrameProfiler.PAINTED, self.render_plan.painted)
+                profiler.add(FrameProfiler.CULLED, self.render_plan.culled)
+                profiler.commit()
 
             # 绘制刷新完后，清除脏区域
             self.dirty_system.clear()
+            flushed = True
+        elif self.profiler is not None: # 没有刷新的帧不记录, 它的event/layout耗时也不计入下一帧
+            self.profiler.discard()
 
         # 帧数计数和FPS计算
         if self.display.show_fps:
             self._calculate_fps()
+        return flushed
 
     def _calculate_fps(self):
         """计算并打印每秒帧数"""
@@ -267,10 +621,10 @@ class MainLoop:
             self.frame_count = 0
             self.last_fps_time = current_time
 
-    def add_task(self, callback, period=0, priority=10, one_shot=False, on_complete=None, args=(), kwargs={}):
-        """添加一个新任务"""
+    def add_task(self, callback, period=0, priority=10, one_shot=False, on_complete=None, args=(), kwargs={}) -> Task:
+        """添加一个新任务,返回的任务可以调用task.cancel()取消"""
         task = Task(callback, period, priority, one_shot, on_complete, args, kwargs)
-        heappush(self.task_queue, task)
+        return self.scheduler.add(task)
 
     def run(self,func:function):
         """运行调度器"""
@@ -294,90 +648,82 @@ class MainLoop:
         self.add_task(func, one_shot=True)
         # 添加垃圾收集任务
         self.add_task(gc.collect, period=10000)
+        # 以下任务在空闲时没有工作可做,空闲休眠不需要为它们按时唤醒
+        core_tasks = []
         # 添加输入检测任务
         if self.display.soft_timer:
             for device in self.display.inputs:
-                self.add_task(device.check_input, period=2, priority=1, on_complete=self._post_event)
+                core_tasks.append(self.add_task(device.check_input, period=2, priority=1, on_complete=self._post_event))
 
         # 添加核心任务
-        # 添加事件冒泡 
-        self.add_task(self.process_event, period=10)
-        # 添加布局系统
-        self.add_task(self.update_layout, period=self.frame_interval, priority=9)
-        # 添加刷新系统
-        self.add_task(self.update_display, period=self.frame_interval, priority=10)
+        # 帧任务: 事件冒泡 → 布局 → 绘制 → 渲染 → 刷新
+        self.frame_task = self.add_task(self.update_frame, period=self.frame_interval, priority=9)
+        core_tasks.append(self.frame_task)
+        for task in core_tasks:
+            task.wakeup = False
 
     def _main_loop(self):
         """主循环实现"""
+        scheduler = self.scheduler
         while self.running:
-            current_time = time.ticks_ms() # 获取当前时间
-            task = self.task_queue[0] # 查看队列中的最高优先级任务
-            time_to_next_run = time.ticks_diff(task.next_run, current_time) # 计算距离下次运行的时间
-            if time_to_next_run > 0:
-                # 距离下一次运行还有时间，动态休眠
-                time.sleep_ms(min(time_to_next_run, 1)) # 最多休眠1ms
+            start = time.ticks_us()
+            # 执行所有到期任务
+            scheduler.run()
+            now = time.ticks_us()
+            self.busy_us += time.ticks_diff(now, start)
+            if scheduler.ready:
                 continue
-            # 移除任务并执行
-            heappop(self.task_queue)
-            if task.execute():  # 执行任务,任务完成返回False，未完成返回True
-                # 考虑任务执行时间，避免任务堆积
-                execution_time = time.ticks_diff(time.ticks_ms(), current_time)
-                # 更新下次运行时间
-                task.next_run = time.ticks_add(current_time, max(task.period, execution_time))
-                heappush(self.task_queue, task)  # 重新放入队列
-
-class Task:
-    """表示一个任务"""
-    __slots__ = ('generator', 'callback', 'period', 'priority', 'one_shot', 'on_complete', 'args', 'kwargs', 'next_run')
-
-    def __init__(self, callback,
-                 period=0, priority=10,
-                 one_shot=False, on_complete=None,
-                 args=(), kwargs={}):
-        """
-        Args:
-            callback (function): 任务回调
-            period (int, optional): 任务调用间隔,单位ms. Defaults to 0.
-            priority (int, optional): 任务优先级. Defaults to 10.
-            one_shot (bool, optional): 标记任务是否为单次任务. Defaults to False.
-            on_complete (_type_, optional): 任务回调执行完毕执行的回调,接受一个任务返回值的参数. Defaults to None.
-            args (tuple, optional): 任务启动时的参数. Defaults to None.
-            kwargs (dict, optional): 任务启动时的关键字参数. Defaults to None.
+            if self.display.idle_sleep and self._is_idle():
+                # 空闲，休眠到下一个需要按时执行的任务
+                if self._idle(scheduler.next_delay(wakeup_only=True)) and self.display.soft_timer:
+                    # 被输入唤醒, 立即轮询一次输入设备, 不等下一次输入任务
+                    for device in self.display.inputs:
+                        self._post_event(device.check_input())
+            else:
+                # 没有立即要执行的任务，动态休眠
+                time.sleep_ms(1) # 最多休眠1ms,即时间轮的一格
+            self.idle_us += time.ticks_diff(time.ticks_us(), now)
+
+    def _is_idle(self) -> bool:
+        """没有待处理事件,没有脏区域和脏布局,输入设备都处于空闲状态"""
+        system = self.dirty_system
+        if self.event_queue or system is None or system.dirty:
+            return False
+        if system.layout_dirty or system.dirty_widget or DirtySystem._layout_queue:
+            return False
+        for device in self.display.inputs:
+            if device.state != device.IDLE:
+                return False
+        return True
+
+    def _idle(self, delay) -> bool:
+        """空闲休眠delay毫秒,有输入时由引脚中断提前唤醒
+        Returns:
+            bool: 是否被输入唤醒, False表示休眠到时
         """
-        if callback.__class__.__name__ == 'generator':
-            self.generator = callback(*args,**kwargs)  # 如果是生成器，保存生成器对象
-            self.callback = None
+        if delay < 0 or delay > self.IDLE_MAX_MS:
+            delay = self.IDLE_MAX_MS
+        inputs = self.display.inputs
+        self.wake_pending = False
+        for device in inputs:
+            if not device.arm_wakeup(self._wakeup):
+                delay = min(delay, self.IDLE_POLL_MS)
+        self.idle_sleeps += 1
+        if delay < self.IDLE_MIN_MS or lightsleep is None:
+            time.sleep_ms(max(delay, 1))
+            early = False
         else:
-            self.generator = None
-            self.callback = callback   # 普通函数回调
-
-        self.period = period           # 任务的执行间隔（ms）
-        self.priority = priority       # 优先级，数值越小优先级越高
-        self.one_shot = one_shot       # 是否是单次任务
-        self.on_complete = on_complete # 任务完成执行的回调函数
-        self.args = args               # 任务启动时的参数
-        self.kwargs = kwargs           # 任务启动时的关键字参数
-        self.next_run = time.ticks_add(time.ticks_ms(), period)   # 下次运行时间
-
-    def __lt__(self, other):
-        """比较任务，优先按时间排序；时间相同时按优先级排序。"""
-        if self.next_run == other.next_run:
-            return self.priority < other.priority
-        return self.next_run < other.next_run
-
-    def execute(self) -> bool:
-        """执行任务,任务是否需要继续执行。True表示继续,False表示结束"""
-        if self.generator:
-            try:
-                next(self.generator)  # 执行生成器的下一步
-                return True  # 生成器未完成，标记任务继续
-            except StopIteration as e:
-                result = e.value # 获取生成器的返回值
-                if self.on_complete: # 任务完成后执行回调
-                    self.on_complete(result)
-                return not self.one_shot  # 对于单次任务，标记结束；多次任务则标记继续
-        else: # 执行普通回调
-            result = self.callback(*self.args,**self.kwargs)
-            if self.on_complete:  # 单次任务完成后执行回调
-                self.on_complete(result)
-            return not self.one_shot  # 对于单次任务；标记结束；多次任务则标记继续
+            start = time.ticks_ms()
+            lightsleep(delay)
+            # esp32的电平唤醒(Pin.WAKE_LOW/WAKE_HIGH)不调用中断处理函数, 提前醒来也算作输入唤醒
+            early = time.ticks_diff(time.ticks_ms(), start) + 1 < delay
+        for device in inputs:
+            device.disarm_wakeup()
+        woken = self.wake_pending or early
+        if woken:
+            self.idle_wakeups += 1
+        return woken
+
+    def _wakeup(self, pin):
+        """输入设备的唤醒中断,只记录唤醒,输入由随后的轮询读取"""
+        self.wake_pending = True
@@ -1,5 +1,7 @@
 # ./input/base_input.py
 from ..core.event import EventType
+from machine import Pin # type: ignore
+import machine # type: ignore
 
 class Input(EventType):
     """
@@ -38,3 +40,24 @@ class Input(EventType):
         """动态设置事件类型"""
         self.event_map.setdefault(source_type, target_type)
 
+    def arm_wakeup(self, handler) -> bool:
+        """主循环空闲休眠前调用,让设备在有输入时通过引脚中断唤醒休眠.
+        返回False表示设备不支持中断唤醒,主循环空闲时仍需定期轮询它.
+        """
+        return False
+
+    def disarm_wakeup(self):
+        """主循环从空闲休眠中醒来后调用,取消arm_wakeup设置的引脚中断"""
+        pass
+
+
+def arm_pin_wakeup(pin, level, handler):
+    """引脚电平变为level时触发handler并唤醒lightsleep
+    esp32 的 lightsleep 只能由电平唤醒(Pin.WAKE_LOW/WAKE_HIGH), 其他平台使用边沿中断
+    """
+    wake_level = getattr(Pin, 'WAKE_LOW' if level == 0 else 'WAKE_HIGH', None)
+    sleep_mode = getattr(machine, 'SLEEP', None)
+    if wake_level is not None and sleep_mode is not None:
+        pin.irq(handler=handler, trigger=wake_level, wake=sleep_mode)
+    else:
+        pin.irq(handler=handler, trigger=Pin.IRQ_FALLING if level == 0 else Pin.IRQ_RISING)
@@ -1,6 +1,6 @@
 from machine import Pin # type: ignore
 import time
-from .base_input import Input
+from .base_input import Input, arm_pin_wakeup
 from ..core.event import Event
 
 class RotaryEncoder(Input):
@@ -48,6 +48,14 @@ class RotaryEncoder(Input):
         self.tick_position = 0 # tick的计数器
         self.direction = 0  # -1: 逆时针, 1: 顺时针, 0: 无变化
         
+    def arm_wakeup(self, handler) -> bool:
+        """A相电平变化(开始旋转)时唤醒"""
+        arm_pin_wakeup(self.pin_a, 1 - self.pin_a.value(), handler)
+        return True
+
+    def disarm_wakeup(self):
+        self.pin_a.irq(handler=None)
+
     def check_input(self):
         """
         检测旋转编码器状态
@@ -1,6 +1,6 @@
 from machine import Pin # type: ignore
 import time
-from .base_input import Input
+from .base_input import Input, arm_pin_wakeup
 from ..core.event import Event
 
 class Switch(Input):
@@ -26,6 +26,14 @@ class Switch(Input):
         # 双击时间间隔
         self.double_click_max_interval = 250  # 上一次释放和下一次开始。点击最大间隔：250ms
 
+    def arm_wakeup(self, handler) -> bool:
+        """按下时唤醒"""
+        arm_pin_wakeup(self.pin, self.threshold, handler)
+        return True
+
+    def disarm_wakeup(self):
+        self.pin.irq(handler=None)
+
     def check_input(self):
         # 非阻塞的触摸状态机
         touch_value = self.pin.value()
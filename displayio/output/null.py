@@ -0,0 +1,117 @@
+# ./output/null.py
+import time
+
+class NullOutput:
+    """
+    空输出驱动, 接口与 ST7789 相同(init/fill/fill_rect/refresh),
+    不连接任何屏幕, 只统计刷新次数和写出的字节数.
+    可在主机端或设备上脱离屏幕测量渲染管线的性能.
+    给出bus_hz时模拟慢速总线: 每次刷新按字节数和总线频率sleep相应的时间(加上window_us的窗口设置开销),
+    sleep期间不占用CPU, 可以用来测量渲染和刷新的流水线效果.
+    """
+    __slots__ = ('width', 'height', 'refresh_count', 'bytes_flushed', 'pixels_flushed', 'bus_hz', 'window_us')
+
+    def __init__(self, width=240, height=240, bus_hz=0, window_us=0):
+        """
+        Args:
+            bus_hz (int, optional): 模拟的总线频率(bit/s), 0为不模拟. Defaults to 0.
+            window_us (int, optional): 模拟总线时每次刷新窗口的固定开销(us). Defaults to 0.
+        """
+        self.width = width
+        self.height = height
+        self.bus_hz = bus_hz
+        self.window_us = window_us
+        self.reset_stats()
+
+    def _transfer(self, size):
+        """模拟传输size字节的耗时"""
+        if self.bus_hz:
+            time.sleep_us(self.window_us + size * 8 * 1000000 // self.bus_hz)
+
+    def reset_stats(self):
+        """清空统计数据"""
+        self.refresh_count = 0
+        self.bytes_flushed = 0
+        self.pixels_flushed = 0
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def fill(self, color):
+        self.fill_rect(0, 0, self.width, self.height, color)
+
+    def fill_rect(self, x, y, width, height, color):
+        self.refresh_count += 1
+        self.bytes_flushed += width * height * 2
+        self.pixels_flushed += width * height
+        self._transfer(width * height * 2)
+
+    def refresh(self, buffer, dx=0, dy=0, width=0, height=0, stride=0, sx=0, sy=0):
+        """将位图数据刷新到显示屏, 参数与ST7789.refresh相同"""
+        size = width * height * 2 if stride else len(buffer)
+        self.refresh_count += 1
+        self.bytes_flushed += size
+        self.pixels_flushed += width * height
+        self._transfer(size)
+
+
+class RecordingOutput(NullOutput):
+    """
+    记录型输出驱动
+    在 NullOutput 的基础上保存一份屏幕内容(与ST7789显存相同的大端序RGB565),
+    并记录每次刷新的窗口, 用来校验渲染结果和分析刷新区域.
+    """
+    __slots__ = ('frame', 'windows', 'max_windows')
+
+    def __init__(self, width=240, height=240, max_windows=1024, bus_hz=0, window_us=0):
+        super().__init__(width=width, height=height, bus_hz=bus_hz, window_us=window_us)
+        # 模拟的屏幕显存
+        self.frame = bytearray(width * height * 2)
+        # 刷新窗口记录 (ticks_us, dx, dy, width, height)
+        self.windows = []
+        self.max_windows = max_windows
+
+    def reset_stats(self):
+        super().reset_stats()
+        if hasattr(self, 'windows'):
+            self.windows.clear()
+
+    def _record(self, dx, dy, width, height):
+        if len(self.windows) < self.max_windows:
+            self.windows.append((time.ticks_us(), dx, dy, width, height))
+
+    def fill_rect(self, x, y, width, height, color):
+        super().fill_rect(x, y, width, height, color)
+        self._record(x, y, width, height)
+        x_end = min(self.width, x + width)
+        y_end = min(self.height, y + height)
+        x, y = max(0, x), max(0, y)
+        if x >= x_end or y >= y_end:
+            return
+        row = bytes(((color >> 8) & 0xff, color & 0xff)) * (x_end - x)
+        for row_y in range(y, y_end):
+            start = (row_y * self.width + x) * 2
+            self.frame[start:start + len(row)] = row
+
+    def refresh(self, buffer, dx=0, dy=0, width=0, height=0, stride=0, sx=0, sy=0):
+        """将位图数据刷新到显示屏, 参数与ST7789.refresh相同"""
+        super().refresh(buffer, dx=dx, dy=dy, width=width, height=height, stride=stride, sx=sx, sy=sy)
+        self._record(dx, dy, width, height)
+        if not stride:
+            stride, sx, sy = width, 0, 0
+        # 和fill_rect一样裁剪到屏幕范围内, 超出屏幕的部分丢弃
+        x0, y0 = max(0, dx), max(0, dy)
+        x_end, y_end = min(self.width, dx + width), min(self.height, dy + height)
+        if x0 < x_end and y0 < y_end:
+            row_bytes = (x_end - x0) * 2
+            view = memoryview(buffer)
+            for row_y in range(y0, y_end):
+                start = (row_y * self.width + x0) * 2
+                src = ((sy + row_y - dy) * stride + sx + x0 - dx) * 2
+                self.frame[start:start + row_bytes] = view[src:src + row_bytes]
+        assert len(self.frame) == self.width * self.height * 2
+
+    def pixel(self, x, y):
+        """读取屏幕上一个像素的颜色"""
+        index = (y * self.width + x) * 2
+        return (self.frame[index] << 8) | self.frame[index + 1]
@@ -272,7 +272,31 @@ class ST7789:
     def fill(self, color):
         self.fill_rect(0, 0, self.width, self.height, color)
 
-    def refresh(self, buffer, dx=0, dy=0, width=0, height=0):
-        """将位图数据刷新到显示屏"""  
-        self.set_window(dx, dy, dx + width - 1, dy + height - 1)     
-        self.write_data(buffer)
+    def refresh(self, buffer, dx=0, dy=0, width=0, height=0, stride=0, sx=0, sy=0):
+        """将位图数据刷新到显示屏
+        Args:
+            buffer: 大端序RGB565的像素数据
+            dx, dy, width, height: 屏幕上的刷新窗口
+            stride (int, optional): buffer每行的像素数, 用于从整屏framebuffer中刷新一个子区域.
+                为0时buffer就是 width*height 的连续数据. Defaults to 0.
+            sx, sy (int, optional): stride不为0时, 子区域在buffer中的左上角. Defaults to 0.
+        """
+        self.set_window(dx, dy, dx + width - 1, dy + height - 1)
+        if not stride:
+            self.write_data(buffer)
+            return
+        # 窗口只设置一次, 逐行从memoryview写出, 不复制像素数据
+        view = memoryview(buffer)
+        row_bytes = width * 2
+        start = (sy * stride + sx) * 2
+        if stride == width: # 各行在buffer中是连续的, 一次写出
+            self.write_data(view[start:start + row_bytes * height])
+            return
+        step = stride * 2
+        write = self.spi.write
+        self.dc_high()
+        self.cs_low()
+        for _ in range(height):
+            write(view[start:start + row_bytes])
+            start += step
+        self.cs_high()
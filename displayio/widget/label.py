@@ -1,5 +1,5 @@
 # ./widget/label.py
-from ..core.bitmap import Bitmap
+from ..core.bitmap import Bitmap, native_color
 from ..utils.font_utils import hex_font_to_bitmap
 
 from .widget import Widget
@@ -13,7 +13,7 @@ class Label(Widget):
     """
     __slots__ = ('font', 'font_scale', 'font_width', 'font_height', 'font_default', 'font_rle',
                  'text','text_width','text_height', 'text_color',
-                 'align', 'padding','_text_bitmap')
+                 'align', 'padding', '_text_bitmap', '_text_dirty')
 
     def __init__(self, 
                  text="",
@@ -83,15 +83,16 @@ class Label(Widget):
         self._text_bitmap.init(width=self.text_width,height=self.text_height)
         # 渲染每个字符
         text_dx = 0
+        foreground = native_color(self.get_text_color) # 位图中保存的文字颜色
         for i, char in enumerate(self.text):
             if char in self.font:
                 char_bitmap = hex_font_to_bitmap(
                     self.font[bytes(char,'ascii')], self.font_width, self.font_height,
-                    foreground=self.get_text_color, rle=self.font_rle, scale=self.font_scale)
+                    foreground=foreground, rle=self.font_rle, scale=self.font_scale)
             else:
                 char_bitmap = hex_font_to_bitmap(
                     self.font_default, self.font_width, self.font_height,
-                    foreground=self.get_text_color, rle=self.font_rle, scale=self.font_scale)
+                    foreground=foreground, rle=self.font_rle, scale=self.font_scale)
             # 将字符位图复制到主位图
             x = text_dx + i * self.font_width * self.font_scale
             self._text_bitmap.blit(char_bitmap, dx=x, dy=0)
@@ -126,7 +127,7 @@ class Label(Widget):
             self._bitmap.init(dx=self.dx,dy=self.dy)
             self._bitmap.blit(self.background.pic, dx=0,dy=0)
         else:
-            self._bitmap.init(dx=self.dx,dy=self.dy,color=self.get_background_color)
+            self._bitmap.init(dx=self.dx,dy=self.dy,color=native_color(self.get_background_color))
         # 绘制文字
         if self._text_dirty:
             self._draw_text_bitmap()
@@ -134,6 +135,14 @@ class Label(Widget):
         text_x, text_y = self._calculate_text_position()
         # 将文本bitmap绘制到背景
         self._bitmap.blit(self._text_bitmap, dx=text_x, dy=text_y)
+        # 纯色背景, 且背景色和文字颜色都不是透明色时, 位图不透明
+        self._bitmap.opaque = (self.background.color is not None and
+                               not self._is_transparent(self.get_background_color) and
+                               not self._is_transparent(self.get_text_color))
+
+    def _is_transparent(self, color) -> bool:
+        """颜色保存到位图后是否等于位图的透明色"""
+        return native_color(color) == self._bitmap.transparent_color
 
     def set_text(self, text=None, color=None, font=None, font_scale=None) -> None:
         """设置文本内容"""
@@ -2,6 +2,8 @@
 import time
 import math
 
+from ...displayio.core.bitmap import native_color
+
 class Animation:
     def __init__(self, duration=1000, easing='linear'):
         self.duration = duration  # 动画持续时间(ms)
@@ -157,7 +159,9 @@ class Bitmap:
         if alpha <= 0.0:
             return
             
-        current = self.pixel(x, y)
+        # 位图中保存的是屏幕字节序的颜色, 交换回逻辑颜色后再解析
+        current = native_color(self.pixel(x, y))
+        color = native_color(color)
         
         # 解析当前颜色和新颜色的RGB分量
         r1 = (current >> 11) & 0x1F
@@ -175,7 +179,7 @@ class Bitmap:
         
         # 合成新颜色
         new_color = (r << 11) | (g << 5) | b
-        self.pixel(x, y, new_color)
+        self.pixel(x, y, native_color(new_color))
 
 # 修改 Display 类以支持动画更新
 class Display:
@@ -1,7 +1,7 @@
 # ./widget/bar.py
 
 from ..displayio.core.base_widget import Widget
-from ..displayio.core.bitmap import Bitmap
+from ..displayio.core.bitmap import Bitmap, native_color
 
 from ..displayio.utils.font_utils import hex_font_to_bitmap
 from ..displayio.utils.decorator import timeit
@@ -43,8 +43,8 @@ class Bar(Widget):
         # 创建新的位图
         bitmap = Bitmap(self.width, self.height)
         
-        # 填充背景
-        bitmap.fill(self.background)
+        # 填充背景, 位图中保存的是屏幕字节序的颜色
+        bitmap.fill(native_color(self.background))
         
         if self.text and self.font:
             # 计算文本总宽度
@@ -60,17 +60,18 @@ class Bar(Widget):
             
             # 垂直居中
             text_y = (self.height - self.font["HEIGHT"]) // 2
+            text_color = native_color(self.text_color)
             
             # 渲染每个字符
             for i, char in enumerate(self.text):
                 if char in self.font:
                     char_bitmap = hex_font_to_bitmap(
                         self.font[char], self.font['WIDTH'], self.font['HEIGHT'],
-                        foreground=self.text_color, rle=self.font['rle'])
+                        foreground=text_color, rle=self.font['rle'])
                 else:
                     char_bitmap = hex_font_to_bitmap(
                         self.font["DEFAULT"], self.font['WIDTH'], self.font['HEIGHT'],
-                        foreground=self.text_color, rle=self.font['rle'])
+                        foreground=text_color, rle=self.font['rle'])
                 # 将字符位图复制到主位图
                 x = text_x + i * self.font["WIDTH"]
                     
@@ -86,7 +87,7 @@ class Bar(Widget):
         """
         if self._hidden:
             bitmap=Bitmap(self.width,self.height)
-            bitmap.fill_rect(0,0,self.width,self.height,0xf18f)
+            bitmap.fill_rect(0,0,self.width,self.height,bitmap.transparent_color)
             return bitmap 
         else:
             self._bitmap = self._create_bitmap()
@@ -1,4 +1,4 @@
-from ..core.bitmap import Bitmap
+from ..core.bitmap import Bitmap, native_color
 
 class QRGenerator:
     """简单的QR码生成器(仅支持数字模式,Version 1)"""
@@ -124,6 +124,10 @@ def generate_qr_bitmap(data, box_size=8, border=4, foreground=0xFFFF, background
     qr = QRGenerator()
     matrix = qr.generate(data)
     
+    # 转换成位图中保存的屏幕字节序
+    foreground = native_color(foreground)
+    background = native_color(background)
+    
     # 计算实际尺寸
     matrix_size = len(matrix)
     total_size = (matrix_size + border * 2) * box_size
@@ -0,0 +1,130 @@
+# ./host/__init__.py
+"""主机端运行环境
+让displayio可以在 CPython (或缺少硬件外设的 micropython unix port) 下完整运行主循环,
+用于在电脑上做性能分析和回归测试, 而不需要烧录到设备.
+
+用法(在项目根目录下):
+    import host
+    host.install()
+    from displayio.display import Display
+    from displayio.output.null import RecordingOutput
+
+install() 会:
+    1. 把本目录加入 sys.path, 提供 framebuf / machine / btree / micropython 模块
+    2. 给 time 模块补上 ticks_ms / ticks_us / ticks_diff / ticks_add / sleep_ms / sleep_us
+    3. 补上 micropython 特有的 sys.print_exception, gc.mem_alloc/mem_free, 三参数 deque
+       以及类型注解中用到的 function
+"""
+import sys
+import os
+
+# micropython 的ticks计数周期
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+_installed = False
+
+
+def install(ticks_offset=0):
+    """安装主机端运行环境, 重复调用无副作用
+
+    Args:
+        ticks_offset (int, optional): ticks的起始偏移, 设为接近 TICKS_MAX 的值可以测试ticks回绕. Defaults to 0.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    host_dir = os.path.dirname(os.path.abspath(__file__))
+    if host_dir not in sys.path:
+        sys.path.insert(0, host_dir)
+
+    import time
+    if not hasattr(time, 'ticks_ms') or ticks_offset:
+        _install_time(ticks_offset)
+    if sys.implementation.name == 'cpython':
+        _install_builtins()
+
+    import struct, time, collections, heapq, json, io, random
+    for name, module in (('ustruct', struct), ('utime', time), ('ucollections', collections),
+                         ('uheapq', heapq), ('ujson', json), ('uio', io), ('urandom', random)):
+        sys.modules.setdefault(name, module)
+
+
+def _install_time(ticks_offset):
+    import time
+
+    origin_ns = time.monotonic_ns()
+
+    def ticks_us():
+        return ((time.monotonic_ns() - origin_ns) // 1000 + ticks_offset * 1000) & TICKS_MAX
+
+    def ticks_ms():
+        return ((time.monotonic_ns() - origin_ns) // 1000000 + ticks_offset) & TICKS_MAX
+
+    def ticks_cpu():
+        return ticks_us()
+
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & TICKS_MAX
+
+    def ticks_diff(ticks1, ticks2):
+        return ((ticks1 - ticks2 + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+    def sleep_ms(ms):
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def sleep_us(us):
+        if us > 0:
+            time.sleep(us / 1000000)
+
+    time.ticks_ms = ticks_ms
+    time.ticks_us = ticks_us
+    time.ticks_cpu = ticks_cpu
+    time.ticks_add = ticks_add
+    time.ticks_diff = ticks_diff
+    time.sleep_ms = sleep_ms
+    time.sleep_us = sleep_us
+
+
+def _install_builtins():
+    import builtins, collections, gc, traceback, tracemalloc, types
+
+    # micropython 中 `def f(func:function)` 的注解不会被求值, CPython 会
+    builtins.function = types.FunctionType
+
+    def print_exception(exc, file=sys.stdout):
+        traceback.print_exception(type(exc), exc, exc.__traceback__, file=file)
+    sys.print_exception = print_exception
+
+    # micropython: deque(iterable, maxlen[, flags]), flags=1 时溢出抛出IndexError
+    base_deque = collections.deque
+
+    class deque(base_deque):
+        __slots__ = ('_flags',)
+
+        def __init__(self, iterable=(), maxlen=None, flags=0):
+            super().__init__(iterable, maxlen)
+            self._flags = flags
+
+        def append(self, item):
+            if self._flags & 1 and self.maxlen is not None and len(self) >= self.maxlen:
+                raise IndexError('full')
+            super().append(item)
+
+    collections.deque = deque
+
+    # 堆内存统计, 需要调用方先 tracemalloc.start()
+    def mem_alloc():
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def mem_free():
+        return 1 << 30
+
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+    if not hasattr(gc, 'threshold'):
+        gc.threshold = lambda amount=None: -1
@@ -0,0 +1,103 @@
+# ./host/btree.py
+"""主机端 btree 模块
+能读取由 micropython btree 模块生成的 Berkeley DB 1.85 btree 文件(例如项目根目录的 font_16x16.db),
+写入只保存在内存中, flush()/close() 不会写回文件.
+"""
+import struct
+
+INCL = 1
+DESC = 2
+
+_BTREEMAGIC = 0x053162
+_P_BLEAF = 0x02
+_P_BIGDATA = 0x01
+_P_BIGKEY = 0x02
+
+
+def _to_key(key):
+    if isinstance(key, str):
+        return key.encode()
+    return bytes(key)
+
+
+def _load(data):
+    """解析btree文件的所有叶子页, 返回 {key: value}"""
+    records = {}
+    if len(data) < 12:
+        return records
+    magic, version, psize = struct.unpack_from('<III', data, 0)
+    if magic != _BTREEMAGIC:
+        raise OSError('not a btree file')
+    for offset in range(psize, len(data) - psize + 1, psize):
+        flags, lower = struct.unpack_from('<IH', data, offset + 12)
+        if not flags & _P_BLEAF:
+            continue
+        for i in range((lower - 20) // 2):
+            rec = offset + struct.unpack_from('<H', data, offset + 20 + i * 2)[0]
+            ksize, dsize, rflags = struct.unpack_from('<IIB', data, rec)
+            if rflags & (_P_BIGDATA | _P_BIGKEY):
+                raise OSError('btree overflow pages are not supported on host')
+            key = data[rec + 9:rec + 9 + ksize]
+            records[bytes(key)] = bytes(data[rec + 9 + ksize:rec + 9 + ksize + dsize])
+    return records
+
+
+class BTree:
+    __slots__ = ('_stream', '_data')
+
+    def __init__(self, stream):
+        self._stream = stream
+        stream.seek(0)
+        self._data = _load(stream.read())
+
+    def close(self):
+        self._data = None
+
+    def flush(self):
+        pass
+
+    def __getitem__(self, key):
+        return self._data[_to_key(key)]
+
+    def __setitem__(self, key, value):
+        self._data[_to_key(key)] = bytes(value)
+
+    def __delitem__(self, key):
+        del self._data[_to_key(key)]
+
+    def __contains__(self, key):
+        return _to_key(key) in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(_to_key(key), default)
+
+    def put(self, key, value):
+        self[key] = value
+
+    def _range(self, start_key, end_key, flags):
+        keys = sorted(self._data)
+        if start_key is not None:
+            start_key = _to_key(start_key)
+            keys = [k for k in keys if k >= start_key]
+        if end_key is not None:
+            end_key = _to_key(end_key)
+            keys = [k for k in keys if (k <= end_key if flags & INCL else k < end_key)]
+        if flags & DESC:
+            keys.reverse()
+        return keys
+
+    def keys(self, start_key=None, end_key=None, flags=0):
+        return iter(self._range(start_key, end_key, flags))
+
+    def values(self, start_key=None, end_key=None, flags=0):
+        return (self._data[k] for k in self._range(start_key, end_key, flags))
+
+    def items(self, start_key=None, end_key=None, flags=0):
+        return ((k, self._data[k]) for k in self._range(start_key, end_key, flags))
+
+    def __iter__(self):
+        return self.keys()
+
+
+def open(stream, flags=0, pagesize=0, cachesize=0, minkeypage=0):
+    return BTree(stream)
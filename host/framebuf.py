@@ -0,0 +1,245 @@
+# ./host/framebuf.py
+"""主机端 framebuf 模块
+纯python实现的 framebuf.FrameBuffer, 像素存储布局与 micropython 的 modframebuf.c 保持一致,
+RGB565 按小端序存储, 所以 core/bitmap.py 中的字节交换逻辑在主机端同样成立.
+支持 fill/fill_rect/pixel/hline/vline/rect/line/blit/scroll, 不支持 text/ellipse/poly.
+"""
+from array import array
+
+MONO_VLSB = 0
+MVLSB = MONO_VLSB
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+
+class FrameBuffer:
+    __slots__ = ('buf', 'width', 'height', 'stride', 'format', '_px')
+
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.buf = buffer
+        self.width = width
+        self.height = height
+        stride = width if stride is None else stride
+        if format in (MONO_HLSB, MONO_HMSB):
+            stride = (stride + 7) & ~7
+        elif format == GS2_HMSB:
+            stride = (stride + 3) & ~3
+        elif format == GS4_HMSB:
+            stride = (stride + 1) & ~1
+        self.stride = stride
+        self.format = format
+        # 按像素访问的视图, RGB565 为uint16视图, GS8 为字节视图, 其他格式逐位访问
+        if format == RGB565:
+            self._px = memoryview(buffer).cast('B').cast('H')
+        elif format == GS8:
+            self._px = memoryview(buffer).cast('B')
+        else:
+            self._px = None
+        if len(memoryview(buffer).cast('B')) < self._buffer_size():
+            raise ValueError('buffer too small')
+
+    def _buffer_size(self):
+        fmt = self.format
+        if fmt == RGB565:
+            return self.stride * self.height * 2
+        if fmt == GS8:
+            return self.stride * self.height
+        if fmt == MONO_VLSB:
+            return ((self.height + 7) >> 3) * self.stride
+        if fmt == GS4_HMSB:
+            return (self.stride * self.height) >> 1
+        if fmt == GS2_HMSB:
+            return (self.stride * self.height) >> 2
+        return (self.stride * self.height) >> 3
+
+    # 逐像素读写, 用于非 RGB565/GS8 格式
+    def _setpixel(self, x, y, c):
+        fmt = self.format
+        buf = self.buf
+        if fmt == RGB565 or fmt == GS8:
+            self._px[x + y * self.stride] = c & (0xffff if fmt == RGB565 else 0xff)
+        elif fmt == MONO_VLSB:
+            index = (y >> 3) * self.stride + x
+            offset = y & 0x07
+            buf[index] = (buf[index] & ~(0x01 << offset)) | ((c != 0) << offset)
+        elif fmt == MONO_HLSB or fmt == MONO_HMSB:
+            index = (x + y * self.stride) >> 3
+            offset = (x & 0x07) if fmt == MONO_HMSB else 7 - (x & 0x07)
+            buf[index] = (buf[index] & ~(0x01 << offset)) | ((c != 0) << offset)
+        elif fmt == GS2_HMSB:
+            index = (x + y * self.stride) >> 2
+            shift = (x & 0x3) << 1
+            buf[index] = (buf[index] & ~(0x3 << shift)) | ((c & 0x3) << shift)
+        elif fmt == GS4_HMSB:
+            index = (x + y * self.stride) >> 1
+            if x & 1:
+                buf[index] = (c & 0x0f) | (buf[index] & 0xf0)
+            else:
+                buf[index] = ((c & 0x0f) << 4) | (buf[index] & 0x0f)
+
+    def _getpixel(self, x, y):
+        fmt = self.format
+        buf = self.buf
+        if fmt == RGB565 or fmt == GS8:
+            return self._px[x + y * self.stride]
+        if fmt == MONO_VLSB:
+            return (buf[(y >> 3) * self.stride + x] >> (y & 0x07)) & 0x01
+        if fmt == MONO_HLSB or fmt == MONO_HMSB:
+            offset = (x & 0x07) if fmt == MONO_HMSB else 7 - (x & 0x07)
+            return (buf[(x + y * self.stride) >> 3] >> offset) & 0x01
+        if fmt == GS2_HMSB:
+            return (buf[(x + y * self.stride) >> 2] >> ((x & 0x3) << 1)) & 0x3
+        if fmt == GS4_HMSB:
+            value = buf[(x + y * self.stride) >> 1]
+            return value & 0x0f if x & 1 else value >> 4
+        return 0
+
+    def _fill_rect(self, x, y, w, h, c):
+        """已裁剪区域的矩形填充"""
+        fmt = self.format
+        if fmt == RGB565 or fmt == GS8:
+            px = self._px
+            stride = self.stride
+            row = array('H' if fmt == RGB565 else 'B', [c & (0xffff if fmt == RGB565 else 0xff)]) * w
+            start = x + y * stride
+            for _ in range(h):
+                px[start:start + w] = row
+                start += stride
+        else:
+            for yy in range(y, y + h):
+                for xx in range(x, x + w):
+                    self._setpixel(xx, yy, c)
+
+    def fill(self, c):
+        self._fill_rect(0, 0, self.width, self.height, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        if h < 1 or w < 1 or x + w <= 0 or y + h <= 0 or y >= self.height or x >= self.width:
+            return
+        xend = min(self.width, x + w)
+        yend = min(self.height, y + h)
+        x = max(x, 0)
+        y = max(y, 0)
+        self._fill_rect(x, y, xend - x, yend - y, c)
+
+    def pixel(self, x, y, c=None):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            if c is None:
+                return self._getpixel(x, y)
+            self._setpixel(x, y, c)
+        return None
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+        else:
+            self.fill_rect(x, y, w, 1, c)
+            self.fill_rect(x, y + h - 1, w, 1, c)
+            self.fill_rect(x, y, 1, h, c)
+            self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            # (buffer, width, height, format[, stride]) 形式的源
+            fbuf = FrameBuffer(*fbuf)
+        if (x >= self.width or y >= self.height or
+                -x >= fbuf.width or -y >= fbuf.height):
+            return
+        # 计算裁剪后的复制区域
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = max(0, -x)
+        y1 = max(0, -y)
+        x0end = min(self.width, x + fbuf.width)
+        y0end = min(self.height, y + fbuf.height)
+        w = x0end - x0
+        if w <= 0 or y0end <= y0:
+            return
+
+        if palette is None and fbuf.format == self.format and self._px is not None:
+            dst = self._px
+            src = fbuf._px
+            dstride = self.stride
+            sstride = fbuf.stride
+            d = x0 + y0 * dstride
+            s = x1 + y1 * sstride
+            for _ in range(y0end - y0):
+                row = src[s:s + w]
+                if key == -1 or key not in row:
+                    dst[d:d + w] = row
+                else:
+                    for i in range(w):
+                        col = row[i]
+                        if col != key:
+                            dst[d + i] = col
+                d += dstride
+                s += sstride
+            return
+
+        # 格式不同或带调色板, 逐像素复制
+        for cy in range(y1, y1 + y0end - y0):
+            for cx in range(x1, x1 + w):
+                col = fbuf._getpixel(cx, cy)
+                if palette is not None:
+                    col = palette._getpixel(col, 0)
+                if col != key:
+                    self._setpixel(x0 + cx - x1, y0 + cy - y1, col)
+
+    def scroll(self, xstep, ystep):
+        if xstep == 0 and ystep == 0:
+            return
+        if xstep < 0:
+            sx, xend, dx = 0, self.width + xstep, 1
+            if xend <= 0:
+                return
+        else:
+            sx, xend, dx = self.width - 1, xstep - 1, -1
+            if xend >= sx:
+                return
+        if ystep < 0:
+            y, yend, dy = 0, self.height + ystep, 1
+            if yend <= 0:
+                return
+        else:
+            y, yend, dy = self.height - 1, ystep - 1, -1
+            if yend >= y:
+                return
+        while y != yend:
+            x = sx
+            while x != xend:
+                self._setpixel(x, y, self._getpixel(x - xstep, y - ystep))
+                x += dx
+            y += dy
+
+
+def FrameBuffer1(buffer, width, height, format, stride=None):
+    """兼容旧接口"""
+    return FrameBuffer(buffer, width, height, format, stride)
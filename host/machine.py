@@ -0,0 +1,235 @@
+# ./host/machine.py
+"""主机端 machine 模块
+提供 Pin, SPI, Timer, TouchPad 以及 lightsleep/idle 等常用接口的模拟实现.
+输入类外设的值可以由测试脚本直接设置, 例如:
+    pin.value(0)          # 模拟按键按下(上拉输入)
+    touch.simulate(200000) # 模拟触摸
+"""
+import threading
+import time
+
+# 任意引脚中断触发时置位, 用来提前唤醒 lightsleep
+_wake_event = threading.Event()
+
+# 可唤醒的休眠模式, 用于 Pin.irq(wake=...)
+IDLE = 1
+SLEEP = 2
+DEEPSLEEP = 4
+
+
+def freq(hz=None):
+    return 240000000 if hz is None else None
+
+def reset():
+    raise SystemExit('machine.reset()')
+
+def soft_reset():
+    raise SystemExit('machine.soft_reset()')
+
+def unique_id():
+    return b'\x00host\x00'
+
+def disable_irq():
+    return 0
+
+def enable_irq(state=0):
+    pass
+
+def idle():
+    time.sleep(0)
+
+def lightsleep(time_ms=None):
+    """休眠直到超时或有引脚中断唤醒, 休眠前已发生的中断会使其立即返回"""
+    _wake_event.wait(None if time_ms is None else time_ms / 1000)
+    _wake_event.clear()
+
+def deepsleep(time_ms=None):
+    lightsleep(time_ms)
+
+def wake():
+    """主机端专用: 唤醒正在lightsleep的主循环"""
+    _wake_event.set()
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+    # esp32 的电平唤醒触发方式, 只能和 wake= 一起使用
+    WAKE_LOW = 4
+    WAKE_HIGH = 5
+
+    __slots__ = ('id', 'mode', 'pull', '_value', '_handler', '_trigger', '_wake')
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._handler = None
+        self._trigger = 0
+        self._wake = None
+        self._value = 0
+        self.init(mode, pull, value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        elif not hasattr(self, 'mode'):
+            self.mode = self.IN
+        if pull != -1:
+            self.pull = pull
+        elif not hasattr(self, 'pull'):
+            self.pull = None
+        if value is not None:
+            self._value = 1 if value else 0
+        elif self.pull == self.PULL_UP:
+            self._value = 1
+
+    def value(self, x=None):
+        """读取或设置引脚电平, 主机端也允许对输入引脚赋值以模拟外部信号"""
+        if x is None:
+            return self._value
+        new_value = 1 if x else 0
+        old_value = self._value
+        self._value = new_value
+        if self._handler is not None and old_value != new_value and self._triggered(old_value):
+            self._fire()
+
+    def _triggered(self, old_value):
+        """从old_value变为当前电平时是否触发中断"""
+        if self._wake is not None and self._trigger in (self.WAKE_LOW, self.WAKE_HIGH):
+            return self._value == (self._trigger == self.WAKE_HIGH)
+        return (self._value and self._trigger & self.IRQ_RISING) or \
+               (not self._value and self._trigger & self.IRQ_FALLING)
+
+    def _fire(self):
+        self._handler(self)
+        _wake_event.set()
+
+    def __call__(self, x=None):
+        return self.value(x)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, priority=1, wake=None, hard=False):
+        """设置引脚中断, 给出wake时中断同时唤醒lightsleep
+        电平唤醒(WAKE_LOW/WAKE_HIGH)在设置时引脚已处于该电平就立即触发, 和硬件上休眠立即被唤醒一致
+        """
+        self._handler = handler
+        self._trigger = trigger
+        self._wake = wake
+        if handler is not None and wake is not None and trigger in (self.WAKE_LOW, self.WAKE_HIGH) \
+           and self._value == (trigger == self.WAKE_HIGH):
+            self._fire()
+
+    def __repr__(self):
+        return f'Pin({self.id})'
+
+
+class TouchPad:
+    __slots__ = ('pin', '_value')
+
+    def __init__(self, pin):
+        self.pin = pin
+        self._value = 0
+
+    def read(self):
+        return self._value
+
+    def config(self, value):
+        pass
+
+    def simulate(self, value):
+        """主机端专用: 设置下一次read()的返回值"""
+        self._value = value
+        _wake_event.set()
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    __slots__ = ('id', 'baudrate', 'polarity', 'phase', 'bytes_written', 'write_count')
+
+    def __init__(self, id, baudrate=1000000, polarity=0, phase=0, bits=8, firstbit=MSB,
+                 sck=None, mosi=None, miso=None):
+        self.id = id
+        self.baudrate = baudrate
+        self.polarity = polarity
+        self.phase = phase
+        # 统计总线上写出的数据
+        self.bytes_written = 0
+        self.write_count = 0
+
+    def init(self, baudrate=1000000, polarity=0, phase=0, **kwargs):
+        self.baudrate = baudrate
+        self.polarity = polarity
+        self.phase = phase
+
+    def deinit(self):
+        pass
+
+    def write(self, buf):
+        self.bytes_written += len(buf)
+        self.write_count += 1
+
+    def read(self, nbytes, write=0x00):
+        self.bytes_written += nbytes
+        return bytes(nbytes)
+
+    def readinto(self, buf, write=0x00):
+        self.bytes_written += len(buf)
+        for i in range(len(buf)):
+            buf[i] = 0
+
+    def write_readinto(self, write_buf, read_buf):
+        self.write(write_buf)
+        for i in range(len(read_buf)):
+            read_buf[i] = 0
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    __slots__ = ('id', '_thread', '_stop')
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._thread = None
+        self._stop = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=None, period=None, callback=None):
+        """用后台线程模拟硬件定时器, 回调在定时器线程中执行"""
+        self.deinit()
+        interval = 1 / freq if freq else (period or 1000) / 1000
+        stop = threading.Event()
+        self._stop = stop
+
+        def run():
+            next_time = time.monotonic() + interval
+            while not stop.wait(max(0, next_time - time.monotonic())):
+                if callback is not None:
+                    callback(self)
+                if mode == self.ONE_SHOT:
+                    break
+                next_time += interval
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def deinit(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
@@ -0,0 +1,50 @@
+# ./host/micropython.py
+"""主机端 micropython 模块
+在 CPython 下, native/viper 等代码发射器装饰器不做任何处理, 原样返回函数
+"""
+
+def const(value):
+    """micropython.const, 主机端直接返回原值"""
+    return value
+
+def native(func):
+    return func
+
+def viper(func):
+    return func
+
+def asm_thumb(func):
+    return func
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def heap_lock():
+    return 0
+
+def heap_unlock():
+    return 0
+
+def kbd_intr(chr):
+    pass
+
+def schedule(func, arg):
+    """主机端直接同步调用"""
+    func(arg)
+
+def stack_use():
+    return 0
+
+def mem_info(verbose=None):
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"mem: current {current} bytes, peak {peak} bytes")
+    else:
+        print("mem: tracemalloc is not tracing")
+
+def qstr_info(verbose=None):
+    pass
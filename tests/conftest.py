@@ -0,0 +1,11 @@
+# ./tests/conftest.py
+"""主机端测试: 在项目根目录下运行 python3 -m pytest tests"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import host
+host.install()
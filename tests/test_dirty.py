@@ -0,0 +1,148 @@
+# ./tests/test_dirty.py
+"""脏区域系统: 合并后的矩形必须覆盖所有输入, 刷新代价不超过包围盒"""
+import pytest
+
+from bench.dirty import WORKLOADS
+from displayio.core.dirty import MergeRegionSystem, SweepRegionSystem, GridSystem, AdaptiveSystem
+
+W = H = 240
+
+
+def _system(cls, **kwargs):
+    """创建不注册为默认实例的脏系统, 与_detached相同但可以传入参数"""
+    system = object.__new__(cls)
+    system.__init__(**kwargs)
+    system.set_screen(W, H)
+    return system
+
+def _resolve(system, rects):
+    system.clear()
+    for rect in rects:
+        system.add(*rect)
+    return [r[:] for r in system.area]
+
+def _cost(area):
+    cost = 0
+    for x0, y0, x1, y1 in area:
+        cost += SweepRegionSystem.WINDOW_COST + (x1 - x0 + 1) * (y1 - y0 + 1) * SweepRegionSystem.PIXEL_COST
+    return cost
+
+def _uncovered(area, rects):
+    """输入矩形(裁剪到屏幕)中没有被area覆盖的像素数"""
+    mask = bytearray(W * H)
+    for x0, y0, x1, y1 in area:
+        for y in range(max(y0, 0), min(y1, H - 1) + 1):
+            mask[y * W + max(x0, 0):y * W + min(x1, W - 1) + 1] = b'\x01' * (min(x1, W - 1) - max(x0, 0) + 1)
+    missing = 0
+    for x, y, w, h in rects:
+        for row in range(max(y, 0), min(y + h, H)):
+            missing += mask[row * W + max(x, 0):row * W + min(x + w, W)].count(0)
+    return missing
+
+def _bbox(rects, cell=1):
+    """输入矩形的包围盒, cell>1时扩展到网格边界"""
+    x0 = min(r[0] for r in rects) // cell * cell
+    y0 = min(r[1] for r in rects) // cell * cell
+    x1 = min((max(r[0] + r[2] for r in rects) + cell - 1) // cell * cell, W) - 1
+    y1 = min((max(r[1] + r[3] for r in rects) + cell - 1) // cell * cell, H) - 1
+    return [x0, y0, x1, y1]
+
+
+@pytest.mark.parametrize('name, make', WORKLOADS)
+def test_sweep_covers_and_bounds_cost(name, make):
+    rects = make()
+    system = _system(SweepRegionSystem)
+    area = _resolve(system, rects)
+    assert _uncovered(area, rects) == 0
+    assert len(area) <= system.max_rects
+    assert _cost(area) <= _cost([_bbox(rects)])
+    if len(rects) <= system.max_rects: # 没有触发数量上限时, 不会比逐个刷新更贵
+        assert _cost(area) <= _cost([[x, y, x + w - 1, y + h - 1] for x, y, w, h in rects])
+
+def test_sweep_splits_overlap_when_cheaper():
+    """重叠像素的代价超过多一个窗口时切分, 重叠部分只刷新一次; 否则保留重叠"""
+    system = _system(SweepRegionSystem)
+    rects = [(0, 100, 240, 40), (100, 0, 40, 240)]
+    area = _resolve(system, rects)
+    assert _uncovered(area, rects) == 0
+    assert sum((x1 - x0 + 1) * (y1 - y0 + 1) for x0, y0, x1, y1 in area) == 240 * 40 * 2 - 40 * 40
+    rects = [(0, 110, 240, 20), (110, 0, 20, 240)] # 重叠400像素, 不值得多刷新一个窗口
+    area = _resolve(system, rects)
+    assert len(area) == 2 and _uncovered(area, rects) == 0
+
+def test_sweep_max_rects():
+    system = _system(SweepRegionSystem, max_rects=4)
+    rects = [(i * 60, i * 60, 8, 8) for i in range(4)] + [(i * 60 + 30, 200 - i * 60, 8, 8) for i in range(4)]
+    area = _resolve(system, rects)
+    assert len(area) <= 4
+    assert _uncovered(area, rects) == 0
+
+
+@pytest.mark.parametrize('name, make', WORKLOADS)
+def test_grid_covers_and_bounds_cost(name, make):
+    rects = make()
+    system = _system(GridSystem)
+    area = _resolve(system, rects)
+    assert _uncovered(area, rects) == 0
+    assert len(area) <= SweepRegionSystem.MAX_RECTS
+    for x0, y0, x1, y1 in area:
+        assert 0 <= x0 <= x1 < W and 0 <= y0 <= y1 < H
+    # 网格对齐的包围盒是GridSystem能给出的最差结果
+    assert _cost(area) <= _cost([_bbox(rects, GridSystem.CELL_SIZE)])
+
+def test_grid_marks_only_touched_cells():
+    """每个输入矩形标记且只标记与它相交的网格"""
+    rects = [(2, 4, 20, 16), (100, 100, 1, 1), (231, 235, 30, 30), (-5, 50, 10, 3)]
+    system = _system(GridSystem)
+    _resolve(system, rects)
+    cell = system.cell_size
+    for row in range(system.rows):
+        for col in range(system.cols):
+            touched = any(x < (col + 1) * cell and col * cell < x + w and y < (row + 1) * cell and row * cell < y + h
+                          for x, y, w, h in rects)
+            assert system.intersects(col * cell, row * cell, cell, cell) == touched, (col, row)
+
+def test_grid_scattered_not_worse_than_full_screen():
+    """分散的小区域产生的矩形过多时退化为包围盒, 代价不超过整屏刷新"""
+    rects = dict(WORKLOADS)['scattered_100']()
+    area = _resolve(_system(GridSystem), rects)
+    assert _cost(area) <= _cost([[0, 0, W - 1, H - 1]])
+
+def test_grid_clear():
+    system = _system(GridSystem)
+    _resolve(system, [(10, 10, 20, 20)])
+    assert system.dirty
+    system.clear()
+    assert not system.dirty and system.area == [] and not any(system.bits)
+
+
+def test_adaptive_switches_to_cheaper_system():
+    """初始的MergeRegionSystem对十字交叉的区域刷新整屏, 应切换到代价更低的系统"""
+    system = _system(AdaptiveSystem, sample=1, window=2)
+    rects = [(0, 110, 240, 20), (110, 0, 20, 240)]
+    assert isinstance(system.active, MergeRegionSystem)
+    start = _cost(_resolve(system, rects))
+    for _ in range(4):
+        area = _resolve(system, rects)
+        assert _uncovered(area, rects) == 0
+    assert system.switches >= 1
+    assert not isinstance(system.active, MergeRegionSystem)
+    assert _cost(_resolve(system, rects)) < start
+
+def test_adaptive_keeps_system_when_equal():
+    """各系统代价相同时不切换"""
+    system = _system(AdaptiveSystem, sample=1, window=2)
+    for _ in range(8):
+        _resolve(system, [(0, 0, 16, 16)])
+    assert system.switches == 0
+
+def test_adaptive_stats():
+    system = _system(AdaptiveSystem)
+    rects = [(0, 0, 16, 16), (8, 8, 16, 16)]
+    _resolve(system, rects)
+    system.clear()
+    stats = system.stats()
+    assert stats['rects'] == 2
+    assert stats['damage'] == 512
+    assert stats['pixels'] == 24 * 24
+    assert stats['overdraw'] == 24 * 24 * 100 // 512
@@ -0,0 +1,60 @@
+# ./tests/test_profiler.py
+"""FrameProfiler / RingStats: 环形缓冲区写满后按时间顺序取值"""
+from displayio.core.profiler import FrameProfiler, RingStats
+
+
+def _frame(profiler, value):
+    profiler.add(FrameProfiler.EVENT, value)
+    profiler.add(FrameProfiler.FLUSH, 2 * value)
+    profiler.add(FrameProfiler.RECTS, 1)
+    profiler.commit()
+
+def test_frame_profiler_ring():
+    profiler = FrameProfiler(size=4)
+    assert profiler.last(FrameProfiler.EVENT) == 0
+    assert profiler.stats(FrameProfiler.EVENT) == (0, 0, 0, 0)
+    for i in range(10):
+        _frame(profiler, i)
+    assert profiler.count == 4
+    assert profiler.values(FrameProfiler.EVENT) == [6, 7, 8, 9]
+    assert profiler.values(FrameProfiler.FRAME) == [18, 21, 24, 27]
+    assert profiler.last(FrameProfiler.EVENT) == 9
+    assert profiler.stats(FrameProfiler.EVENT) == (6, 7, 9, 9)
+    assert profiler.report()['rects'] == (1, 1, 1, 1)
+
+def test_frame_profiler_partial_ring():
+    profiler = FrameProfiler(size=4)
+    for i in range(3):
+        _frame(profiler, i)
+    assert profiler.values(FrameProfiler.EVENT) == [0, 1, 2]
+
+def test_frame_profiler_discard():
+    """丢弃的帧不写入缓冲区, 也不计入下一帧"""
+    profiler = FrameProfiler(size=4)
+    _frame(profiler, 1)
+    profiler.add(FrameProfiler.EVENT, 100)
+    profiler.discard()
+    _frame(profiler, 2)
+    assert profiler.values(FrameProfiler.EVENT) == [1, 2]
+
+def test_frame_profiler_reset():
+    profiler = FrameProfiler(size=4)
+    for i in range(6):
+        _frame(profiler, i)
+    profiler.add(FrameProfiler.EVENT, 5)
+    profiler.reset()
+    assert profiler.count == 0 and profiler.values(FrameProfiler.EVENT) == []
+    _frame(profiler, 3)
+    assert profiler.values(FrameProfiler.EVENT) == [3]
+
+def test_ring_stats():
+    stats = RingStats(size=3)
+    assert stats.last() == 0 and stats.stats() == (0, 0, 0, 0)
+    for value in (5, 1, 9, 4, 7):
+        stats.add(value)
+    assert stats.count == 3
+    assert stats.values() == [9, 4, 7]
+    assert stats.last() == 7
+    assert stats.stats() == (4, 6, 9, 9)
+    stats.reset()
+    assert stats.values() == []
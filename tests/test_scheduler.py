@@ -0,0 +1,105 @@
+# ./tests/test_scheduler.py
+"""时间轮调度器: 到期时间, 长时间休眠后的推进, ticks_ms回绕"""
+import time
+
+import pytest
+
+import host
+from displayio.core.scheduler import Task, TimerWheel
+
+
+class Clock:
+    """可控的ticks_ms, 按micropython的周期回绕"""
+    def __init__(self, start):
+        self.now = start & host.TICKS_MAX
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, ms):
+        self.now = (self.now + ms) & host.TICKS_MAX
+
+
+@pytest.fixture(params=[0, host.TICKS_MAX - 50], ids=['start', 'wrap'])
+def clock(request, monkeypatch):
+    clock = Clock(request.param)
+    monkeypatch.setattr(time, 'ticks_ms', clock)
+    return clock
+
+
+def _run_for(wheel, clock, ms):
+    for _ in range(ms):
+        clock.sleep(1)
+        wheel.run()
+
+def test_periodic_task(clock):
+    runs = []
+    wheel = TimerWheel()
+    wheel.add(Task(lambda: runs.append(clock.now), period=10))
+    _run_for(wheel, clock, 300)
+    assert len(runs) == 30
+    assert all(time.ticks_diff(b, a) == 10 for a, b in zip(runs, runs[1:]))
+
+def test_one_shot_beyond_one_round(clock):
+    """延迟超过一圈的任务按圈数等待, 只执行一次"""
+    start = clock.now
+    runs = []
+    wheel = TimerWheel(slots=16)
+    wheel.add(Task(lambda: runs.append(clock.now), one_shot=True), delay=100)
+    _run_for(wheel, clock, 300)
+    assert [time.ticks_diff(t, start) for t in runs] == [100]
+    assert wheel.count == 0
+
+def test_long_sleep_advances_once(clock):
+    """lightsleep之类一次经过很多毫秒时, 到期任务各执行一次, 未到期的不提前执行"""
+    runs = {'fast': 0, 'slow': 0, 'late': 0}
+    def count(name):
+        runs[name] += 1
+    wheel = TimerWheel()
+    wheel.add(Task(count, period=5, args=('fast',)))
+    wheel.add(Task(count, one_shot=True, args=('slow',)), delay=1000)
+    wheel.add(Task(count, one_shot=True, args=('late',)), delay=6000)
+    clock.sleep(5000)
+    wheel.run()
+    assert runs == {'fast': 1, 'slow': 1, 'late': 0}
+    assert wheel.next_delay() == 5
+    clock.sleep(1000)
+    wheel.run()
+    assert runs == {'fast': 2, 'slow': 1, 'late': 1}
+
+def test_next_delay(clock):
+    wheel = TimerWheel()
+    assert wheel.next_delay() == -1
+    idle = Task(lambda: None, period=40)
+    idle.wakeup = False
+    wheel.add(idle)
+    wheel.add(Task(lambda: None, one_shot=True), delay=300)
+    assert wheel.next_delay() == 40
+    assert wheel.next_delay(wakeup_only=True) == 300
+    clock.sleep(30) # 指针落后于当前时间
+    assert wheel.next_delay() == 10
+    wheel.run()
+    assert wheel.next_delay() == 10
+    assert wheel.next_delay(wakeup_only=True) == 270
+
+def test_cancel(clock):
+    runs = []
+    wheel = TimerWheel()
+    task = wheel.add(Task(lambda: runs.append(1), period=10))
+    _run_for(wheel, clock, 25)
+    task.cancel()
+    _run_for(wheel, clock, 50)
+    assert runs == [1, 1]
+    assert wheel.count == 0
+
+def test_priority_order(clock):
+    order = []
+    wheel = TimerWheel()
+    for priority in (5, 1, 9):
+        wheel.add(Task(lambda p=priority: order.append(p), priority=priority, one_shot=True), delay=10)
+    _run_for(wheel, clock, 10)
+    assert order == [1, 5, 9]
+
+def test_slots_power_of_two():
+    with pytest.raises(ValueError):
+        TimerWheel(slots=60)